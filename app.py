@@ -6,11 +6,16 @@ from components.codegen import codegen_comp
 from components.functions import functions_comp
 from components.log import log_comp
 from components.nav_bar import navbar_comp
-from components.query import query_comp
+from components.query import query_comp, warm_query_model
+from components.runs import runs_comp
+from config import cfg
 from finalize import finalize
 from initialize import initialize
 from playwright_install import ensure_chromium_install
-from utils.dpg_ui import log
+from utils.browser_server import start_browser_server
+from utils.dpg_ui import drain_ui_queue, log
+from utils.fs_watcher import start_watcher
+from utils.runner import get_pool
 
 
 def main_window():
@@ -20,6 +25,7 @@ def main_window():
         query_comp()
         codegen_comp()
         functions_comp()
+        runs_comp()
 
         dpg.add_spacer(height=8)
 
@@ -31,6 +37,18 @@ def post_ui_setup():
         case Failure(e):
             log(str(e))
 
+    # 함수 실행 워커와 공유 브라우저를 미리 띄워 둔다
+    get_pool()
+    start_browser_server()
+
+    # functions/, tools.db 변경을 감시해 캐시를 바로 갱신
+    if cfg["fs_watch"]:
+        backend = start_watcher(
+            cfg["fs_watch_backend"], cfg["fs_watch_interval"], cfg["fs_watch_debounce"]
+        )
+        log(f"파일 감시 시작 ({backend})")
+    warm_query_model(dpg.get_value("model_selector"))
+
 
 def main():
     initialize()
@@ -39,7 +57,11 @@ def main():
     dpg.setup_dearpygui()
     dpg.show_viewport()
     dpg.set_primary_window("main_window", True)
-    dpg.start_dearpygui()
+
+    # 워커 스레드가 쌓아 둔 로그/UI 작업은 프레임마다 한 번에 처리
+    while dpg.is_dearpygui_running():
+        drain_ui_queue()
+        dpg.render_dearpygui_frame()
 
     finalize()
 
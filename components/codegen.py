@@ -1,224 +1,90 @@
-import json
 import os
-import re
-import subprocess
-import sys
+import threading
 
 import dearpygui.dearpygui as dpg
 
+from config import cfg
 from env import (
     DEFAULT_URL,
     FUNCTIONS_DIR,
-    TOOLS_PATH,
 )
-from utils.dpg_ui import log, show_alert
-
-
-def load_existing_tools() -> list:
-    """tools.py에서 현재 정의된 도구 목록을 로드"""
-    if not os.path.exists(TOOLS_PATH):
-        return []
-
-    try:
-        with open(TOOLS_PATH, "r", encoding="utf-8") as f:
-            content = f.read()
-
-        # 간단한 파싱을 위해 exec 사용 (보안상 로컬 환경에서만 권장)
-        local_vars = {}
-        exec(content, {}, local_vars)
-        return local_vars.get("TOOLS", [])
-    except Exception as e:
-        log(f"기존 tools.py 로드 실패: {e}")
-        return []
-
-
-def save_tools_list(tools_list: list):
-    """도구 리스트를 tools.py에 저장"""
-    with open(TOOLS_PATH, "w", encoding="utf-8") as f:
-        f.write("# AUTO-GENERATED TOOL DEFINITIONS\n")
-        f.write("TOOLS = ")
-        json_str = json.dumps(tools_list, indent=4, ensure_ascii=False)
-        # Python 문법에 맞게 변환
-        f.write(
-            json_str.replace("true", "True")
-            .replace("false", "False")
-            .replace("null", "None")
-        )
-        f.write("\n")
+from errors import CodegenError
+from utils.codegen_sessions import (
+    clear_finished,
+    list_sessions,
+    retry_save,
+    start_session,
+    stop_session,
+    subscribe,
+)
+from utils.bulk_import import import_in_subprocess
+from utils.codegen_transform import params_to_schema, transform_recording
+from utils.dpg_ui import log, run_on_ui, show_alert
+from utils.registry import list_tools, upsert_tool
+from utils.selector_optimizer import optimize_function
 
 
 def add_tools_py(filename, name, schema, desc):  # desc 인자 추가
-    # 1. 기존 도구 로드
-    current_tools = load_existing_tools()
-
-    # 2. 중복 제거 (이미 같은 이름이 있다면 삭제 후 갱신)
-    current_tools = [t for t in current_tools if t["function"]["name"] != name]
-
-    # 3. 새 도구 추가
-    new_tool = {
-        "type": "function",
-        "function": {
-            "name": name,
-            "description": desc,  # UI에서 받은 desc 사용
-            "parameters": schema,
-        },
-    }
-    current_tools.append(new_tool)
+    # 같은 이름이 있으면 갱신, 없으면 추가
+    upsert_tool(name, desc, schema, filename)
+    log(f"도구 레지스트리 갱신 완료 (총 {len(list_tools())} 함수)")
 
-    # 4. 저장
-    save_tools_list(current_tools)
-    log(f"tools.py 갱신 완료 (총 {len(current_tools)} 함수)")
 
-
-def params_to_schema(params):
-    """UI 파라미터를 JSON Schema로 변환"""
-    properties = {}
-    required = []
-
-    for p in params:
-        var = p["variable"]
-        desc = p["desc"]
-        typ = p["type"]
-
-        if typ == "문자열":
-            t = "string"
-        else:
-            t = "number"
-
-        properties[var] = {"type": t, "description": desc}
-        required.append(var)
-
-    return {"type": "object", "properties": properties, "required": required}
-
-
-def save_function_to_file(code_output: str):
+def save_function_to_file(
+    code_output: str,
+    filename: str | None = None,
+    desc: str | None = None,
+    params: list | None = None,
+) -> bool:
     """
-    모달 창 없이, UI에서 입력받은 함수명과 설명으로 파일을 저장하고 tools.py를 갱신합니다.
+    모달 창 없이, UI에서 입력받은 함수명과 설명으로 파일을 저장하고 도구 레지스트리를 갱신합니다.
+    녹화 세션처럼 다른 스레드에서 부를 때는 filename/desc/params를 직접 넘깁니다.
     """
 
-    filename = dpg.get_value("input_filename").strip()
-    desc = dpg.get_value("input_desc").strip()
+    if filename is None:
+        filename = dpg.get_value("input_filename").strip()
+    if desc is None:
+        desc = dpg.get_value("input_desc").strip()
 
     if not filename or not desc:
         show_alert("오류", "함수명과 설명을 모두 입력해주세요.")
-        return
-
-    code_output = re.sub(r"^\s*page\d*\.close\(\)", "", code_output, flags=re.M)
-
-    def insert_keepalive(match: re.Match) -> str:
-        return (
-            "    # Keep browser open loop\n"
-            "    while True:\n"
-            "        try:\n"
-            "            page.wait_for_timeout(1000)\n"
-            "        except Exception:\n"
-            "            break\n\n"
-            "    context.close()"
-        )
-
-    code_output = re.sub(
-        r"^([ \t]*)context\.close\(\)",
-        insert_keepalive,
-        code_output,
-        count=1,
-        flags=re.M,
-    )
-
-    current_params = get_all_params()
-
-    def inject_params_into_code(code_output, params):
-        sig_params = ", ".join(
-            f"{p['variable']}: {'str' if p['type'] == '문자열' else 'int'}"
-            for p in params
-        )
-        if sig_params:
-            sig_params = ", " + sig_params
-
-        new_code = re.sub(
-            r"def run\(playwright: Playwright\)",
-            f"def run(playwright: Playwright{sig_params})",
-            code_output,
-            count=1,
-        )
-        return new_code
-
-    new_code_output = inject_params_into_code(code_output, current_params)
-
-    for p in current_params:
-        var_name = p["variable"]
-
-        placeholder_literal = f'"${{{var_name}}}"'  #
-
-        new_code_output = new_code_output.replace(
-            placeholder_literal,
-            var_name,
-        )
-
-        placeholder_bare = f"${{{var_name}}}"
-        new_code_output = new_code_output.replace(placeholder_bare, var_name)
-
-    def generate_main_block(params):
-        lines = [
-            "",
-            'if __name__ == "__main__":',
-            "    import argparse",
-            "    from playwright.sync_api import sync_playwright # main 블록에서 import 필요",
-            "    parser = argparse.ArgumentParser()",
-        ]
-
-        arg_list = []
-        for p in params:
-            var_name = p["variable"]
-            p_type = "str" if p["type"] == "문자열" else "int"
-
-            lines.append(
-                f'    parser.add_argument("--{var_name}", type=str, required=True, help="{p["desc"]}")'
-            )
-            arg_list.append(f"{var_name}=args.{var_name}")
-
-        lines.append("    args = parser.parse_args()")
-        lines.append("")
-
-        args_str = ", ".join(arg_list)
-        if args_str:
-            args_str = ", " + args_str
+        return False
 
-        lines.append("    with sync_playwright() as playwright:")
-        lines.append(f"        run(playwright{args_str})")
+    current_params = get_all_params() if params is None else params
 
-        return "\n".join(lines)
-
-    def remove_sync_playwright_block(code_output: str) -> str:
-        """기존 Playwright 생성 코드 (with sync_playwright() as playwright: run(playwright)) 제거"""
-        pattern = re.compile(
-            r"^([ \t]*with sync_playwright\(\) as playwright:\s*\n[ \t]*run\(playwright\)[ \t]*\n?)$",
-            re.MULTILINE | re.DOTALL,
-        )
-        cleaned_output = pattern.sub("", code_output).strip()
-        return cleaned_output
-
-    schema = params_to_schema(current_params)
-    main_block = generate_main_block(current_params)
+    try:
+        code = transform_recording(code_output, current_params, desc)
+    except CodegenError as e:
+        show_alert("오류", str(e))
+        return False
 
     if not os.path.exists(FUNCTIONS_DIR):
         os.makedirs(FUNCTIONS_DIR)
 
     file_path = os.path.join(FUNCTIONS_DIR, f"{filename}.py")
-    final_code_body = remove_sync_playwright_block(new_code_output)
-
     with open(file_path, "w", encoding="utf-8") as f:
-        f.write(f"# {desc}\n")
-        f.write("import time\n")
-        # final_code_body에는 Playwright import가 포함되어 있어야 함
-        f.write(final_code_body)
-        f.write(main_block)  # argparse가 포함된 실행 블록 작성
+        f.write(code)
 
-    add_tools_py(file_path, filename, schema, desc)  # desc도 함께 전달
+    add_tools_py(file_path, filename, params_to_schema(current_params), desc)
 
     log(f"함수 저장 완료: {filename}.py")
+    return True
+
+
+def _save_recording(code_output: str, filename: str, desc: str, params: list):
+    if not save_function_to_file(code_output, filename, desc, params):
+        raise RuntimeError("함수 저장 실패")
+
+    # 인자 값이 필요 없는 함수만 바로 재실행해 선택자를 다듬는다
+    if cfg.get("selector_optimize_after_record") and not params:
+        try:
+            optimize_function(os.path.join(FUNCTIONS_DIR, f"{filename}.py"))
+        except Exception as e:
+            log(f"선택자 최적화 실패: {filename} - {e}", level="error")
 
 
 def open_playwright_codegen(sender, app_data, user_data):
+    """녹화 세션을 백그라운드에서 시작. 입력값은 지금 시점의 값을 세션에 고정한다"""
     url = dpg.get_value("input_url")
     filename = dpg.get_value("input_filename").strip()
     desc = dpg.get_value("input_desc").strip()
@@ -240,34 +106,100 @@ def open_playwright_codegen(sender, app_data, user_data):
             show_alert("입력 오류", "파라미터 설명을 입력하세요.")
             return
 
-    log(f"함수 기록 시작: {url}")
+    try:
+        start_session(
+            filename,
+            url,
+            on_finish=lambda session, code: _save_recording(
+                code, filename, desc, params
+            ),
+        )
+    except Exception as e:
+        show_alert("오류", f"open_playwright_codegen 실행 중 오류 발생:\n{e}")
+        return
+
+    log(f"함수 기록 시작: {filename} ({url})")
     log("브라우저 창을 닫으면 코드가 저장됩니다...")
 
-    tmp_path = os.path.join(FUNCTIONS_DIR, "tmp_codegen.py")
 
-    cmd = [
-        sys.executable,
-        "-m",
-        "playwright",
-        "codegen",
-        url,
-        "--target",
-        "python",
-        "--output",
-        tmp_path,
-    ]
+def refresh_session_list():
+    """녹화 세션 표를 다시 그립니다."""
+    if not dpg.does_item_exist("codegen_sessions_group"):
+        return
 
-    try:
-        subprocess.run(cmd)
-        if os.path.exists(tmp_path):
-            with open(tmp_path, "r", encoding="utf-8") as f:
-                code_output = f.read()
-            os.remove(tmp_path)
-            save_function_to_file(code_output)
-        else:
-            log("codegen이 코드를 생성하지 않고 종료되었습니다.")
-    except Exception as e:
-        show_alert("오류", f"open_playwright_codegen 실행 중 오류 발생:\n{e}")
+    dpg.delete_item("codegen_sessions_group", children_only=True)
+    sessions = list_sessions()
+    if not sessions:
+        return
+
+    with dpg.table(
+        parent="codegen_sessions_group",
+        header_row=True,
+        resizable=True,
+        policy=dpg.mvTable_SizingStretchProp,
+    ):
+        for label in ["#", "함수", "URL", "상태", "시간", ""]:
+            dpg.add_table_column(label=label)
+
+        for session in sessions:
+            with dpg.table_row():
+                dpg.add_text(str(session.id))
+                dpg.add_text(session.name)
+                dpg.add_text(session.url)
+                status = session.status
+                if session.error:
+                    status += f" ({session.error})"
+                dpg.add_text(status, wrap=0)
+                dpg.add_text(f"{session.elapsed:.0f}s")
+                if session.running:
+                    dpg.add_button(
+                        label="중지",
+                        callback=lambda s, a, u: stop_session(u),
+                        user_data=session.id,
+                    )
+                elif session.status == "실패" and session.has_output:
+                    dpg.add_button(
+                        label="다시 저장",
+                        callback=lambda s, a, u: retry_save(u),
+                        user_data=session.id,
+                    )
+                else:
+                    dpg.add_text("")
+
+
+def _on_session_change(session):
+    if session.status == "완료":
+        log(f"녹화 세션 완료: {session.name}")
+    elif session.status == "실패":
+        log(f"녹화 세션 실패: {session.name} - {session.error}", level="error")
+    elif session.status == "취소":
+        log(f"녹화 세션 취소: {session.name}")
+    run_on_ui(refresh_session_list)
+
+
+subscribe(_on_session_change)
+
+
+def _import_folder(sender, app_data):
+    """선택한 폴더의 녹화 스크립트를 백그라운드에서 일괄 가져오기"""
+    directory = app_data.get("file_path_name")
+    if not directory:
+        return
+
+    overwrite = dpg.get_value("import_overwrite")
+
+    def work():
+        # 프로세스 풀은 앱 프로세스가 아니라 CLI 프로세스에서 띄운다 (spawn이 app.py를 다시 실행하지 않도록)
+        try:
+            code = import_in_subprocess(directory, overwrite, report=log)
+        except Exception as e:
+            log(f"일괄 가져오기 실패: {e}", level="error")
+            return
+        if code != 0:
+            log(f"일괄 가져오기 실패 (종료 코드 {code})", level="error")
+
+    log(f"일괄 가져오기 시작: {directory}")
+    threading.Thread(target=work, daemon=True).start()
 
 
 def codegen_comp():
@@ -311,6 +243,30 @@ def codegen_comp():
             height=40,
             callback=open_playwright_codegen,
         )
+        dpg.add_spacer(height=10)
+        with dpg.group(horizontal=True):
+            dpg.add_text("녹화 세션")
+            dpg.add_button(
+                label="끝난 세션 지우기",
+                callback=lambda: (clear_finished(), refresh_session_list()),
+            )
+        dpg.add_group(tag="codegen_sessions_group")
+        dpg.add_spacer(height=10)
+
+        with dpg.group(horizontal=True):
+            dpg.add_button(
+                label="폴더 가져오기",
+                callback=lambda: dpg.show_item("import_folder_dialog"),
+            )
+            dpg.add_checkbox(label="같은 이름 덮어쓰기", tag="import_overwrite")
+        dpg.add_file_dialog(
+            tag="import_folder_dialog",
+            directory_selector=True,
+            show=False,
+            callback=_import_folder,
+            width=500,
+            height=350,
+        )
 
 
 param_rows = []
@@ -344,7 +300,7 @@ def add_param_row(parent: str):
             with dpg.table_row():
                 dpg.add_combo(
                     tag=t_type,
-                    items=["문자열", "숫자"],
+                    items=["문자열", "숫자", "실수"],
                     default_value="문자열",
                     width=90,
                 )
@@ -1,43 +1,26 @@
 import json
 import os
-import subprocess
-import sys
 import threading
 
 import dearpygui.dearpygui as dpg
 
 from env import (
     FUNCTIONS_DIR,
-    TOOLS_PATH,
 )
-from utils.dpg_ui import log, show_alert
-
-
-def load_tools():
-    """tools.py 파싱"""
-    if not os.path.exists(TOOLS_PATH):
-        return []
-    try:
-        content = open(TOOLS_PATH, "r", encoding="utf-8").read()
-        local_vars = {}
-        exec(content, {}, local_vars)
-        return local_vars.get("TOOLS", [])
-    except Exception:
-        return []
-
-
-def save_tools_list_direct(tools_list: list):
-    """tools.py 저장 (삭제 시 사용)"""
-    with open(TOOLS_PATH, "w", encoding="utf-8") as f:
-        f.write("# AUTO-GENERATED TOOL DEFINITIONS\n")
-        f.write("TOOLS = ")
-        json_str = json.dumps(tools_list, indent=4, ensure_ascii=False)
-        f.write(
-            json_str.replace("true", "True")
-            .replace("false", "False")
-            .replace("null", "None")
-        )
-        f.write("\n")
+from utils.browser_lifecycle import POLICIES, policy_for, set_policy
+from utils.browser_profiles import (
+    create_profile,
+    list_profiles,
+    profile_of,
+    set_function_profile,
+    site_of_function,
+)
+from utils.dpg_ui import log, run_on_ui, show_alert
+from utils.function_loader import compile_function, invalidate
+from utils.registry import delete_tool, list_tools, subscribe, tools_version
+from utils.retrieval import normalize_text
+from utils.runner import run_function
+from utils.selector_optimizer import optimize_function
 
 
 def show_code_preview(filename: str):
@@ -68,7 +51,15 @@ def show_code_preview(filename: str):
                 f.write(new_code)
             log(f"저장 완료: {filename} 내용 수정됨.")
         except Exception as e:
-            log(f"저장 실패: {e}")
+            log(f"저장 실패: {e}", level="error")
+            return
+
+        # 캐시된 모듈을 버리고 새 코드를 미리 컴파일해 문법 오류를 알려준다
+        invalidate(file_path)
+        try:
+            compile_function(file_path)
+        except SyntaxError as e:
+            log(f"⚠️ 문법 오류: {filename} {e.lineno}행: {e.msg}", level="error")
 
     with dpg.window(
         label=f"Preview: {filename}",
@@ -92,216 +83,384 @@ def show_code_preview(filename: str):
             dpg.add_button(label="닫기", width=120, callback=close_preview)
 
 
-def refresh_function_list():
-    """functions_group 태그 내부를 비우고 다시 그립니다. 인자 입력 UI 추가"""
-    if not dpg.does_item_exist("functions_group"):
+NO_PROFILE = "없음"
+
+# 이름 -> {"row", "header", "signature", "func", "inputs", "profile_combo"}
+_entries: dict = {}
+# 펼친 항목의 본문은 clipper 표 밖(function_detail)에 하나만 그린다.
+# 표 행 높이가 모두 같아야 clipper가 보이는 행을 제대로 고르기 때문
+_selected: str | None = None
+_shown_version: int | None = None
+_refresh_scheduled = False
+
+
+def _signature(func: dict) -> str:
+    return json.dumps(func, sort_keys=True, ensure_ascii=False)
+
+
+def _header_label(func: dict) -> str:
+    """목록 행은 높이가 같아야 하므로(clipper) 설명은 첫 줄만"""
+    lines = func["description"].strip().splitlines()
+    return f"{func['name']}  -  {lines[0] if lines else ''}"
+
+
+def _get_runtime_args(entry: dict) -> dict | None:
+    """선택한 항목의 입력창에서 인자 값을 읽는다"""
+    func = entry["func"]
+    args = {}
+    for var_name in func["parameters"].get("properties", {}):
+        tag = entry["inputs"].get(var_name)
+        value = dpg.get_value(tag) if tag and dpg.does_item_exist(tag) else None
+        if value is None or (isinstance(value, str) and not value.strip()):
+            # 필수 인수가 비어있으면 경고
+            show_alert(
+                "입력 오류",
+                f"함수 '{func['name']}'의 필수 인자 '{var_name}' 값을 입력해주세요.",
+            )
+            return None  # 실행 중단
+
+        # 타입 변환 (argparse가 기대하는 str 형태로 전달)
+        args[var_name] = str(value)
+    return args
+
+
+def _run_entry(sender, app_data, name: str):
+    entry = _entries.get(name)
+    if entry is None:
+        return
+    args = _get_runtime_args(entry)
+    if args is None:
         return
 
-    dpg.delete_item("functions_group", children_only=True)
+    f_path = os.path.join(FUNCTIONS_DIR, f"{name}.py")
+    log(f"실행 중: {name}.py (인자: {args})")
+    if not os.path.exists(f_path):
+        show_alert("오류", f"파일이 존재하지 않습니다: {f_path}")
+        return
 
-    tools = load_tools()
-    if not tools:
-        dpg.add_text("아직 생성된 함수가 없습니다.", parent="functions_group")
+    def on_done(future):
+        try:
+            result = future.result()
+            log(f"{name}.py 실행 종료 (종료 코드: {result.get('code')})")
+        except Exception as e:
+            show_alert("실행 오류", str(e))
+
+    run_function(f_path, args).add_done_callback(on_done)
+
+
+def _optimize_entry(sender, app_data, name: str):
+    """입력한 인자로 함수를 헤드리스 재실행해 선택자를 최적화 (백그라운드)"""
+    entry = _entries.get(name)
+    if entry is None:
+        return
+    args = _get_runtime_args(entry)
+    if args is None:
         return
 
-    for item in tools:
-        func = item["function"]
-        name = func["name"]
-        desc = func["description"]
-        params_schema = func["parameters"].get("properties", {})  # 파라미터 스키마
-
-        file_path = os.path.join(FUNCTIONS_DIR, f"{name}.py")
-        item_id = dpg.generate_uuid()  # 이 항목 전체를 위한 고유 ID
-
-        def make_run_callback(
-            f_path=file_path, f_name=name, p_schema=params_schema, item_tag=item_id
-        ):
-            # 런타임에 UI에서 인자 값을 읽는 함수
-            def get_runtime_args():
-                args = {}
-                for var_name in p_schema.keys():
-                    tag = f"input_arg_{f_name}_{var_name}_{item_tag}"
-                    if dpg.does_item_exist(tag):
-                        value = dpg.get_value(tag)
-                        if value is None or (
-                            isinstance(value, str) and not value.strip()
-                        ):
-                            # 필수 인수가 비어있으면 경고
-                            show_alert(
-                                "입력 오류",
-                                f"함수 '{f_name}'의 필수 인자 '{var_name}' 값을 입력해주세요.",
-                            )
-                            return None  # 실행 중단
-
-                        # 타입 변환 (argparse가 기대하는 str 형태로 전달)
-                        args[var_name] = str(value)
-                return args
-
-            def _run():
-                args = get_runtime_args()
-                if args is None:
-                    return
-
-                log(f"실행 중: {f_name}.py (인자: {args})")
-                if not os.path.exists(f_path):
-                    show_alert("오류", f"파일이 존재하지 않습니다: {f_path}")
-                    return
-
-                def run_process():
-                    try:
-                        cmd = [sys.executable, f_path]
-
-                        # 인자를 커맨드라인 아규먼트로 추가
-                        for key, value in args.items():
-                            cmd.append(f"--{key}")
-                            cmd.append(value)  # 값은 이미 str로 변환됨
-
-                        process = subprocess.Popen(
-                            cmd,
-                            stdout=sys.stdout,
-                            stderr=sys.stderr,
-                            text=True,
-                        )
-                        process.communicate()  # 프로세스가 끝날 때까지 대기
-                        log(f"{f_name}.py 실행 종료")
-                    except Exception as e:
-                        show_alert("실행 오류", str(e))
-
-                threading.Thread(target=run_process, daemon=True).start()
-
-            return _run
-
-        # 삭제 콜백 (변경 없음)
-        def make_delete_callback(f_path=file_path, f_name=name):
-            # ... (기존 make_delete_callback 로직 유지) ...
-
-            # --- (내부 함수 do_real_delete, UI 로직) ---
-            def _delete():
-                # 확인 팝업
-                confirm_tag = f"confirm_delete_{dpg.generate_uuid()}"
-
-                def do_real_delete(sender, app_data, user_data):
-                    dpg.delete_item(confirm_tag)
-                    try:
-                        # 1. 파일 삭제
-                        if os.path.exists(f_path):
-                            os.remove(f_path)
-
-                        # 2. tools.py 갱신
-                        current_tools = load_tools()
-                        new_tools = [
-                            t for t in current_tools if t["function"]["name"] != f_name
-                        ]
-                        save_tools_list_direct(new_tools)
-
-                        log(f"삭제 완료: {f_name}")
-                        refresh_function_list()  # 목록 갱신
-
-                    except Exception as e:
-                        show_alert("삭제 실패", str(e))
-
-                viewport_w = dpg.get_viewport_width()
-                viewport_h = dpg.get_viewport_height()
-                win_width, win_height = 300, 130
-                pos_x = (viewport_w - win_width) // 2
-                pos_y = (viewport_h - win_height) // 2
-
-                with dpg.window(
-                    label="삭제 확인",
-                    modal=True,
-                    no_resize=True,
-                    width=win_width,
-                    height=win_height,
-                    pos=[pos_x, pos_y],
-                    tag=confirm_tag,
-                ):
-                    dpg.add_text(f"'{f_name}' 함수를 삭제하시겠습니까?")
-                    dpg.add_spacer(height=10)
-                    with dpg.group(horizontal=True):
-                        dpg.add_button(label="삭제", width=100, callback=do_real_delete)
-                        dpg.add_button(
-                            label="취소",
-                            width=100,
-                            callback=lambda: dpg.delete_item(confirm_tag),
-                        )
-
-            return _delete
-
-        def make_preview_callback(f_name=f"{name}.py"):
-            return lambda: show_code_preview(f_name)
-
-        with dpg.group(
-            parent="functions_group",
-        ):
-            with dpg.table(
-                header_row=False, resizable=False, policy=dpg.mvTable_SizingStretchProp
-            ):
-                dpg.add_table_column()
-                dpg.add_table_column(width_fixed=True, init_width_or_weight=90)
-
-                with dpg.table_row():
-                    dpg.add_button(
-                        label=f"{name}",
-                        width=-1,
-                        callback=make_preview_callback(),
-                    )
-                    dpg.add_button(
-                        label="삭제",
-                        width=80,
-                        callback=make_delete_callback(),
-                    )
-
-            dpg.add_text(f"설명: {desc}", wrap=0)
-            if params_schema:
-                with dpg.group(tag=f"param_input_group_{item_id}"):
-                    for var_name, p_details in params_schema.items():
-                        p_type = p_details.get("type", "string")
-                        p_desc = p_details.get("description", "인자 설명")
-
-                        input_tag = f"input_arg_{name}_{var_name}_{item_id}"
-
-                        dpg.add_text(f"{var_name} ({p_type}): {p_desc}")
-
-                        input_type = dpg.mvInputText
-                        if p_type == "number":
-                            input_type = dpg.mvInputInt  # 정수 입력 위젯 사용
-
-                        # 텍스트 또는 숫자 입력
-                        dpg.add_input_text(
-                            tag=input_tag,
-                            hint="값 입력 (필수)",
-                            width=-1,
-                            on_enter=True,  # 엔터 입력 시 실행 트리거
-                            callback=make_run_callback(),
-                        )
-                    dpg.add_spacer(height=5)
-
-                    dpg.add_button(
-                        label=f"{name} 실행",
-                        width=-1,
-                        height=30,
-                        callback=make_run_callback(),
-                        user_data=item_id,
-                    )
-            else:
-                # 파라미터가 없으면 바로 실행 버튼 배치
-                dpg.add_button(
-                    label=f"{name} 실행",
-                    width=-1,
-                    height=30,
-                    callback=make_run_callback(),
-                    user_data=item_id,
-                )
-
-            dpg.add_spacer(height=5)
-            dpg.add_separator()
-            dpg.add_spacer(height=5)
+    f_path = os.path.join(FUNCTIONS_DIR, f"{name}.py")
+
+    def work():
+        try:
+            optimize_function(f_path, args)
+        except Exception as e:
+            log(f"선택자 최적화 실패: {name} - {e}", level="error")
+
+    log(f"선택자 최적화 시작: {name}.py (인자: {args})")
+    threading.Thread(target=work, daemon=True).start()
+
+
+def _confirm_delete(sender, app_data, name: str):
+    f_path = os.path.join(FUNCTIONS_DIR, f"{name}.py")
+    confirm_tag = f"confirm_delete_{dpg.generate_uuid()}"
+
+    def do_real_delete():
+        dpg.delete_item(confirm_tag)
+        try:
+            # 1. 파일 삭제
+            if os.path.exists(f_path):
+                os.remove(f_path)
+
+            # 2. 도구 레지스트리에서 제거 (목록은 변경 알림으로 갱신된다)
+            delete_tool(name)
+
+            log(f"삭제 완료: {name}")
+            refresh_function_list()
+
+        except Exception as e:
+            show_alert("삭제 실패", str(e))
+
+    viewport_w = dpg.get_viewport_width()
+    viewport_h = dpg.get_viewport_height()
+    win_width, win_height = 300, 130
+    pos_x = (viewport_w - win_width) // 2
+    pos_y = (viewport_h - win_height) // 2
+
+    with dpg.window(
+        label="삭제 확인",
+        modal=True,
+        no_resize=True,
+        width=win_width,
+        height=win_height,
+        pos=[pos_x, pos_y],
+        tag=confirm_tag,
+    ):
+        dpg.add_text(f"'{name}' 함수를 삭제하시겠습니까?")
+        dpg.add_spacer(height=10)
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="삭제", width=100, callback=do_real_delete)
+            dpg.add_button(
+                label="취소",
+                width=100,
+                callback=lambda: dpg.delete_item(confirm_tag),
+            )
+
+
+def _on_policy_change(sender, app_data, name: str):
+    policy = next(key for key, label in POLICIES.items() if label == app_data)
+    set_policy(name, policy)
+    log(f"{name}: 실행 후 브라우저 정책 '{app_data}'")
+
+
+def _on_profile_change(sender, app_data, name: str):
+    set_function_profile(name, None if app_data == NO_PROFILE else app_data)
+    log(f"{name}: 브라우저 프로필 '{app_data}'")
+
+
+def _create_site_profile(sender, app_data, name: str):
+    """함수가 처음 여는 사이트 이름으로 프로필을 만들고 이 함수에 지정"""
+    site = site_of_function(os.path.join(FUNCTIONS_DIR, f"{name}.py"))
+    if not site:
+        show_alert("프로필", "함수 코드에서 접속 주소(page.goto)를 찾지 못했습니다.")
+        return
+    if site not in list_profiles():
+        create_profile(site)
+    set_function_profile(name, site)
+
+    # 다른 항목의 목록에도 새 프로필이 보이도록
+    for entry in _entries.values():
+        combo = entry.get("profile_combo")
+        if combo and dpg.does_item_exist(combo):
+            dpg.configure_item(combo, items=[NO_PROFILE, *list_profiles()])
+    dpg.set_value(_entries[name]["profile_combo"], site)
+    log(f"{name}: 브라우저 프로필 '{site}' 사용 (로그인 상태가 실행 후 저장됩니다)")
+
+
+def _build_entry_body(entry: dict):
+    """선택한 항목의 설명, 인자 입력창, 버튼을 표 밖 상세 영역에 만든다"""
+    func = entry["func"]
+    name = func["name"]
+    params_schema = func["parameters"].get("properties", {})  # 파라미터 스키마
+    entry["inputs"] = {}
+
+    with dpg.group(parent="function_detail"):
+        dpg.add_text(name)
+        with dpg.group(horizontal=True):
+            dpg.add_button(
+                label="코드 보기",
+                width=100,
+                callback=lambda: show_code_preview(f"{name}.py"),
+            )
+            dpg.add_button(
+                label="삭제",
+                width=80,
+                callback=_confirm_delete,
+                user_data=name,
+            )
+            dpg.add_button(
+                label="선택자 최적화",
+                width=120,
+                callback=_optimize_entry,
+                user_data=name,
+            )
+
+        dpg.add_text(f"설명: {func['description']}", wrap=0)
+        with dpg.group(horizontal=True):
+            dpg.add_text("실행 후 브라우저:")
+            dpg.add_combo(
+                list(POLICIES.values()),
+                default_value=POLICIES[policy_for(name)],
+                width=150,
+                callback=_on_policy_change,
+                user_data=name,
+            )
+        with dpg.group(horizontal=True):
+            dpg.add_text("프로필:")
+            entry["profile_combo"] = dpg.add_combo(
+                [NO_PROFILE, *list_profiles()],
+                default_value=(profile_of(name) or {}).get("name", NO_PROFILE),
+                width=150,
+                callback=_on_profile_change,
+                user_data=name,
+            )
+            dpg.add_button(
+                label="사이트 프로필 만들기",
+                callback=_create_site_profile,
+                user_data=name,
+            )
+        for var_name, p_details in params_schema.items():
+            p_type = p_details.get("type", "string")
+            p_desc = p_details.get("description", "인자 설명")
+
+            dpg.add_text(f"{var_name} ({p_type}): {p_desc}")
+            entry["inputs"][var_name] = dpg.add_input_text(
+                hint="값 입력 (필수)",
+                width=-1,
+                on_enter=True,  # 엔터 입력 시 실행 트리거
+                callback=_run_entry,
+                user_data=name,
+            )
+        dpg.add_spacer(height=5)
+
+        dpg.add_button(
+            label=f"{name} 실행",
+            width=-1,
+            height=30,
+            callback=_run_entry,
+            user_data=name,
+        )
+        dpg.add_separator()
+        dpg.add_spacer(height=5)
+
+
+def _show_detail(name: str | None):
+    """상세 영역을 name 항목으로 다시 그린다 (None이면 비운다)"""
+    global _selected
+
+    _selected = name
+    dpg.delete_item("function_detail", children_only=True)
+    entry = _entries.get(name) if name else None
+    if entry is None:
+        _selected = None
+        return
+    _build_entry_body(entry)
+
+
+def _on_select(sender, app_data, name: str):
+    # 한 번에 한 항목만 선택. 같은 항목을 다시 누르면 접는다
+    if app_data:
+        previous = _entries.get(_selected) if _selected != name else None
+        if previous is not None:
+            dpg.set_value(previous["header"], False)
+        _show_detail(name)
+    elif _selected == name:
+        _show_detail(None)
+
+
+def _matches(func: dict, query: str) -> bool:
+    if not query:
+        return True
+    return query in normalize_text(f"{func['name']} {func['description']}")
+
+
+def _add_entry(func: dict, before: int | str = 0) -> dict:
+    name = func["name"]
+    entry = {"func": func, "signature": _signature(func), "inputs": {}}
+    query = normalize_text(dpg.get_value("function_search") or "")
+    with dpg.table_row(
+        parent="functions_table", before=before, show=_matches(func, query)
+    ) as row:
+        # 표 안에는 높이가 일정한 한 줄 항목만 둔다 (본문은 function_detail)
+        entry["header"] = dpg.add_selectable(
+            label=_header_label(func),
+            span_columns=True,
+            callback=_on_select,
+            user_data=name,
+        )
+    entry["row"] = row
+    _entries[name] = entry
+    return entry
+
+
+def _update_entry(entry: dict, func: dict):
+    """스키마나 설명이 바뀐 항목만 다시 그린다. 선택된 항목이면 상세 영역도 새로 만든다"""
+    entry["func"] = func
+    entry["signature"] = _signature(func)
+    entry["inputs"] = {}
+    dpg.configure_item(entry["header"], label=_header_label(func))
+    if _selected == func["name"]:
+        _show_detail(func["name"])
+
+
+def refresh_function_list(force: bool = False):
+    """
+    레지스트리와 현재 목록을 비교해 추가/삭제/변경된 항목만 반영합니다.
+    레지스트리 버전이 그대로면 아무것도 하지 않습니다.
+    """
+    global _shown_version, _refresh_scheduled
+
+    _refresh_scheduled = False
+    if not dpg.does_item_exist("functions_table"):
+        return
+
+    version = tools_version()
+    if not force and version == _shown_version:
+        return
+
+    tools = {item["function"]["name"]: item["function"] for item in list_tools()}
+
+    for name in [n for n in _entries if n not in tools]:
+        dpg.delete_item(_entries.pop(name)["row"])
+        if name == _selected:
+            _show_detail(None)
+
+    # 이름순으로 유지: 새 항목은 뒤에 오는 첫 기존 항목 앞에 끼워 넣는다
+    next_row: int | str = 0
+    for name in sorted(tools, reverse=True):
+        func = tools[name]
+        entry = _entries.get(name)
+        if entry is None:
+            entry = _add_entry(func, before=next_row)
+        elif entry["signature"] != _signature(func):
+            _update_entry(entry, func)
+        next_row = entry["row"]
+
+    if dpg.does_item_exist("initial_loading_text"):
+        dpg.delete_item("initial_loading_text")
+    dpg.configure_item("functions_empty", show=not tools)
+    _shown_version = version
+
+
+def filter_function_list():
+    """검색어가 이름이나 설명에 포함된 항목만 보이게 한다"""
+    query = normalize_text(dpg.get_value("function_search") or "")
+    for entry in _entries.values():
+        dpg.configure_item(entry["row"], show=_matches(entry["func"], query))
+
+
+def _on_registry_change(event: str, name: str):
+    # 어느 스레드에서 바뀌었든 갱신은 렌더 스레드에서 한 번만 수행
+    global _refresh_scheduled
+    if not _refresh_scheduled:
+        _refresh_scheduled = True
+        run_on_ui(refresh_function_list)
+
+
+subscribe(_on_registry_change)
 
 
 def functions_comp():
     """functions_comp는 UI를 구성하고, 탭 활성화 시 목록을 로드합니다."""
     with dpg.group(tag="content_functions", show=False):
         dpg.add_text("저장된 함수 목록")
+        dpg.add_input_text(
+            tag="function_search",
+            hint="이름 또는 설명으로 검색",
+            width=-1,
+            callback=filter_function_list,
+        )
+        # 선택한 함수의 상세 (clipper 표 밖)
+        dpg.add_group(tag="function_detail")
         dpg.add_child_window(tag="functions_scroll")
         with dpg.group(tag="functions_group", parent="functions_scroll"):
             dpg.add_text("목록을 로딩합니다...", tag="initial_loading_text")
+            dpg.add_text(
+                "아직 생성된 함수가 없습니다.", tag="functions_empty", show=False
+            )
+            # clipper: 화면에 보이는 행만 그린다. 행 높이가 모두 같아야 하므로 한 줄 항목만 둔다
+            with dpg.table(
+                tag="functions_table",
+                header_row=False,
+                clipper=True,
+                policy=dpg.mvTable_SizingStretchProp,
+            ):
+                dpg.add_table_column()
@@ -2,12 +2,25 @@ import platform
 
 import dearpygui.dearpygui as dpg
 
-from utils.dpg_ui import log
+from config import cfg
+from utils.dpg_ui import LEVELS, log, set_log_file, set_log_level
 
 
 def log_comp():
     with dpg.group(tag="log", show=True):
-        dpg.add_text("실행 로그")
+        with dpg.group(horizontal=True):
+            dpg.add_text("실행 로그")
+            dpg.add_combo(
+                items=list(LEVELS),
+                default_value=cfg["log_level"],
+                width=100,
+                callback=lambda s, a: set_log_level(a),
+            )
+            dpg.add_checkbox(
+                label="파일로 저장",
+                default_value=cfg["log_file"],
+                callback=lambda s, a: set_log_file(a),
+            )
         dpg.add_child_window(tag="log_scroll")
         with dpg.group(tag="log_group", parent="log_scroll"):
             log(f"OS: {platform.system()}")
@@ -1,16 +1,26 @@
 import dearpygui.dearpygui as dpg
 
 from components.functions import refresh_function_list
+from components.runs import refresh_live_list, refresh_run_list
 from config import cfg, toggle_theme
 
 
 def on_tab_change(sender, app_data, user_data):
     tag = dpg.get_item_alias(app_data)
-    for content_tag in ["content_codegen", "content_query", "content_functions"]:
+    for content_tag in [
+        "content_codegen",
+        "content_query",
+        "content_functions",
+        "content_runs",
+    ]:
         dpg.configure_item(content_tag, show=False)
     if tag == "tab_functions":
         dpg.configure_item("log", show=False)
         refresh_function_list()
+    elif tag == "tab_runs":
+        dpg.configure_item("log", show=False)
+        refresh_run_list()
+        refresh_live_list()
     else:
         dpg.configure_item("log", show=True)
     dpg.configure_item(f"content_{tag.split('_')[1]}", show=True)
@@ -27,6 +37,7 @@ def navbar_comp():
                 dpg.add_tab(label="프롬프트", tag="tab_query")
                 dpg.add_tab(label="함수 생성", tag="tab_codegen")
                 dpg.add_tab(label="함수 리스트", tag="tab_functions")
+                dpg.add_tab(label="실행 기록", tag="tab_runs")
 
             initial_color = "어둡게" if cfg["theme"] == "light" else "밝게"
             dpg.add_button(
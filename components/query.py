@@ -1,128 +1,193 @@
 # query.py
-import importlib.util
-import os
-import subprocess
-import sys
-import threading
+import asyncio
+import json
+import time
 
 import dearpygui.dearpygui as dpg
-import ollama
 
-from utils.dpg_ui import log, show_alert
-from utils.stt import stt
+from config import cfg
+from utils import intent_cache, llm, router
+from utils.dispatcher import dispatch
+from utils.dpg_ui import log, log_append, log_stream, run_on_ui, show_alert
+from utils.registry import list_tools
+from utils.retrieval import select_tools
+from utils.stt import set_hands_free, set_voice_enabled, stt
 
 
-def load_tools():
-    """tools.py를 안전하게 동적 import해서 TOOLS 리스트 반환"""
-    tools_path = os.path.join(os.getcwd(), "tools.py")
-    if not os.path.exists(tools_path):
-        return []
+SYSTEM_PROMPT = (
+    "당신은 사용자의 요청을 수행하기 위해 적절한 함수를 선택하고 "
+    "필요한 매개변수(parameter)를 정확히 추출하여 호출해야 합니다."
+)
 
-    try:
-        spec = importlib.util.spec_from_file_location("tools", tools_path)
-        if spec is None or spec.loader is None:
-            return []
 
-        module = importlib.util.module_from_spec(spec)
-        spec.loader.exec_module(module)
-        return getattr(module, "TOOLS", [])
-    except Exception as e:
-        log(f"tools.py 로드 중 오류: {e}")
-        return []
+DISPATCH_MODES = {"병렬": "parallel", "순차": "sequential"}
+
 
+def dispatch_tool_calls(tool_calls: list, source: str = "LLM"):
+    """[{"name", "arguments"}] 형태의 함수 호출을 설정된 방식(순차/병렬)으로 실행"""
+    for tool_call in tool_calls:
+        log(f"[{source}] 함수 호출 감지: {tool_call['name']}")
+        log(f"인자: {tool_call['arguments']}")
 
-def run_script(file_path: str, args: dict):
+    return dispatch(
+        tool_calls,
+        mode=cfg.get("dispatch_mode", "parallel"),
+        max_concurrency=int(cfg.get("dispatch_max_concurrency", 2)),
+        stop_on_error=cfg.get("dispatch_stop_on_error", True),
+    )
+
+
+async def query_llm(query_text: str, model_name: str, k: int, send_all: bool):
     """
-    별도 쓰레드에서 subprocess로 파이썬 스크립트 실행
-    args 딕셔너리가 있으면 --key value 형태로 변환하여 전달
+    LLM 루프에서 실행. 응답 토큰을 로그에 스트리밍하고 함수 호출을 실행.
+    함수를 실행했다면 그 실행 결과 Future를 반환한다.
+    캐시/레지스트리(SQLite)와 임베딩 호출은 블로킹이므로 루프를 막지 않도록 스레드에서 돌린다.
     """
+    try:
+        cached = await asyncio.to_thread(intent_cache.get, query_text)
+        if cached is not None:
+            log("캐시된 명령입니다. LLM 호출을 건너뜁니다.")
+            return dispatch_tool_calls(cached, source="캐시")
+
+        if cfg.get("router", True):
+            candidates = await asyncio.to_thread(
+                select_tools, query_text, int(cfg.get("router_candidates", 10))
+            )
+            decision = await asyncio.to_thread(router.route, query_text, candidates)
+            log(
+                f"라우터 판단: {decision['name']} "
+                f"(신뢰도 {decision['confidence']:.2f}, {decision['reason']})"
+            )
+            if decision["call"] is not None:
+                return dispatch_tool_calls([decision["call"]], source="라우터")
+
+        tools = await asyncio.to_thread(list_tools)
+        if not send_all and len(tools) > k:
+            tools = await asyncio.to_thread(select_tools, query_text, k)
+            names = ", ".join(t["function"]["name"] for t in tools)
+            log(f"후보 도구 {len(tools)}개 선택: {names}")
+
+        started = time.perf_counter()
+        first_token_at = None
+        stream_item = None
+        tool_calls = []
+
+        messages = [
+            {"role": "system", "content": SYSTEM_PROMPT},
+            {"role": "user", "content": query_text},
+        ]
+        num_ctx = llm.estimate_num_ctx(model_name, messages, tools)
+
+        stream = await llm.get_client().chat(
+            model=model_name,
+            messages=messages,
+            tools=tools,
+            stream=True,
+            keep_alive=llm.keep_alive(),
+            options={"num_ctx": num_ctx},
+        )
+        async for chunk in stream:
+            message = chunk.message
+            if first_token_at is None and (message.content or message.tool_calls):
+                first_token_at = time.perf_counter()
+                log(f"첫 응답까지 {first_token_at - started:.2f}s")
+            if message.content:
+                if stream_item is None:
+                    stream_item = log_stream("LLM 응답: ")
+                log_append(stream_item, message.content)
+            if message.tool_calls:
+                tool_calls.extend(message.tool_calls)
+            if chunk.done:
+                log(f"모델 상태: {llm.residency_label(chunk)}, num_ctx={num_ctx}")
+
+        log(f"LLM 응답 완료 ({time.perf_counter() - started:.2f}s)")
 
-    def _run():
-        try:
-            cmd = [sys.executable, file_path]
-
-            if args:
-                for key, value in args.items():
-                    cmd.append(f"--{key}")
-                    cmd.append(str(value))
+        if not tool_calls:
+            log("⚠️ 함수 호출이 감지되지 않았습니다.", level="warning")
+            return
 
-            log(f"명령어 실행: {' '.join(cmd)}")
+        calls = [
+            {"name": call.function.name, "arguments": dict(call.function.arguments)}
+            for call in tool_calls
+        ]
+        await asyncio.to_thread(intent_cache.put, query_text, calls)
+        return dispatch_tool_calls(calls)
 
-            process = subprocess.Popen(
-                cmd,
-                stdout=sys.stdout,
-                stderr=sys.stderr,
-                text=True,
-                encoding="utf-8",
-            )
+    except asyncio.CancelledError:
+        log("⏹ 쿼리가 취소되었습니다.")
+        raise
+    except Exception as e:
+        log(f"LLM 실행 중 오류 발생: {e}", level="error")
 
-            def read_output():
-                _ = process.communicate()
 
-            threading.Thread(target=read_output, daemon=True).start()
+def first_query_request() -> tuple[list, list]:
+    """
+    예열용: 첫 쿼리가 보낼 만한 (messages, tools). 도구를 골라 보내는 경우
+    가장 긴 도구 k개를 넣어 첫 쿼리보다 작게 잡지 않는다
+    """
+    tools = list_tools()
+    k = max(1, int(cfg.get("retrieval_k", 5)))
+    if not cfg.get("send_all_tools", False) and len(tools) > k:
+        tools = sorted(
+            tools, key=lambda t: len(json.dumps(t, ensure_ascii=False)), reverse=True
+        )[:k]
+    messages = [
+        {"role": "system", "content": SYSTEM_PROMPT},
+        {"role": "user", "content": ""},
+    ]
+    return messages, tools
 
-        except Exception as e:
-            log(f"실행 오류: {e}")
 
-    threading.Thread(target=_run, daemon=True).start()
+def warm_query_model(model_name: str):
+    """첫 쿼리와 같은 num_ctx로 모델을 미리 올린다"""
+    return llm.warm_in_background(model_name, first_query_request)
 
 
-def run_query(query_text: str):
+def run_query(query_text: str, preempt: bool = True):
+    """
+    쿼리를 LLM 루프에 넘기고 바로 돌아온다.
+    진행 중인 쿼리가 있으면 preempt=True일 때 취소하고 새 쿼리로 대체한다.
+    """
     model_name = dpg.get_value("model_selector")
 
     if not query_text.strip():
         show_alert("입력 오류", "프롬프트를 입력해주세요.")
-        return
+        return None
+
+    if preempt and llm.busy():
+        log("이전 쿼리를 중단하고 새 쿼리를 실행합니다.")
 
     log(f"선택된 모델: {model_name}")
     log(f"입력된 프롬프트: {query_text}")
     log("LLM Function-Calling 실행 중...")
 
-    try:
-        tools = load_tools()
+    return llm.submit(
+        query_llm(
+            query_text,
+            model_name,
+            k=max(1, dpg.get_value("retrieval_k")),
+            send_all=dpg.get_value("send_all_tools"),
+        ),
+        preempt=preempt,
+    )
 
-        response = ollama.chat(
-            model=model_name,
-            messages=[
-                {
-                    "role": "system",
-                    "content": (
-                        "당신은 사용자의 요청을 수행하기 위해 적절한 함수를 선택하고 "
-                        "필요한 매개변수(parameter)를 정확히 추출하여 호출해야 합니다."
-                    ),
-                },
-                {"role": "user", "content": query_text},
-            ],
-            tools=tools,
-        )
 
-        message = response.get("message", {})
-        tool_calls = message.get("tool_calls")
+def cancel_query():
+    if not llm.cancel_current():
+        log("취소할 쿼리가 없습니다.")
 
-        if not tool_calls:
-            log(f"LLM 응답: {message.get('content', '')}")
-            log("⚠️ 함수 호출이 감지되지 않았습니다.")
-            return
 
-        for tool_call in tool_calls:
-            fn_name = tool_call.function.name
-            arguments = tool_call.function.arguments  # Dict 형태
+def show_transcript(text: str):
+    """음성 인식 결과(부분 포함)를 프롬프트 입력창에 표시"""
+    run_on_ui(dpg.set_value, "input_query", text)
 
-            log(f"함수 호출 감지: {fn_name}")
-            log(f"인자: {arguments}")
 
-            file_path = os.path.join("functions", f"{fn_name}.py")
-
-            if os.path.exists(file_path):
-                run_script(file_path, arguments)
-            else:
-                log(f"⚠️ 실행 파일을 찾을 수 없습니다: {file_path}")
-
-    except Exception as e:
-        log(f"LLM 실행 중 오류 발생: {e}")
-
-
-stt(run_query)
+stt(
+    run_query,
+    on_partial=show_transcript,
+    # 핸즈프리 명령은 앞 명령을 취소하지 않고 순서대로 실행
+    on_utterance=lambda text: run_query(text, preempt=False),
+)
 
 
 def query_comp():
@@ -138,6 +203,56 @@ def query_comp():
                 default_value="qwen2.5:7b",
                 width=-1,
                 tag="model_selector",
+                callback=lambda s, a: warm_query_model(a),
+            )
+        with dpg.group(horizontal=True):
+            dpg.add_text("후보 도구 수:")
+            dpg.add_input_int(
+                tag="retrieval_k",
+                default_value=cfg["retrieval_k"],
+                min_value=1,
+                min_clamped=True,
+                width=120,
+                callback=lambda s, a: cfg.update(retrieval_k=a),
+            )
+            dpg.add_checkbox(
+                label="전체 도구 전송",
+                tag="send_all_tools",
+                default_value=cfg["send_all_tools"],
+                callback=lambda s, a: cfg.update(send_all_tools=a),
+            )
+        with dpg.group(horizontal=True):
+            dpg.add_text("다중 호출:")
+            dpg.add_combo(
+                items=list(DISPATCH_MODES),
+                default_value=next(
+                    label
+                    for label, mode in DISPATCH_MODES.items()
+                    if mode == cfg["dispatch_mode"]
+                ),
+                width=120,
+                callback=lambda s, a: cfg.update(dispatch_mode=DISPATCH_MODES[a]),
+            )
+            dpg.add_text("최대 동시 실행:")
+            dpg.add_input_int(
+                default_value=cfg["dispatch_max_concurrency"],
+                min_value=1,
+                min_clamped=True,
+                width=120,
+                callback=lambda s, a: cfg.update(dispatch_max_concurrency=a),
+            )
+        with dpg.group(horizontal=True):
+            dpg.add_checkbox(
+                label="음성 입력 (Ctrl + Shift + Alt)",
+                tag="voice_enabled",
+                default_value=cfg["stt_enabled"],
+                callback=lambda s, a: set_voice_enabled(a),
+            )
+            dpg.add_checkbox(
+                label="핸즈프리 (항상 듣기)",
+                tag="hands_free",
+                default_value=cfg["hands_free"],
+                callback=lambda s, a: set_hands_free(a),
             )
         dpg.add_spacer(height=10)
         with dpg.group(horizontal=True):
@@ -149,9 +264,21 @@ def query_comp():
                 callback=lambda: run_query(dpg.get_value("input_query")),
             )
         dpg.add_spacer(height=10)
-        dpg.add_button(
-            label="실행",
-            width=-1,
-            height=40,
-            callback=lambda: run_query(dpg.get_value("input_query")),
-        )
+        with dpg.table(
+            header_row=False, resizable=False, policy=dpg.mvTable_SizingStretchProp
+        ):
+            dpg.add_table_column()
+            dpg.add_table_column(width_fixed=True, init_width_or_weight=90)
+            with dpg.table_row():
+                dpg.add_button(
+                    label="실행",
+                    width=-1,
+                    height=40,
+                    callback=lambda: run_query(dpg.get_value("input_query")),
+                )
+                dpg.add_button(
+                    label="취소",
+                    width=80,
+                    height=40,
+                    callback=cancel_query,
+                )
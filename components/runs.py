@@ -0,0 +1,162 @@
+import dearpygui.dearpygui as dpg
+
+from utils.browser_lifecycle import (
+    POLICIES,
+    close_all,
+    close_session,
+    list_live,
+    subscribe,
+)
+from utils.dpg_ui import run_on_ui
+from utils.run_history import recent_runs
+
+_live_refresh_scheduled = False
+
+
+def show_run_output(record):
+    viewport_w = dpg.get_viewport_width()
+    viewport_h = dpg.get_viewport_height()
+    win_width, win_height = 700, 500
+    pos_x = (viewport_w - win_width) // 2
+    pos_y = (viewport_h - win_height) // 2
+    tag = f"run_output_{dpg.generate_uuid()}"
+    input_tag = f"run_output_text_{dpg.generate_uuid()}"
+
+    def close_output():
+        if dpg.does_item_exist(tag):
+            dpg.delete_item(tag)
+
+    def reload_output():
+        dpg.set_value(input_tag, record.text())
+
+    with dpg.window(
+        label=f"출력: {record.name} #{record.id} ({record.status})",
+        modal=True,
+        width=win_width,
+        height=win_height,
+        pos=[pos_x, pos_y],
+        tag=tag,
+    ):
+        dpg.add_input_text(
+            tag=input_tag,
+            default_value=record.text(),
+            multiline=True,
+            readonly=True,
+            width=-1,
+            height=win_height - 100,
+        )
+        dpg.add_spacer(height=10)
+        with dpg.group(horizontal=True):
+            dpg.add_button(label="새로고침", width=120, callback=reload_output)
+            dpg.add_button(label="닫기", width=120, callback=close_output)
+
+
+def _rss_label(record) -> str:
+    """워커 실행은 워커+드라이버만, 새 프로세스 실행은 브라우저까지 포함한 값"""
+    if record.peak_rss_kb is None:
+        return "-"
+    scope = "워커+드라이버" if record.mode == "워커" else "브라우저 포함"
+    return f"{record.peak_rss_kb / 1024:.0f}MB ({scope})"
+
+
+def refresh_run_list():
+    """최근 함수 실행 기록 표를 다시 그립니다."""
+    if not dpg.does_item_exist("runs_group"):
+        return
+
+    dpg.delete_item("runs_group", children_only=True)
+
+    runs = recent_runs()
+    if not runs:
+        dpg.add_text("아직 실행 기록이 없습니다.", parent="runs_group")
+        return
+
+    with dpg.table(
+        parent="runs_group",
+        header_row=True,
+        resizable=True,
+        policy=dpg.mvTable_SizingStretchProp,
+    ):
+        for label in ["#", "함수", "방식", "상태", "종료 코드", "시간", "최대 RSS", ""]:
+            dpg.add_table_column(label=label)
+
+        for record in runs:
+            with dpg.table_row():
+                dpg.add_text(str(record.id))
+                dpg.add_text(record.name)
+                dpg.add_text(record.mode)
+                dpg.add_text(record.status)
+                dpg.add_text("-" if record.code is None else str(record.code))
+                dpg.add_text(f"{record.wall_time:.1f}s")
+                dpg.add_text(_rss_label(record))
+                dpg.add_button(
+                    label="출력",
+                    callback=lambda s, a, u: show_run_output(u),
+                    user_data=record,
+                )
+
+
+def refresh_live_list():
+    """실행 후 남아 있는 브라우저 표를 다시 그립니다."""
+    global _live_refresh_scheduled
+
+    _live_refresh_scheduled = False
+    if not dpg.does_item_exist("live_browsers_group"):
+        return
+
+    dpg.delete_item("live_browsers_group", children_only=True)
+    sessions = list_live()
+    if not sessions:
+        dpg.add_text("열려 있는 브라우저가 없습니다.", parent="live_browsers_group")
+        return
+
+    with dpg.table(
+        parent="live_browsers_group",
+        header_row=True,
+        resizable=True,
+        policy=dpg.mvTable_SizingStretchProp,
+    ):
+        for label in ["함수", "정책", "워커", "URL", "유휴", ""]:
+            dpg.add_table_column(label=label)
+
+        for session in sessions:
+            with dpg.table_row():
+                dpg.add_text(session.name)
+                dpg.add_text(POLICIES.get(session.policy, session.policy))
+                dpg.add_text(str(session.pid))
+                dpg.add_text(session.url, wrap=0)
+                dpg.add_text(f"{session.idle:.0f}s")
+                if session.closing:
+                    dpg.add_text("닫는 중")
+                else:
+                    dpg.add_button(
+                        label="닫기",
+                        callback=lambda s, a, u: close_session(u),
+                        user_data=session.id,
+                    )
+
+
+def _on_live_change():
+    # 워커 읽기 스레드에서 불리므로 렌더 스레드에서 한 번만 다시 그린다
+    global _live_refresh_scheduled
+    if not _live_refresh_scheduled:
+        _live_refresh_scheduled = True
+        run_on_ui(refresh_live_list)
+
+
+subscribe(_on_live_change)
+
+
+def runs_comp():
+    with dpg.group(tag="content_runs", show=False):
+        with dpg.group(horizontal=True):
+            dpg.add_text("열린 브라우저")
+            dpg.add_button(label="새로고침", callback=refresh_live_list)
+            dpg.add_button(label="모두 닫기", callback=close_all)
+        dpg.add_group(tag="live_browsers_group")
+        dpg.add_spacer(height=10)
+        with dpg.group(horizontal=True):
+            dpg.add_text("함수 실행 기록")
+            dpg.add_button(label="새로고침", callback=refresh_run_list)
+        dpg.add_child_window(tag="runs_scroll")
+        dpg.add_group(tag="runs_group", parent="runs_scroll")
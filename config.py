@@ -11,27 +11,143 @@ from env import (
 from errors import ConfigLoadError, ConfigSaveError
 
 
+DEFAULT_CONFIG = {
+    "theme": "dark",
+    # 함수 실행 워커 풀
+    "worker_pool": True,
+    "worker_pool_size": 2,
+    "worker_max_jobs": 20,
+    # 모든 워커가 바쁠 때 기다리는 최대 시간(초). 넘으면 새 프로세스로 실행
+    "worker_acquire_timeout": 10,
+    # "shared": 앱이 띄운 Chromium 하나를 공유, "per_run": 실행마다 브라우저 실행
+    # 디버깅 포트 0이면 빈 포트를 골라 쓴다 (이미 떠 있는 다른 Chrome에 붙지 않도록)
+    "browser_mode": "shared",
+    "browser_debug_port": 0,
+    # 실행 후 브라우저: close(바로 닫기) | idle(유휴 시간 뒤 닫기) | reuse(다음 실행에 재사용)
+    # browser_policies는 함수 이름별 정책, 살아 있는 브라우저 상한을 넘으면 오래된 것부터 닫음
+    "browser_policy": "idle",
+    "browser_policies": {},
+    "browser_idle_timeout": 300,
+    "browser_max_live": 4,
+    # 사이트별 프로필: state(storage_state 스냅샷) | persistent(user_data_dir, HTTP 캐시 포함)
+    # profiles는 프로필 이름 -> {"kind", "site"}, function_profiles는 함수 이름 -> 프로필 이름
+    "profiles": {},
+    "function_profiles": {},
+    "profile_kind": "state",
+    # 같은 프로필을 다른 실행이 쓰는 중일 때 기다리는 최대 시간(초)
+    "profile_lock_timeout": 120,
+    # LLM에 보낼 후보 도구 검색
+    "ollama_host": None,
+    "retrieval_k": 5,
+    "send_all_tools": False,
+    "retrieval_embeddings": False,
+    "embedding_model": "nomic-embed-text",
+    "embedding_weight": 0.5,
+    # 모델 예열과 컨텍스트 크기 (연속 num_ctx_shrink_after번 작으면 줄임)
+    "ollama_keep_alive": "30m",
+    "num_ctx_min": 2048,
+    "num_ctx_max": 32768,
+    "num_ctx_shrink_after": 5,
+    "num_ctx_reserve": 512,
+    "chars_per_token": 2.5,
+    "cold_load_threshold": 0.5,
+    # 반복 명령 캐시
+    "intent_cache": True,
+    "intent_cache_size": 500,
+    "intent_cache_ttl": 86400,
+    # LLM 없이 바로 호출하는 라우터 (직접 실행하려면 함수 이름 토큰이 router_name_min 이상 일치해야 함)
+    "router": True,
+    "router_threshold": 0.6,
+    "router_margin": 0.1,
+    "router_name_min": 0.5,
+    "router_candidates": 10,
+    # 여러 함수 호출 실행 방식 ("parallel" / "sequential")
+    "dispatch_mode": "parallel",
+    "dispatch_max_concurrency": 2,
+    "dispatch_stop_on_error": True,
+    # 실행 기록 (최근 실행 수, 실행당 보관할 출력 줄 수)
+    "run_history_size": 100,
+    "run_output_lines": 500,
+    # 로그 패널 (표시 위젯 상한, 링 버퍼 크기, 레벨 필터, 회전 파일 기록)
+    "log_max_widgets": 300,
+    "log_ring_size": 5000,
+    "log_level": "info",
+    "log_file": False,
+    "log_file_max_bytes": 1000000,
+    "log_file_backups": 3,
+    # functions/, tools.db 변경 감시 (auto | inotify | polling)
+    "fs_watch": True,
+    "fs_watch_backend": "auto",
+    "fs_watch_interval": 1.0,
+    "fs_watch_debounce": 0.2,
+    # 음성 인식: 녹음 중 부분 전사(auto면 local 백엔드에서만, 원격은 요청마다 과금되므로),
+    # OpenAI 호환 서버 주소(None이면 OpenAI)와 모델
+    "stt_streaming": "auto",
+    "stt_base_url": None,
+    "stt_model": "whisper-1",
+    "stt_partial_interval": 1.0,
+    "stt_segment_seconds": 5.0,
+    # 업로드 인코딩(wav | flac, flac은 soundfile을 따로 설치해야 함), 녹음 보관 여부와 보관 개수
+    "stt_audio_format": "wav",
+    "stt_archive": False,
+    "stt_archive_keep": 50,
+    # 음성 구간 검출: 절대 임계값(dBFS), 소음 대비 여유(dB), 무성음 ZCR, 앞뒤 여유(초)
+    "vad": True,
+    "vad_energy_db": -45.0,
+    "vad_margin_db": 10.0,
+    "vad_zcr": 0.25,
+    "vad_padding": 0.2,
+    "vad_min_speech": 0.25,
+    # 음성 입력 사용 여부(끄면 마이크 스트림을 닫음), 최대 녹음 길이, 단축키 이전 녹음(초)
+    "stt_enabled": True,
+    "stt_max_seconds": 30,
+    "stt_preroll": 0.3,
+    # STT 백엔드: openai(OpenAI 호환 서버, stt_base_url) | local(faster-whisper)
+    "stt_backend": "openai",
+    "stt_timeout": 30,
+    "stt_language": "ko",
+    "stt_local_model": "small",
+    "stt_local_device": "auto",
+    "stt_local_compute_type": "int8",
+    # 핸즈프리: 발화 시작/끝 판정(초), 대기 큐 크기, 발화 최대 길이(초)
+    "hands_free": False,
+    "vad_start_speech": 0.15,
+    "vad_end_silence": 0.6,
+    "hands_free_queue": 4,
+    "hands_free_max_utterance": 15,
+    # 녹화 후 선택자 최적화: 인자 없는 함수는 저장 직후 자동 실행, 요소 대기 시간(ms)
+    "selector_optimize_after_record": False,
+    "selector_optimize_timeout": 10000,
+}
+
+
 def load_config() -> dict:
     if os.path.exists(CONFIG_PATH):
         try:
             with open(CONFIG_PATH, "r", encoding="utf-8") as f:
-                return json.load(f)
+                return {**DEFAULT_CONFIG, **json.load(f)}
         except Exception as e:
             raise ConfigLoadError("설정 파일을 불러오는 중 오류가 발생했습니다.", e)
 
-    default_config = {
-        "theme": "dark",
-    }
-    return default_config
+    return dict(DEFAULT_CONFIG)
 
 
 cfg = load_config()
 
 
 def save_config(data: dict) -> Result[str, Exception]:
+    """
+    기본값과 다른 항목만 저장합니다. 기본값까지 파일에 남기면
+    이후 버전에서 바꾼 기본값이 기존 설치에 반영되지 않기 때문입니다.
+    """
+    changed = {
+        key: value
+        for key, value in data.items()
+        if key not in DEFAULT_CONFIG or DEFAULT_CONFIG[key] != value
+    }
     try:
         with open(CONFIG_PATH, "w", encoding="utf-8") as f:
-            json.dump(data, f, indent=2, ensure_ascii=False)
+            json.dump(changed, f, indent=2, ensure_ascii=False)
             return Success("설정 파일이 성공적으로 저장되었습니다.")
     except Exception as e:
         return Failure(
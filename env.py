@@ -18,5 +18,12 @@ FUNCTIONS_DIR = APP_DIR / "functions"
 
 AUDIOS_DIR = APP_DIR / "audios"
 
+PROFILES_DIR = APP_DIR / "profiles"
+
+LOG_PATH = APP_DIR / "logs" / "app.log"
+
 TOOLS_DIR = APP_DIR
 TOOLS_PATH = TOOLS_DIR / "tools.py"
+TOOLS_DB_PATH = TOOLS_DIR / "tools.db"
+
+INTENT_CACHE_PATH = APP_DIR / "intent_cache.db"
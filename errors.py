@@ -27,3 +27,19 @@ class ConfigLoadError(BaseError):
 
 class ConfigSaveError(BaseError):
     pass
+
+
+class RegistryError(BaseError):
+    pass
+
+
+class CodegenError(BaseError):
+    pass
+
+
+class ProfileBusyError(BaseError):
+    pass
+
+
+class WorkerBusyError(BaseError):
+    pass
@@ -1,8 +1,16 @@
 import dearpygui.dearpygui as dpg
 
 from config import cfg, save_config
+from utils.browser_server import stop_browser_server
+from utils.codegen_sessions import stop_all_sessions
+from utils.fs_watcher import stop_watcher
+from utils.runner import shutdown_pool
 
 
 def finalize():
+    stop_all_sessions()
+    stop_watcher()
+    shutdown_pool()
+    stop_browser_server()
     dpg.destroy_context()
     save_config(cfg)
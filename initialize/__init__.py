@@ -7,13 +7,15 @@ from returns.result import Failure
 from config import cfg
 from env import (
     APP_TITLE,
+    AUDIOS_DIR,
     FUNCTIONS_DIR,
     TOOLS_DIR,
-    TOOLS_PATH,
     VIEWPORT_HEIGHT,
     VIEWPORT_WIDTH,
 )
 from initialize.font import ensure_korean_font
+from utils.dpg_ui import set_log_file
+from utils.registry import init_registry
 
 
 def ensure_functions():
@@ -21,15 +23,14 @@ def ensure_functions():
 
 
 def ensure_tools():
+    """도구 레지스트리(DB) 준비. 기존 tools.py가 있으면 처음 한 번 옮겨 온다"""
     Path(TOOLS_DIR).mkdir(parents=True, exist_ok=True)
-    if not TOOLS_PATH.exists():
-        with open(TOOLS_PATH, "w", encoding="utf-8") as f:
-            f.write("# AUTO-GENERATED TOOL DEFINITIONS\nTOOLS = []\n")
+    init_registry()
 
 
 def ensure_audio_dir():
     """프로젝트 루트에 audios 폴더 생성"""
-    Path(FUNCTIONS_DIR).mkdir(parents=True, exist_ok=True)
+    Path(AUDIOS_DIR).mkdir(parents=True, exist_ok=True)
 
 
 def init_theme():
@@ -44,6 +45,8 @@ def initialize():
     dpg.create_viewport(title=APP_TITLE, width=VIEWPORT_WIDTH, height=VIEWPORT_HEIGHT)
     ensure_functions()
     ensure_tools()
+    ensure_audio_dir()
+    set_log_file(cfg["log_file"])
     match ensure_korean_font():
         case Failure(e):
             raise e
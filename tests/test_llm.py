@@ -0,0 +1,38 @@
+import pytest
+
+from config import DEFAULT_CONFIG, cfg
+from utils import llm
+
+
+@pytest.fixture(autouse=True)
+def fresh_sizes(monkeypatch):
+    monkeypatch.setattr(llm, "_num_ctx", {})
+    monkeypatch.setattr(llm, "_shrink", {})
+    for key in ("num_ctx_min", "num_ctx_max", "num_ctx_reserve", "chars_per_token"):
+        monkeypatch.setitem(cfg, key, DEFAULT_CONFIG[key])
+    monkeypatch.setitem(cfg, "num_ctx_shrink_after", 3)
+
+
+def request(chars: int) -> tuple[list, list]:
+    return [{"role": "user", "content": "가" * chars}], []
+
+
+def test_grows_immediately():
+    assert llm.estimate_num_ctx("m", *request(10)) == 2048
+    assert llm.estimate_num_ctx("m", *request(20000)) == 16384
+
+
+def test_shrinks_only_after_consecutive_small_requests():
+    assert llm.estimate_num_ctx("m", *request(20000)) == 16384
+    assert llm.estimate_num_ctx("m", *request(10)) == 16384
+    assert llm.estimate_num_ctx("m", *request(5000)) == 16384
+    # 세 번 연속 작았으므로 그중 가장 큰 크기로 줄인다
+    assert llm.estimate_num_ctx("m", *request(10)) == 4096
+
+
+def test_large_request_resets_shrink_streak():
+    llm.estimate_num_ctx("m", *request(20000))
+    llm.estimate_num_ctx("m", *request(10))
+    llm.estimate_num_ctx("m", *request(10))
+    assert llm.estimate_num_ctx("m", *request(20000)) == 16384
+    assert llm.estimate_num_ctx("m", *request(10)) == 16384
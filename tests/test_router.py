@@ -0,0 +1,78 @@
+import pytest
+
+from config import DEFAULT_CONFIG, cfg
+from utils.router import route, score_tool, tokenize
+
+
+@pytest.fixture(autouse=True)
+def router_defaults(monkeypatch):
+    # 사용자 설정 파일과 관계없이 기본값으로 판단
+    for key in ("router_threshold", "router_margin", "router_name_min"):
+        monkeypatch.setitem(cfg, key, DEFAULT_CONFIG[key])
+
+
+def tool(name: str, desc: str, params: dict | None = None, kind: str = "string"):
+    properties = {
+        var: {"type": kind, "description": text} for var, text in (params or {}).items()
+    }
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": desc,
+            "parameters": {
+                "type": "object",
+                "properties": properties,
+                "required": list(properties),
+            },
+        },
+    }
+
+
+TOOLS = [
+    tool("naver_search", "네이버에서 검색어를 검색", {"query": "검색어"}),
+    tool("naver_weather", "네이버 날씨 보기"),
+    tool("youtube_play", "유튜브에서 영상 재생", {"title": "영상 제목"}),
+    tool("open_mail", "메일함 열기"),
+]
+
+
+def test_name_match_dispatches_with_leftover_argument():
+    decision = route("naver search 날씨", TOOLS)
+    assert decision["call"] == {"name": "naver_search", "arguments": {"query": "날씨"}}
+
+
+def test_name_match_without_parameters_dispatches():
+    decision = route("open mail 해줘", TOOLS)
+    assert decision["call"] == {"name": "open_mail", "arguments": {}}
+
+
+@pytest.mark.parametrize(
+    "prompt",
+    [
+        "네이버에서 날씨 검색해줘",  # 설명 단어만 겹침
+        "네이버 뉴스",  # naver_weather와 한 단어만 겹침
+        "유튜브 음악 검색",  # 다른 사이트 + 검색
+        "메일 보내줘",  # open_mail과 비슷하지만 다른 동작
+    ],
+)
+def test_near_miss_prompts_fall_back_to_llm(prompt):
+    assert route(prompt, TOOLS)["call"] is None
+
+
+def test_keyword_score_is_normalized_by_prompt_length():
+    search = TOOLS[0]
+    short = "네이버 검색 날씨"
+    long = "네이버 검색 오늘 주식 시장 전망 정리"
+    short_score, _, _ = score_tool(tokenize(short), short.replace(" ", ""), search)
+    long_score, _, _ = score_tool(tokenize(long), long.replace(" ", ""), search)
+    assert long_score < short_score
+
+
+def test_number_parameter_rejects_text_value():
+    tools = [tool("set_volume", "볼륨 설정", {"level": "볼륨 크기"}, kind="number")]
+    assert route("set volume 크게", tools)["call"] is None
+    assert route("set volume 30", tools)["call"] == {
+        "name": "set_volume",
+        "arguments": {"level": "30"},
+    }
@@ -0,0 +1,65 @@
+import numpy as np
+import pytest
+
+from utils import vad
+from utils.vad import SAMPLE_RATE, StreamingSegmenter, set_ambient_noise_db, trim_silence
+
+
+@pytest.fixture(autouse=True)
+def no_ambient():
+    set_ambient_noise_db(None)
+    yield
+    set_ambient_noise_db(None)
+
+
+def tone(seconds: float, amplitude: float = 0.1) -> np.ndarray:
+    t = np.arange(int(seconds * SAMPLE_RATE)) / SAMPLE_RATE
+    return (amplitude * np.sin(2 * np.pi * 220 * t)).astype(np.float32)
+
+
+def noise(seconds: float, amplitude: float = 0.001) -> np.ndarray:
+    rng = np.random.default_rng(0)
+    return (amplitude * rng.standard_normal(int(seconds * SAMPLE_RATE))).astype(
+        np.float32
+    )
+
+
+def test_all_speech_clip_is_kept():
+    trimmed, saved = trim_silence(tone(2.0))
+    assert trimmed is not None
+    assert saved < 0.1
+
+
+def test_modulated_speech_clip_is_kept():
+    audio = tone(2.0)
+    t = np.arange(len(audio)) / SAMPLE_RATE
+    audio *= (1 + 0.5 * np.sin(2 * np.pi * 3 * t)).astype(np.float32)
+    assert trim_silence(audio)[0] is not None
+
+
+def test_all_silence_clip_is_dropped():
+    assert trim_silence(noise(2.0))[0] is None
+    assert trim_silence(np.zeros(SAMPLE_RATE, dtype=np.float32))[0] is None
+
+
+def test_leading_silence_is_trimmed():
+    trimmed, saved = trim_silence(np.concatenate([noise(1.0), tone(1.0)]))
+    assert trimmed is not None
+    assert 0.6 < saved < 1.0
+
+
+def test_tracked_noise_floor_raises_threshold():
+    # 시끄러운 환경에서 추적한 소음보다 약한 소리는 음성이 아니다
+    set_ambient_noise_db(-20.0)
+    assert trim_silence(tone(1.0, amplitude=0.05))[0] is None
+
+
+def test_segmenter_started_mid_speech_still_ends_utterance():
+    segmenter = StreamingSegmenter()
+    audio = np.concatenate([tone(1.0), noise(1.0)])
+    block = SAMPLE_RATE // 10
+    segments = []
+    for start in range(0, len(audio), block):
+        segments += segmenter.feed(audio[start : start + block], start)
+    assert len(segments) == 1
+    assert vad.ambient_noise_db() is not None
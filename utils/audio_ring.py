@@ -0,0 +1,50 @@
+# audio_ring.py
+"""
+고정 크기 오디오 링 버퍼.
+
+입력 스트림 콜백은 미리 할당한 NumPy 배열에 제자리 복사만 하므로
+녹음 길이와 상관없이 메모리 사용량이 일정합니다. 위치는 지금까지 쓴
+전체 샘플 수로 표현하며, 용량보다 오래된 샘플은 덮어씁니다.
+"""
+
+import threading
+
+import numpy as np
+
+
+class AudioRing:
+    def __init__(self, capacity: int):
+        self.capacity = int(capacity)
+        self.buffer = np.zeros(self.capacity, dtype=np.float32)
+        self.position = 0  # 지금까지 쓴 전체 샘플 수
+        self._lock = threading.Lock()
+
+    def write(self, block: np.ndarray):
+        """오디오 콜백에서 호출. 새 배열을 만들지 않고 링에 복사한다"""
+        n = len(block)
+        if n > self.capacity:
+            block = block[-self.capacity :]
+            n = self.capacity
+        with self._lock:
+            start = self.position % self.capacity
+            first = min(n, self.capacity - start)
+            self.buffer[start : start + first] = block[:first]
+            if first < n:
+                self.buffer[: n - first] = block[first:]
+            self.position += n
+
+    def oldest(self) -> int:
+        """아직 덮어쓰지 않은 가장 오래된 위치"""
+        return max(0, self.position - self.capacity)
+
+    def read(self, start: int, end: int | None = None) -> np.ndarray:
+        """[start, end) 구간의 복사본. 이미 덮어쓴 부분은 잘려 나간다"""
+        with self._lock:
+            end = self.position if end is None else min(end, self.position)
+            start = max(start, self.position - self.capacity)
+            if end <= start:
+                return np.zeros(0, dtype=np.float32)
+            i, j = start % self.capacity, end % self.capacity
+            if i < j:
+                return self.buffer[i:j].copy()
+            return np.concatenate((self.buffer[i:], self.buffer[:j]))
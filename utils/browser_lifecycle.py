@@ -0,0 +1,174 @@
+# browser_lifecycle.py
+"""
+함수 실행 후 남아 있는 브라우저(라이브 세션) 관리.
+
+예전에는 함수가 끝나도 사용자가 창을 닫을 때까지 무한 대기하며 브라우저를 붙잡고 있었습니다.
+이제 함수마다 정책을 정합니다.
+- close: 실행이 끝나면 바로 닫는다
+- idle: browser_idle_timeout초 동안 다시 쓰이지 않으면 닫는다 (창을 닫아도 정리)
+- reuse: idle처럼 남겨 두되, 같은 함수를 다시 실행하면 그 페이지에서 이어서 실행한다
+
+브라우저 객체는 워커 프로세스가 가지고 있고, 워커가 보내는 세션 이벤트로 이 목록을 유지합니다.
+살아 있는 세션이 browser_max_live개를 넘으면 가장 오래 안 쓰인 세션부터 닫습니다(LRU).
+"""
+
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable
+
+from config import cfg
+
+POLICIES = {"close": "바로 닫기", "idle": "유휴 후 닫기", "reuse": "세션 재사용"}
+
+_lock = threading.Lock()
+_sessions: dict[str, "LiveSession"] = {}
+_senders: dict[int, Callable[[dict], None]] = {}
+_listeners: list = []
+
+
+@dataclass
+class LiveSession:
+    pid: int
+    key: str
+    name: str
+    policy: str
+    profile: str | None = None
+    url: str = ""
+    opened: float = field(default_factory=time.time)
+    last_used: float = field(default_factory=time.time)
+    closing: bool = False
+
+    @property
+    def id(self) -> str:
+        return f"{self.pid}/{self.key}"
+
+    @property
+    def idle(self) -> float:
+        return time.time() - self.last_used
+
+
+def policy_for(name: str) -> str:
+    policy = cfg.get("browser_policies", {}).get(name, cfg.get("browser_policy", "idle"))
+    return policy if policy in POLICIES else "idle"
+
+
+def set_policy(name: str, policy: str):
+    if policy not in POLICIES:
+        raise ValueError(f"알 수 없는 브라우저 정책: {policy}")
+    cfg["browser_policies"] = {**cfg.get("browser_policies", {}), name: policy}
+
+
+def subscribe(callback):
+    """라이브 세션 목록이 바뀔 때 callback() 호출 (워커 읽기 스레드에서 불린다)"""
+    _listeners.append(callback)
+
+
+def _notify():
+    for callback in list(_listeners):
+        try:
+            callback()
+        except Exception:
+            pass
+
+
+def register_worker(pid: int, send: Callable[[dict], None]):
+    """워커에 제어 메시지를 보내는 함수를 등록"""
+    with _lock:
+        _senders[pid] = send
+
+
+def unregister_worker(pid: int):
+    """워커가 종료되면 그 워커의 세션도 함께 사라진다"""
+    with _lock:
+        _senders.pop(pid, None)
+        for session_id in [i for i, s in _sessions.items() if s.pid == pid]:
+            del _sessions[session_id]
+    _notify()
+
+
+def handle_event(pid: int, message: dict):
+    """워커가 보낸 {"type": "session", "event": "open"|"update"|"close", ...} 반영"""
+    session_id = f"{pid}/{message['key']}"
+    with _lock:
+        if message["event"] == "close":
+            _sessions.pop(session_id, None)
+        else:
+            session = _sessions.get(session_id)
+            if session is None:
+                session = LiveSession(
+                    pid,
+                    message["key"],
+                    message["name"],
+                    message["policy"],
+                    message.get("profile"),
+                )
+                _sessions[session_id] = session
+            session.url = message.get("url", session.url)
+            session.last_used = time.time()
+    _notify()
+    if message["event"] == "open":
+        _enforce_cap()
+
+
+def _enforce_cap():
+    limit = max(1, int(cfg.get("browser_max_live", 4)))
+    with _lock:
+        alive = [s for s in _sessions.values() if not s.closing]
+        victims = sorted(alive, key=lambda s: s.last_used)[: max(0, len(alive) - limit)]
+    for session in victims:
+        close_session(session.id)
+
+
+def list_live() -> list[LiveSession]:
+    """살아 있는 세션 (최근 사용순)"""
+    with _lock:
+        return sorted(_sessions.values(), key=lambda s: s.last_used, reverse=True)
+
+
+def has_sessions(pid: int) -> bool:
+    with _lock:
+        return any(s.pid == pid for s in _sessions.values())
+
+
+def reusable_worker(name: str) -> int | None:
+    """name 함수의 재사용 세션을 가진 워커 pid"""
+    with _lock:
+        for session in _sessions.values():
+            if session.name == name and session.policy == "reuse" and not session.closing:
+                return session.pid
+    return None
+
+
+def close_session(session_id: str):
+    """워커에 세션 종료를 요청. 실제 제거는 워커의 close 이벤트로 반영된다"""
+    with _lock:
+        session = _sessions.get(session_id)
+        send = _senders.get(session.pid) if session else None
+        if session is None or send is None or session.closing:
+            return
+        session.closing = True
+    try:
+        send({"type": "close_session", "key": session.key})
+    except Exception:
+        pass
+    _notify()
+
+
+def release_profile(profile: str, keep: str | None = None):
+    """
+    profile을 쥐고 있는 세션을 닫는다. 프로필은 한 번에 한 브라우저만 쓰므로,
+    같은 프로필로 새로 실행하기 전에 남겨 둔 브라우저를 정리해 잠금을 넘긴다.
+    keep 함수의 재사용 세션은 이어서 쓸 것이므로 남긴다.
+    """
+    for session in list_live():
+        if session.profile != profile:
+            continue
+        if keep is not None and session.name == keep and session.policy == "reuse":
+            continue
+        close_session(session.id)
+
+
+def close_all():
+    for session in list_live():
+        close_session(session.id)
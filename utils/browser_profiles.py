@@ -0,0 +1,190 @@
+# browser_profiles.py
+"""
+사이트별 영구 브라우저 프로필.
+
+함수는 기본적으로 빈 new_context()에서 시작하므로 로그인, 쿠키, HTTP 캐시가 매번 사라집니다.
+함수에 프로필을 지정하면 워커가 그 프로필로 브라우저를 엽니다.
+- state: storage_state JSON 스냅샷 (쿠키, localStorage). 공유 브라우저에서도 쓸 수 있고,
+  실행이 성공하거나 열어 둔 세션이 닫힐 때 새 스냅샷으로 원자적으로 교체합니다.
+- persistent: user_data_dir 디렉터리 (HTTP 캐시 포함). Chromium이 직접 저장합니다.
+
+한 프로필은 한 번에 한 브라우저만 씁니다. 브라우저를 여는 동안 프로필 잠금(path.lock)을
+잡고 닫을 때 풀기 때문에, 같은 프로필을 쓰는 실행은 앞 실행이 끝날 때까지 기다렸다가
+그 결과(로그인, 쿠키)를 이어받습니다. 쿠키를 병합하지 않으므로 동시에 쓰면 한쪽의
+로그인이 사라지는 last-writer-wins나, 사용 중인 디렉터리 복사본에서 생기는 손상이 없습니다.
+profile_lock_timeout초 안에 잠금을 못 잡으면 ProfileBusyError로 실패합니다.
+
+프로필 이름은 보통 사이트 호스트(예: naver.com)이고, 파일은 profiles/ 아래에 있습니다.
+"""
+
+import os
+import re
+import tempfile
+import time
+from urllib.parse import urlparse
+
+from config import cfg
+from env import PROFILES_DIR
+from errors import ProfileBusyError
+
+try:
+    import fcntl
+except ImportError:  # Windows: 잠금 파일의 첫 바이트를 msvcrt로 잠근다
+    fcntl = None
+    import msvcrt
+
+KINDS = {"state": "저장 상태", "persistent": "브라우저 프로필"}
+GOTO_URL = re.compile(r"""\.goto\(\s*f?["']([^"']+)["']""")
+
+
+def site_of(url: str) -> str:
+    host = urlparse(url).hostname or ""
+    return host[4:] if host.startswith("www.") else host
+
+
+def site_of_function(file_path: str) -> str | None:
+    """함수 파일에서 처음 여는 주소의 사이트"""
+    try:
+        with open(file_path, "r", encoding="utf-8") as f:
+            match = GOTO_URL.search(f.read())
+    except OSError:
+        return None
+    if match is None:
+        return None
+    return site_of(match.group(1)) or None
+
+
+def list_profiles() -> dict:
+    return dict(cfg.get("profiles", {}))
+
+
+def create_profile(name: str, kind: str | None = None, site: str | None = None):
+    kind = kind or cfg.get("profile_kind", "state")
+    if kind not in KINDS:
+        raise ValueError(f"알 수 없는 프로필 종류: {kind}")
+    if not re.fullmatch(r"[\w.-]+", name):
+        raise ValueError(f"프로필 이름에 쓸 수 없는 문자가 있습니다: {name}")
+    cfg["profiles"] = {**cfg.get("profiles", {}), name: {"kind": kind, "site": site or name}}
+
+
+def set_function_profile(function: str, profile: str | None):
+    profiles = dict(cfg.get("function_profiles", {}))
+    if profile:
+        profiles[function] = profile
+    else:
+        profiles.pop(function, None)
+    cfg["function_profiles"] = profiles
+
+
+def profile_of(function: str) -> dict | None:
+    """워커에 넘길 프로필 정보 {"name", "kind", "path"} (지정하지 않았으면 None)"""
+    name = cfg.get("function_profiles", {}).get(function)
+    profile = cfg.get("profiles", {}).get(name) if name else None
+    if profile is None:
+        return None
+    suffix = ".json" if profile["kind"] == "state" else ""
+    return {
+        "name": name,
+        "kind": profile["kind"],
+        "path": str(PROFILES_DIR / f"{name}{suffix}"),
+    }
+
+
+def _try_lock(handle) -> bool:
+    try:
+        if fcntl is not None:
+            fcntl.flock(handle, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        else:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_NBLCK, 1)
+    except OSError:
+        return False
+    return True
+
+
+def _lock(path: str, timeout: float):
+    """
+    path.lock 파일에 배타 잠금 (다른 프로세스가 쓰는 중이면 timeout초까지 기다림).
+    못 잡으면 None
+    """
+    handle = open(f"{path}.lock", "w")
+    deadline = time.monotonic() + timeout
+    while not _try_lock(handle):
+        if time.monotonic() >= deadline:
+            handle.close()
+            return None
+        time.sleep(0.2)
+    return handle
+
+
+def _unlock(handle):
+    if handle is None:
+        return
+    if fcntl is None:
+        # msvcrt 잠금은 닫기 전에 직접 풀어야 한다
+        try:
+            handle.seek(0)
+            msvcrt.locking(handle.fileno(), msvcrt.LK_UNLCK, 1)
+        except OSError:
+            pass
+    handle.close()  # fcntl 잠금은 닫으면 풀린다
+
+
+def save_state(context, path: str):
+    """
+    storage_state를 임시 파일에 쓴 뒤 교체. 읽는 쪽은 항상 완전한 파일을 본다.
+    프로필 잠금을 가진 실행(open_page)에서만 부르므로 여기서는 잠그지 않는다
+    """
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+    os.close(fd)
+    try:
+        context.storage_state(path=tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def open_page(playwright, profile: dict | None, headless: bool = False):
+    """
+    (워커) 프로필로 브라우저를 열고 (page, close, save)를 반환합니다.
+    save는 성공한 실행 뒤 프로필을 갱신하는 함수 (필요 없으면 None).
+    프로필이 있으면 close를 부를 때까지 프로필 잠금을 가진다.
+    """
+    if profile is None:
+        browser = playwright.chromium.launch(headless=headless)
+        return browser.new_context().new_page(), browser.close, None
+
+    path = profile["path"]
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    handle = _lock(path, float(cfg.get("profile_lock_timeout", 120)))
+    if handle is None:
+        raise ProfileBusyError(f"다른 실행이 프로필 '{profile['name']}'을 쓰고 있습니다.")
+
+    try:
+        if profile["kind"] == "state":
+            browser = playwright.chromium.launch(headless=headless)
+            state = path if os.path.exists(path) else None
+            context = browser.new_context(storage_state=state)
+            page, shutdown = context.new_page(), browser.close
+            save = lambda: save_state(context, path)
+        else:
+            # persistent: 공유 브라우저(CDP)로는 열 수 없어 항상 직접 띄운다
+            os.makedirs(path, exist_ok=True)
+            context = playwright.chromium.launch_persistent_context(
+                path, headless=headless
+            )
+            page = context.pages[0] if context.pages else context.new_page()
+            shutdown, save = context.close, None
+    except BaseException:
+        _unlock(handle)
+        raise
+
+    def close():
+        try:
+            shutdown()
+        finally:
+            _unlock(handle)
+
+    return page, close, save
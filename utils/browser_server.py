@@ -0,0 +1,156 @@
+# browser_server.py
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import time
+import urllib.request
+
+from config import cfg
+from utils.dpg_ui import log
+
+
+class BrowserServer:
+    """
+    앱이 관리하는 Chromium 프로세스.
+    원격 디버깅 포트를 열어 두고, 워커들은 CDP로 접속해 실행마다 새 컨텍스트를 만든다.
+    실제 포트는 Chromium이 우리 user_data_dir에 쓰는 DevToolsActivePort에서 읽고,
+    그 포트의 /json/version이 같은 브라우저 세션인지 확인한 뒤에만 사용한다.
+    고정 포트를 다른 Chrome이 이미 쓰고 있으면 그 Chrome에 붙지 않는다.
+    """
+
+    def __init__(self, port: int = 0):
+        self.port = port  # 0이면 Chromium이 빈 포트를 고른다
+        self.process: subprocess.Popen | None = None
+        self._user_data_dir: str | None = None
+
+    @property
+    def endpoint(self) -> str:
+        return f"http://127.0.0.1:{self.port}"
+
+    def alive(self) -> bool:
+        return self.process is not None and self.process.poll() is None
+
+    def _executable_path(self) -> str:
+        from playwright.sync_api import sync_playwright
+
+        with sync_playwright() as playwright:
+            return playwright.chromium.executable_path
+
+    def _active_port(self) -> tuple[int, str] | None:
+        """우리 프로세스가 쓴 DevToolsActivePort의 (포트, 브라우저 웹소켓 경로)"""
+        try:
+            with open(
+                os.path.join(self._user_data_dir, "DevToolsActivePort"), encoding="utf-8"
+            ) as f:
+                lines = f.read().split()
+            return int(lines[0]), lines[1]
+        except (OSError, ValueError, IndexError):
+            return None
+
+    def _wait_until_ready(self, timeout: float) -> bool:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if not self.alive():
+                return False
+            active = self._active_port()
+            if active is None:
+                time.sleep(0.2)
+                continue
+            port, ws_path = active
+            try:
+                url = f"http://127.0.0.1:{port}/json/version"
+                with urllib.request.urlopen(url, timeout=1) as response:
+                    version = json.load(response)
+            except Exception:
+                time.sleep(0.2)
+                continue
+            if not version.get("webSocketDebuggerUrl", "").endswith(ws_path):
+                log(f"디버깅 포트 {port}를 다른 브라우저가 쓰고 있습니다.", level="error")
+                return False
+            self.port = port
+            return True
+        return False
+
+    def start(self, timeout: float = 15) -> bool:
+        self._user_data_dir = tempfile.mkdtemp(prefix="kmu_chromium_")
+        self.process = subprocess.Popen(
+            [
+                self._executable_path(),
+                f"--remote-debugging-port={self.port}",
+                f"--user-data-dir={self._user_data_dir}",
+                "--no-first-run",
+                "--no-default-browser-check",
+                "about:blank",
+            ],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.DEVNULL,
+        )
+        return self._wait_until_ready(timeout)
+
+    def stop(self):
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+        if self._user_data_dir:
+            shutil.rmtree(self._user_data_dir, ignore_errors=True)
+            self._user_data_dir = None
+
+
+_server: BrowserServer | None = None
+_server_lock = threading.Lock()
+
+
+def shared_browser_enabled() -> bool:
+    return cfg.get("browser_mode", "shared") == "shared"
+
+
+def start_browser_server():
+    """공유 브라우저 모드일 때 백그라운드에서 Chromium을 띄운다"""
+    if not shared_browser_enabled():
+        return
+
+    def _start():
+        global _server
+        with _server_lock:
+            if _server is not None and _server.alive():
+                return
+            server = BrowserServer(int(cfg.get("browser_debug_port", 0)))
+            try:
+                ready = server.start()
+            except Exception as e:
+                log(f"공유 브라우저 시작 실패: {e}", level="error")
+                return
+            if not ready:
+                server.stop()
+                log("공유 브라우저가 응답하지 않아 실행마다 브라우저를 띄웁니다.")
+                return
+            _server = server
+        log(f"공유 브라우저 준비 완료: {server.endpoint}")
+
+    threading.Thread(target=_start, daemon=True).start()
+
+
+def browser_endpoint() -> str | None:
+    """공유 브라우저가 살아 있으면 CDP 엔드포인트를, 아니면 None"""
+    if not shared_browser_enabled():
+        return None
+    server = _server
+    if server is None or not server.alive():
+        return None
+    return server.endpoint
+
+
+def stop_browser_server():
+    global _server
+
+    with _server_lock:
+        if _server is not None:
+            _server.stop()
+            _server = None
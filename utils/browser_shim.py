@@ -0,0 +1,69 @@
+# browser_shim.py
+"""
+워커에서 공유 Chromium을 쓰기 위한 Playwright 래퍼.
+
+생성된 함수는 playwright.chromium.launch() 로 브라우저를 띄우는데,
+이 래퍼를 넘기면 launch()가 이미 떠 있는 공유 브라우저를 돌려주고
+실행마다 새 BrowserContext만 만들어 격리합니다.
+"""
+
+
+class SharedBrowser:
+    """공유 브라우저 래퍼. close()는 이번 실행에서 만든 컨텍스트만 닫는다"""
+
+    def __init__(self, browser):
+        self._browser = browser
+        self._contexts = []
+
+    @property
+    def contexts(self):
+        return list(self._contexts)
+
+    def new_context(self, **kwargs):
+        context = self._browser.new_context(**kwargs)
+        self._contexts.append(context)
+        return context
+
+    def new_page(self, **kwargs):
+        return self.new_context(**kwargs).new_page()
+
+    def close(self, **kwargs):
+        for context in self._contexts:
+            try:
+                context.close()
+            except Exception:
+                pass
+        self._contexts.clear()
+
+    def __getattr__(self, name):
+        return getattr(self._browser, name)
+
+
+class SharedBrowserType:
+    def __init__(self, browser_type, browser):
+        self._browser_type = browser_type
+        self._browser = browser
+        self.launched: list[SharedBrowser] = []
+
+    def launch(self, **kwargs):
+        # headless 등 실행 옵션은 공유 브라우저에서 의미가 없으므로 무시
+        shared = SharedBrowser(self._browser)
+        self.launched.append(shared)
+        return shared
+
+    def __getattr__(self, name):
+        return getattr(self._browser_type, name)
+
+
+class SharedPlaywright:
+    def __init__(self, playwright, browser):
+        self._playwright = playwright
+        self.chromium = SharedBrowserType(playwright.chromium, browser)
+
+    def close(self):
+        """함수가 닫지 않고 끝낸 컨텍스트까지 정리"""
+        for shared in self.chromium.launched:
+            shared.close()
+
+    def __getattr__(self, name):
+        return getattr(self._playwright, name)
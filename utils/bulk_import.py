@@ -0,0 +1,182 @@
+# bulk_import.py
+"""
+녹화 스크립트 폴더 일괄 가져오기.
+
+파일마다 AST 변환/검증을 프로세스 풀에서 병렬로 돌리고, 변환된 파일은 메인 프로세스가
+functions/ 에 쓴 뒤 레지스트리에 한 트랜잭션으로 등록합니다 (버전은 한 번만 오름).
+
+- codegen 출력(run(playwright)): "${var}" 자리표시자를 문자열 파라미터로 바꿔 변환
+- 이미 함수 파일 형식(run(page, ...))인 스크립트: 검증만 하고 그대로 사용
+- 설명은 파일 첫 줄 주석이나 docstring, 이름은 파일 이름
+
+    python -m utils.bulk_import recordings/ --workers 4 --overwrite
+
+앱의 "폴더 가져오기"도 이 CLI를 별도 프로세스로 실행합니다. 등록 결과는 tools.db 변경
+감시로 앱에 반영됩니다.
+"""
+
+import argparse
+import ast
+import multiprocessing
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable
+
+from env import APP_DIR, FUNCTIONS_DIR
+from errors import CodegenError
+from utils.codegen_transform import (
+    describe_script,
+    params_to_schema,
+    placeholder_params,
+    transform_recording,
+    validate_function_source,
+)
+
+ANNOTATION_TYPES = {"int": "숫자", "float": "실수"}
+
+
+def function_name(path: Path) -> str:
+    """파일 이름을 파이썬 식별자로 (도구 이름 = 모듈 이름)"""
+    name = re.sub(r"\W", "_", path.stem)
+    return f"f_{name}" if name[:1].isdigit() else name
+
+
+def _signature_params(source: str) -> list[dict]:
+    """run(page, a: str, b: int) 의 인자를 UI 파라미터 형식으로"""
+    for node in ast.parse(source).body:
+        if isinstance(node, ast.FunctionDef) and node.name == "run":
+            return [
+                {
+                    "type": ANNOTATION_TYPES.get(
+                        ast.unparse(arg.annotation) if arg.annotation else "", "문자열"
+                    ),
+                    "variable": arg.arg,
+                    "desc": arg.arg,
+                }
+                for arg in node.args.args[1:]
+            ]
+    return []
+
+
+def _convert(path: str) -> dict:
+    """(워커 프로세스) 스크립트 하나를 변환. 실패하면 error 항목에 사유를 담는다"""
+    path = Path(path)
+    name = function_name(path)
+    try:
+        source = path.read_text(encoding="utf-8")
+        desc = describe_script(source, name)
+        if re.search(r"^def run\(\s*page\b", source, flags=re.M):
+            validate_function_source(source)
+            params = _signature_params(source)
+            code = source
+        else:
+            params = placeholder_params(source)
+            code = transform_recording(source, params, desc)
+    except (CodegenError, OSError, SyntaxError, UnicodeDecodeError) as e:
+        return {"path": str(path), "name": name, "error": str(e)}
+    return {
+        "path": str(path),
+        "name": name,
+        "desc": desc,
+        "params": params,
+        "code": code,
+    }
+
+
+def import_directory(
+    directory,
+    workers: int | None = None,
+    overwrite: bool = False,
+    report: Callable[[str], None] | None = None,
+) -> dict:
+    """
+    폴더의 *.py 스크립트를 변환해 functions/ 에 저장하고 레지스트리에 한 번에 등록합니다.
+    report를 주지 않으면 앱 로그(log)로 남깁니다.
+    반환값: {"imported": [...], "skipped": [...], "failed": [(파일, 사유)], "elapsed": 초}
+    """
+    # 변환 워커(spawn)가 이 모듈을 다시 import할 때 UI/레지스트리까지 끌고 오지 않도록 지연 import
+    from utils.dpg_ui import log
+    from utils.registry import upsert_tools
+
+    report = report or log
+
+    started = time.perf_counter()
+    paths = sorted(str(p) for p in Path(directory).glob("*.py"))
+    result = {"imported": [], "skipped": [], "failed": [], "elapsed": 0.0}
+    if not paths:
+        report(f"가져올 스크립트가 없습니다: {directory}")
+        return result
+
+    workers = workers or min(len(paths), os.cpu_count() or 1)
+    # spawn은 __main__ 모듈을 워커에서 다시 실행하므로 앱(GUI) 프로세스에서 부르면 안 된다.
+    # 앱에서는 import_in_subprocess()로 이 모듈을 CLI로 띄운다
+    context = multiprocessing.get_context("spawn")
+    with ProcessPoolExecutor(max_workers=workers, mp_context=context) as pool:
+        converted = list(pool.map(_convert, paths, chunksize=4))
+
+    os.makedirs(FUNCTIONS_DIR, exist_ok=True)
+    tools = []
+    seen = set()
+    for item in converted:
+        name = item["name"]
+        if "error" in item:
+            result["failed"].append((item["path"], item["error"]))
+            report(f"변환 실패: {item['path']} - {item['error']}")
+            continue
+        file_path = Path(FUNCTIONS_DIR) / f"{name}.py"
+        if name in seen or (file_path.exists() and not overwrite):
+            result["skipped"].append(name)
+            report(f"건너뜀 (이미 있음): {name}")
+            continue
+        seen.add(name)
+        file_path.write_text(item["code"], encoding="utf-8")
+        tools.append((name, item["desc"], params_to_schema(item["params"]), file_path))
+        result["imported"].append(name)
+
+    upsert_tools(tools)
+    result["elapsed"] = time.perf_counter() - started
+    report(
+        f"일괄 가져오기 완료: {len(result['imported'])}개 등록, "
+        f"{len(result['skipped'])}개 건너뜀, {len(result['failed'])}개 실패 "
+        f"({result['elapsed']:.2f}s, 워커 {workers}개)"
+    )
+    return result
+
+
+def import_in_subprocess(
+    directory: str, overwrite: bool, report: Callable[[str], None]
+) -> int:
+    """CLI를 별도 프로세스로 실행하고 출력 줄을 report로 넘긴다. 종료 코드를 반환"""
+    cmd = [sys.executable, "-m", "utils.bulk_import", directory]
+    if overwrite:
+        cmd.append("--overwrite")
+    process = subprocess.Popen(
+        cmd,
+        cwd=APP_DIR,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        text=True,
+        encoding="utf-8",
+        errors="replace",
+    )
+    for line in process.stdout:
+        report(line.rstrip("\n"))
+    return process.wait()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("directory", type=str)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--overwrite", action="store_true")
+    args = parser.parse_args()
+
+    from utils.registry import init_registry
+
+    init_registry()  # 앱 밖에서 실행할 때도 DB가 준비되도록
+    import_directory(args.directory, args.workers, args.overwrite, report=print)
@@ -0,0 +1,176 @@
+# codegen_sessions.py
+"""
+Playwright codegen 녹화 세션 관리.
+
+녹화마다 codegen 프로세스를 백그라운드에서 띄우고 고유한 임시 파일에 코드를 받습니다.
+UI 스레드는 기다리지 않으며, 세션이 끝나면 감시 스레드가 on_finish(session, code)를
+호출해 저장을 마무리합니다. 여러 세션을 동시에 녹화할 수 있습니다.
+저장에 실패하면 녹화된 코드(임시 파일)를 지우지 않고 남겨 두어 다시 저장할 수 있습니다.
+"""
+
+import itertools
+import os
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable
+
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_sessions: dict[int, "RecordingSession"] = {}
+_listeners: list = []
+
+
+class RecordingSession:
+    def __init__(
+        self, name: str, url: str, on_finish: Callable[["RecordingSession", str], None]
+    ):
+        self.id = next(_ids)
+        self.name = name
+        self.url = url
+        self.started = time.time()
+        self.ended: float | None = None
+        self.status = "녹화 중"
+        self.error: str | None = None
+        self.process: subprocess.Popen | None = None
+        self.stopped = False
+        self.on_finish = on_finish
+        fd, self.output_path = tempfile.mkstemp(prefix=f"codegen_{name}_", suffix=".py")
+        os.close(fd)
+        os.remove(self.output_path)  # codegen이 코드를 남겼는지 존재 여부로 판단
+
+    @property
+    def running(self) -> bool:
+        return self.ended is None
+
+    @property
+    def elapsed(self) -> float:
+        return (self.ended or time.time()) - self.started
+
+    @property
+    def has_output(self) -> bool:
+        return os.path.exists(self.output_path)
+
+    def read_output(self) -> str | None:
+        if not self.has_output:
+            return None
+        with open(self.output_path, "r", encoding="utf-8") as f:
+            return f.read()
+
+    def discard_output(self):
+        try:
+            os.remove(self.output_path)
+        except FileNotFoundError:
+            pass
+
+
+def subscribe(callback):
+    """세션 상태가 바뀔 때 callback(session) 호출 (감시 스레드에서 불린다)"""
+    _listeners.append(callback)
+
+
+def _set_status(session: RecordingSession, status: str, error: str | None = None):
+    session.status = status
+    session.error = error
+    if status in ("완료", "실패", "취소"):
+        session.ended = time.time()
+    for callback in list(_listeners):
+        try:
+            callback(session)
+        except Exception:
+            pass
+
+
+def _save(session: RecordingSession):
+    """on_finish가 성공한 뒤에만 녹화 코드를 지운다"""
+    _set_status(session, "저장 중")
+    try:
+        session.on_finish(session, session.read_output())
+    except Exception as e:
+        _set_status(session, "실패", f"{e} - 녹화 코드 보관: {session.output_path}")
+        return
+    session.discard_output()
+    _set_status(session, "완료")
+
+
+def _watch(session: RecordingSession):
+    code = session.process.wait()
+    if not session.has_output:
+        if session.stopped:
+            _set_status(session, "취소")
+        else:
+            _set_status(session, "실패", f"코드가 생성되지 않았습니다 (종료 코드 {code})")
+        return
+    _save(session)
+
+
+def retry_save(session_id: int):
+    """저장에 실패해 녹화 코드가 남아 있는 세션을 백그라운드에서 다시 저장"""
+    session = _sessions.get(session_id)
+    if session is None or session.running or not session.has_output:
+        return
+    threading.Thread(target=_save, args=(session,), daemon=True).start()
+
+
+def start_session(
+    name: str, url: str, on_finish: Callable[[RecordingSession, str], None]
+) -> RecordingSession:
+    """codegen을 띄우고 바로 돌아온다. 같은 이름으로 녹화 중인 세션이 있으면 ValueError"""
+    with _lock:
+        if any(s.name == name and s.running for s in _sessions.values()):
+            raise ValueError(f"'{name}' 함수는 이미 녹화 중입니다.")
+        session = RecordingSession(name, url, on_finish)
+        _sessions[session.id] = session
+
+    cmd = [
+        sys.executable,
+        "-m",
+        "playwright",
+        "codegen",
+        url,
+        "--target",
+        "python",
+        "--output",
+        session.output_path,
+    ]
+    try:
+        session.process = subprocess.Popen(cmd)
+    except Exception as e:
+        _set_status(session, "실패", str(e))
+        raise
+
+    _set_status(session, "녹화 중")
+    threading.Thread(target=_watch, args=(session,), daemon=True).start()
+    return session
+
+
+def list_sessions() -> list[RecordingSession]:
+    """최근 세션 (최신순)"""
+    with _lock:
+        return sorted(_sessions.values(), key=lambda s: s.id, reverse=True)
+
+
+def stop_session(session_id: int):
+    """녹화 브라우저를 닫는다. 그때까지 기록된 코드가 있으면 저장된다"""
+    session = _sessions.get(session_id)
+    if session is None or session.process is None or session.process.poll() is not None:
+        return
+    session.stopped = True
+    session.process.terminate()
+
+
+def stop_all_sessions():
+    for session in list_sessions():
+        stop_session(session.id)
+
+
+def clear_finished():
+    """끝난 세션을 목록에서 지운다. 보관해 둔 녹화 코드도 함께 지운다"""
+    with _lock:
+        finished = [
+            i for i, s in _sessions.items() if not s.running and s.status != "저장 중"
+        ]
+        for session_id in finished:
+            _sessions.pop(session_id).discard_output()
@@ -0,0 +1,302 @@
+# codegen_transform.py
+"""
+Playwright codegen 출력(run(playwright) 형식)을 함수 파일(run(page, **params) 형식)로 바꾸는 AST 변환.
+
+한 번의 트리 순회로
+- 브라우저/컨텍스트/첫 페이지 생성과 close() 호출 제거
+- "${var}" 자리표시자를 인자(또는 f-string)로 치환
+- 모듈 끝의 with sync_playwright() 블록 같은 실행 코드 제거
+를 처리하고, 단독 실행용 main()과 argparse 블록을 붙인 뒤 결과를 검증합니다.
+UI/dearpygui에 의존하지 않으므로 일괄 가져오기에서 여러 프로세스로 실행할 수 있습니다.
+"""
+
+import ast
+import re
+
+from errors import CodegenError
+
+PLACEHOLDER = re.compile(r"\$\{(\w+)\}")
+PAGE_NAME = re.compile(r"^page\d*$")
+# 변수 이름 -> 그 변수를 만드는 메서드. run(page) 밖(main)에서 만들어 주므로 본문에서 뺀다
+SETUP_ASSIGNS = {
+    "browser": {"launch"},
+    "context": {"new_context", "launch_persistent_context"},
+    "page": {"new_page"},
+}
+PARAM_TYPES = {"문자열": "str", "숫자": "int", "실수": "float"}
+# 생성된 main()이 run()을 마치면 출력하는 줄. 앱은 이 줄에서 실행을 끝난 것으로 보고,
+# 이후 브라우저를 열어 두는 프로세스는 라이브 세션으로 관리한다 (runner.run_cold)
+RUN_DONE_MARKER = "__KMU_RUN_DONE__"
+
+
+def _is_setup_assign(node: ast.Assign) -> bool:
+    if len(node.targets) != 1 or not isinstance(node.targets[0], ast.Name):
+        return False
+    value = node.value
+    return (
+        isinstance(value, ast.Call)
+        and isinstance(value.func, ast.Attribute)
+        and value.func.attr in SETUP_ASSIGNS.get(node.targets[0].id, ())
+    )
+
+
+def _is_close_call(node: ast.expr) -> bool:
+    """browser.close(), context.close(), page.close(), page1.close() ..."""
+    return (
+        isinstance(node, ast.Call)
+        and isinstance(node.func, ast.Attribute)
+        and node.func.attr == "close"
+        and isinstance(node.func.value, ast.Name)
+        and (
+            node.func.value.id in ("browser", "context")
+            or bool(PAGE_NAME.match(node.func.value.id))
+        )
+    )
+
+
+class RecordingTransformer(ast.NodeTransformer):
+    """run(playwright) 본문을 run(page) 본문으로 바꾼다"""
+
+    def __init__(self):
+        self.placeholders: list[str] = []  # 등장 순서대로, 중복 없이
+
+    def _note(self, name: str):
+        if name not in self.placeholders:
+            self.placeholders.append(name)
+
+    def _split(self, text: str) -> list[ast.expr]:
+        """'a ${q} b' -> [Constant('a '), FormattedValue(q), Constant(' b')]"""
+        parts: list[ast.expr] = []
+        pos = 0
+        for match in PLACEHOLDER.finditer(text):
+            if match.start() > pos:
+                parts.append(ast.Constant(text[pos : match.start()]))
+            self._note(match.group(1))
+            parts.append(
+                ast.FormattedValue(ast.Name(match.group(1), ast.Load()), -1, None)
+            )
+            pos = match.end()
+        if pos < len(text):
+            parts.append(ast.Constant(text[pos:]))
+        return parts
+
+    def visit_Assign(self, node: ast.Assign):
+        if _is_setup_assign(node):
+            return None
+        return self.generic_visit(node)
+
+    def visit_Expr(self, node: ast.Expr):
+        if _is_close_call(node.value):
+            return None
+        return self.generic_visit(node)
+
+    def visit_Constant(self, node: ast.Constant):
+        if not isinstance(node.value, str) or not PLACEHOLDER.search(node.value):
+            return node
+        match = PLACEHOLDER.fullmatch(node.value)
+        if match:
+            self._note(match.group(1))
+            return ast.copy_location(ast.Name(match.group(1), ast.Load()), node)
+        return ast.copy_location(ast.JoinedStr(self._split(node.value)), node)
+
+    def visit_JoinedStr(self, node: ast.JoinedStr):
+        values = []
+        for value in node.values:
+            if isinstance(value, ast.Constant) and isinstance(value.value, str):
+                values.extend(self._split(value.value))
+            else:
+                values.append(self.generic_visit(value))
+        node.values = values
+        return node
+
+
+def _fill_empty_bodies(tree: ast.AST):
+    """문장을 빼서 비어 버린 블록(with, if, for ...)에 pass를 넣는다"""
+    for node in ast.walk(tree):
+        block = getattr(node, "body", None)
+        if isinstance(block, list) and not block:
+            block.append(ast.Pass())
+
+
+def _find_run(tree: ast.Module) -> ast.FunctionDef | None:
+    for node in tree.body:
+        if isinstance(node, ast.FunctionDef) and node.name == "run":
+            return node
+    return None
+
+
+def _uses_name(nodes: list[ast.stmt], name: str) -> bool:
+    return any(
+        isinstance(n, ast.Name) and n.id == name
+        for stmt in nodes
+        for n in ast.walk(stmt)
+    )
+
+
+def _main_source(params: list[dict]) -> str:
+    sig = "".join(f", {p['variable']}: {PARAM_TYPES[p['type']]}" for p in params)
+    call = "".join(f", {p['variable']}={p['variable']}" for p in params)
+    arg_lines = "".join(
+        f"    parser.add_argument({('--' + p['variable'])!r}, "
+        f"type={PARAM_TYPES[p['type']]}, required=True, help={p['desc']!r})\n"
+        for p in params
+    )
+    main_args = "".join(f", {p['variable']}=args.{p['variable']}" for p in params)
+    return (
+        f"def main(playwright: Playwright{sig}) -> None:\n"
+        "    browser = playwright.chromium.launch(headless=False)\n"
+        "    context = browser.new_context()\n"
+        "    page = context.new_page()\n"
+        f"    run(page{call})\n"
+        f'    print("{RUN_DONE_MARKER}", flush=True)  # 앱에 실행 완료를 알린다\n'
+        "\n"
+        "    # 창을 닫거나 KMU_KEEP_OPEN초(앱이 실행 정책에 맞춰 넘김)가 지나면 종료\n"
+        '    deadline = time.monotonic() + float(os.environ.get("KMU_KEEP_OPEN", "inf"))\n'
+        "    while time.monotonic() < deadline:\n"
+        "        try:\n"
+        "            page.wait_for_timeout(1000)\n"
+        "        except Exception:\n"
+        "            break\n"
+        "\n"
+        "    context.close()\n"
+        "    browser.close()\n"
+        "\n"
+        "\n"
+        'if __name__ == "__main__":\n'
+        "    import argparse\n"
+        "    from playwright.sync_api import sync_playwright\n"
+        "\n"
+        "    parser = argparse.ArgumentParser()\n"
+        f"{arg_lines}"
+        "    args = parser.parse_args()\n"
+        "\n"
+        "    with sync_playwright() as playwright:\n"
+        f"        main(playwright{main_args})\n"
+    )
+
+
+def transform_recording(source: str, params: list[dict], desc: str) -> str:
+    """
+    codegen 코드를 함수 파일 소스로 변환합니다.
+    params는 [{"type": "문자열"|"숫자"|"실수", "variable", "desc"}] (UI 입력 형식).
+    """
+    try:
+        tree = ast.parse(source)
+    except SyntaxError as e:
+        raise CodegenError("녹화된 코드를 해석하지 못했습니다.", e)
+
+    run = _find_run(tree)
+    if run is None or not run.args.args or run.args.args[0].arg != "playwright":
+        raise CodegenError("녹화된 코드에서 run(playwright) 함수를 찾지 못했습니다.")
+
+    transformer = RecordingTransformer()
+    body = [transformer.visit(stmt) for stmt in run.body]
+    actions = [stmt for stmt in body if stmt is not None]
+    module = ast.Module(actions, [])
+    _fill_empty_bodies(module)
+    actions = module.body
+
+    declared = {p["variable"] for p in params}
+    missing = [name for name in transformer.placeholders if name not in declared]
+    if missing:
+        raise CodegenError(f"파라미터로 정의되지 않은 자리표시자: {', '.join(missing)}")
+
+    # run 앞의 import만 남기고, with sync_playwright() 같은 실행 코드는 버린다
+    imports = [
+        node for node in tree.body if isinstance(node, (ast.Import, ast.ImportFrom))
+    ]
+    imports.append(ast.parse("from playwright.sync_api import Page").body[0])
+
+    sig = "".join(f", {p['variable']}: {PARAM_TYPES[p['type']]}" for p in params)
+    run_def = ast.parse(f"def run(page: Page{sig}) -> None:\n    pass").body[0]
+    prologue = []
+    if _uses_name(actions, "context"):
+        prologue = ast.parse("context = page.context").body
+    run_def.body = prologue + (actions or [ast.Pass()])
+
+    header = ast.Module(
+        [ast.Import([ast.alias("os")]), ast.Import([ast.alias("time")]), *imports], []
+    )
+    # 설명은 여러 줄일 수 있으므로 줄마다 주석으로 (describe_script는 첫 줄을 읽는다)
+    comment = "".join(f"# {line}".rstrip() + "\n" for line in desc.splitlines() or [""])
+    code = "\n\n\n".join(
+        [
+            comment + ast.unparse(header),
+            ast.unparse(ast.fix_missing_locations(run_def)),
+            _main_source(params),
+        ]
+    )
+    validate_function_source(code, [p["variable"] for p in params])
+    return code
+
+
+def validate_function_source(code: str, variables: list[str] | None = None):
+    """함수 파일이 run(page, ...) 형식으로 실행 가능한지 확인. 문제가 있으면 CodegenError"""
+    try:
+        tree = ast.parse(code)
+        compile(tree, "<function>", "exec")
+    except SyntaxError as e:
+        raise CodegenError("생성된 코드에 문법 오류가 있습니다.", e)
+
+    run = _find_run(tree)
+    if run is None or not run.args.args or run.args.args[0].arg != "page":
+        raise CodegenError("run(page, ...) 함수가 없습니다.")
+
+    arg_names = [a.arg for a in run.args.args[1:]]
+    if variables is not None and arg_names != list(variables):
+        raise CodegenError(f"run 인자가 파라미터와 다릅니다: {arg_names}")
+
+    for name in ("browser", "playwright"):
+        if _uses_name(run.body, name):
+            raise CodegenError(f"run(page) 본문에서 정의되지 않은 '{name}'을 사용합니다.")
+
+    for node in ast.walk(run):
+        if (
+            isinstance(node, ast.Constant)
+            and isinstance(node.value, str)
+            and PLACEHOLDER.search(node.value)
+        ):
+            raise CodegenError(f"치환되지 않은 자리표시자가 남아 있습니다: {node.value}")
+
+
+def describe_script(source: str, fallback: str) -> str:
+    """파일 첫 주석이나 모듈 docstring을 설명으로 사용"""
+    for line in source.splitlines():
+        stripped = line.strip()
+        if not stripped:
+            continue
+        if stripped.startswith("#") and not stripped.startswith("#!"):
+            return stripped.lstrip("#").strip() or fallback
+        break
+    try:
+        docstring = ast.get_docstring(ast.parse(source))
+    except SyntaxError:
+        docstring = None
+    return docstring.strip().splitlines()[0] if docstring else fallback
+
+
+def placeholder_params(source: str) -> list[dict]:
+    """스크립트에 쓰인 ${var} 자리표시자를 문자열 파라미터로"""
+    names = list(dict.fromkeys(PLACEHOLDER.findall(source)))
+    return [{"type": "문자열", "variable": n, "desc": n} for n in names]
+
+
+def params_to_schema(params):
+    """UI 파라미터를 JSON Schema로 변환"""
+    properties = {}
+    required = []
+
+    for p in params:
+        var = p["variable"]
+        desc = p["desc"]
+        typ = p["type"]
+
+        if typ == "문자열":
+            t = "string"
+        else:
+            t = "number"
+
+        properties[var] = {"type": t, "description": desc}
+        required.append(var)
+
+    return {"type": "object", "properties": properties, "required": required}
@@ -0,0 +1,100 @@
+# dispatcher.py
+"""
+한 쿼리에서 나온 여러 함수 호출을 순서대로(sequential) 또는
+동시 실행 수를 제한해 병렬로(parallel) 실행하고, 결과를 하나로 모읍니다.
+"""
+
+import os
+import threading
+import time
+from concurrent.futures import Future
+
+from env import FUNCTIONS_DIR
+from utils.dpg_ui import log
+from utils.runner import run_function
+
+
+def run_call(call: dict) -> dict:
+    """함수 호출 하나를 실행하고 끝날 때까지 기다린다"""
+    name = call["name"]
+    file_path = os.path.join(FUNCTIONS_DIR, f"{name}.py")
+    record = {"name": name, "code": None, "duration": 0.0, "error": None}
+
+    if not os.path.exists(file_path):
+        record["error"] = f"실행 파일을 찾을 수 없습니다: {file_path}"
+        log(f"⚠️ {record['error']}", level="warning")
+        return record
+
+    started = time.perf_counter()
+    try:
+        result = run_function(file_path, call["arguments"]).result()
+        record["code"] = result.get("code")
+        record["error"] = result.get("error")
+    except Exception as e:
+        record["error"] = str(e)
+    record["duration"] = time.perf_counter() - started
+
+    log(
+        f"{name} 실행 종료 (종료 코드: {record['code']}, "
+        f"{record['duration']:.2f}s)"
+        + (f" - {record['error']}" if record["error"] else "")
+    )
+    return record
+
+
+def summarize(records: list) -> str:
+    ok = sum(1 for r in records if r["code"] == 0)
+    total = sum(r["duration"] for r in records)
+    return f"{ok}/{len(records)} 성공, 함수 실행 시간 합계 {total:.2f}s"
+
+
+def dispatch(
+    calls: list,
+    mode: str = "parallel",
+    max_concurrency: int = 2,
+    stop_on_error: bool = True,
+) -> Future:
+    """
+    함수 호출 목록을 실행하고, 모든 호출의 결과 목록을 담는 Future를 반환합니다.
+    sequential 모드에서 stop_on_error면 실패한 뒤의 호출은 건너뜁니다.
+    """
+    future: Future = Future()
+    started = time.perf_counter()
+
+    def finish(records: list):
+        log(f"쿼리 결과: {summarize(records)} (경과 {time.perf_counter() - started:.2f}s)")
+        future.set_result(records)
+
+    def run_sequential():
+        records = []
+        for i, call in enumerate(calls):
+            record = run_call(call)
+            records.append(record)
+            if stop_on_error and record["code"] != 0:
+                skipped = [c["name"] for c in calls[i + 1 :]]
+                if skipped:
+                    log(f"⚠️ 이전 단계 실패로 건너뜀: {', '.join(skipped)}", level="warning")
+                break
+        finish(records)
+
+    def run_parallel():
+        slots = threading.Semaphore(max(1, max_concurrency))
+        records: list = [None] * len(calls)
+
+        def _run(i: int, call: dict):
+            with slots:
+                records[i] = run_call(call)
+
+        threads = [
+            threading.Thread(target=_run, args=(i, call), daemon=True)
+            for i, call in enumerate(calls)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        finish(records)
+
+    target = run_sequential if mode == "sequential" else run_parallel
+    threading.Thread(target=target, daemon=True).start()
+    return future
@@ -1,11 +1,157 @@
+import logging
+import logging.handlers
+import queue
+from collections import deque
+
 import dearpygui.dearpygui as dpg
 
+from config import cfg
+from env import LOG_PATH
+
+LEVELS = {"debug": 10, "info": 20, "warning": 30, "error": 40}
+LEVEL_COLORS = {"warning": (255, 200, 80), "error": (255, 100, 100)}
+
+# 워커 스레드는 이 큐에 넣기만 하고, 실제 위젯 작업은 메인 루프가 프레임마다 처리
+_pending: queue.SimpleQueue = queue.SimpleQueue()
+_lines: deque = deque(maxlen=int(cfg.get("log_ring_size", 5000)))
+_items: deque = deque()
+_file_logger: logging.Logger | None = None
+
+
+def log(msg: str, level: str = "info"):
+    """어느 스레드에서든 호출 가능. 다음 프레임에 로그 패널에 표시된다"""
+    _pending.put(("log", level, str(msg)))
+    if _file_logger is not None:
+        _file_logger.log(LEVELS.get(level, 20), msg)
+
+
+def log_stream(prefix: str = ""):
+    """토큰이 도착할 때마다 이어 쓸 로그 줄을 하나 만든다"""
+    line = ["info", prefix, None]
+    _pending.put(("stream", line))
+    return line
+
+
+def log_append(line, text: str):
+    _pending.put(("append", line, text))
+
+
+def run_on_ui(func, *args):
+    """메인(렌더) 스레드에서 func(*args)를 실행하도록 예약"""
+    _pending.put(("call", func, args))
+
+
+def _visible(level: str) -> bool:
+    threshold = LEVELS.get(cfg.get("log_level", "info"), 20)
+    return LEVELS.get(level, 20) >= threshold
+
+
+def _render(line: list):
+    level, text, _ = line
+    if not _visible(level) or not dpg.does_item_exist("log_group"):
+        return
+    kwargs = {"color": LEVEL_COLORS[level]} if level in LEVEL_COLORS else {}
+    line[2] = dpg.add_text(text, parent="log_group", wrap=0, **kwargs)
+    _items.append(line)
 
-def log(msg: str):
-    dpg.add_text(msg, parent="log_group")
+    max_widgets = int(cfg.get("log_max_widgets", 300))
+    while len(_items) > max_widgets:
+        old = _items.popleft()
+        if old[2] is not None and dpg.does_item_exist(old[2]):
+            dpg.delete_item(old[2])
+        old[2] = None
+
+
+def drain_ui_queue(max_items: int = 1000):
+    """렌더 루프에서 프레임마다 호출. 쌓인 로그/UI 작업을 한 번에 처리"""
+    added = False
+    for _ in range(max_items):
+        try:
+            entry = _pending.get_nowait()
+        except queue.Empty:
+            break
+
+        kind = entry[0]
+        if kind == "log":
+            line = [entry[1], entry[2], None]
+            _lines.append(line)
+            _render(line)
+            added = True
+        elif kind == "stream":
+            _lines.append(entry[1])
+            _render(entry[1])
+            added = True
+        elif kind == "append":
+            line, text = entry[1], entry[2]
+            line[1] += text
+            if line[2] is not None and dpg.does_item_exist(line[2]):
+                dpg.set_value(line[2], line[1])
+        elif kind == "call":
+            try:
+                entry[1](*entry[2])
+            except Exception as e:
+                line = ["error", f"UI 작업 오류: {e}", None]
+                _lines.append(line)
+                _render(line)
+
+    if added and dpg.does_item_exist("log_scroll"):
+        dpg.set_y_scroll("log_scroll", -1.0)
+
+
+def set_log_level(level: str):
+    """레벨 필터를 바꾸고, 링 버퍼에 남아 있는 줄로 패널을 다시 그린다"""
+    cfg["log_level"] = level
+    if not dpg.does_item_exist("log_group"):
+        return
+
+    dpg.delete_item("log_group", children_only=True)
+    for line in _items:
+        line[2] = None
+    _items.clear()
+
+    max_widgets = int(cfg.get("log_max_widgets", 300))
+    visible = [line for line in _lines if _visible(line[0])]
+    for line in visible[-max_widgets:]:
+        _render(line)
+
+
+def set_log_file(enabled: bool):
+    """로그를 회전 파일(logs/app.log)에도 기록할지 설정"""
+    global _file_logger
+
+    cfg["log_file"] = enabled
+    if not enabled:
+        if _file_logger is not None:
+            for handler in list(_file_logger.handlers):
+                _file_logger.removeHandler(handler)
+                handler.close()
+        _file_logger = None
+        return
+
+    if _file_logger is not None:
+        return
+
+    LOG_PATH.parent.mkdir(parents=True, exist_ok=True)
+    handler = logging.handlers.RotatingFileHandler(
+        LOG_PATH,
+        maxBytes=int(cfg.get("log_file_max_bytes", 1_000_000)),
+        backupCount=int(cfg.get("log_file_backups", 3)),
+        encoding="utf-8",
+    )
+    handler.setFormatter(logging.Formatter("%(asctime)s [%(levelname)s] %(message)s"))
+    logger = logging.getLogger("kmu_project")
+    logger.setLevel(logging.DEBUG)
+    logger.propagate = False
+    logger.addHandler(handler)
+    _file_logger = logger
 
 
 def show_alert(title: str, message: str):
+    """어느 스레드에서든 호출 가능. 다음 프레임에 알림 창을 띄운다"""
+    run_on_ui(_show_alert, title, message)
+
+
+def _show_alert(title: str, message: str):
     viewport_w = dpg.get_viewport_width()
     viewport_h = dpg.get_viewport_height()
     win_width, win_height = 340, 140
@@ -0,0 +1,248 @@
+# fs_watcher.py
+"""
+functions/ 폴더와 도구 레지스트리 DB를 감시해 변경 이벤트를 알려 주는 백그라운드 감시자.
+
+리눅스에서는 inotify를 쓰고, 사용할 수 없으면 일정 간격으로 mtime을 비교하는
+폴링 방식으로 동작합니다. 편집기가 한 번 저장할 때 여러 이벤트가 생기므로
+짧은 시간(debounce) 동안 모아서 파일마다 마지막 상태 하나만 전달합니다.
+
+이벤트: "changed"(생성/수정), "deleted"(삭제), "rescan"(이벤트 유실, 전체를 다시 확인)
+"""
+
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+
+from env import FUNCTIONS_DIR, TOOLS_DB_PATH
+
+IN_MODIFY = 0x002
+IN_ATTRIB = 0x004
+IN_CLOSE_WRITE = 0x008
+IN_MOVED_FROM = 0x040
+IN_MOVED_TO = 0x080
+IN_CREATE = 0x100
+IN_DELETE = 0x200
+IN_Q_OVERFLOW = 0x4000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (
+    IN_MODIFY
+    | IN_ATTRIB
+    | IN_CLOSE_WRITE
+    | IN_MOVED_FROM
+    | IN_MOVED_TO
+    | IN_CREATE
+    | IN_DELETE
+)
+EVENT_HEADER = struct.Struct("iIII")
+
+_listeners: list = []
+_watcher = None
+_watcher_lock = threading.Lock()
+
+
+def subscribe(callback):
+    """파일이 바뀔 때 callback(event, path) 호출 (감시 스레드에서 불린다)"""
+    _listeners.append(callback)
+
+
+def _emit(event: str, path: Path):
+    for callback in list(_listeners):
+        try:
+            callback(event, path)
+        except Exception:
+            pass
+
+
+def is_watched(path: Path) -> bool:
+    """감시 대상 파일인지: functions/*.py 와 tools.db (및 -wal/-journal)"""
+    path = Path(path)
+    if path.parent == Path(FUNCTIONS_DIR):
+        return path.suffix == ".py"
+    return path.parent == Path(TOOLS_DB_PATH).parent and path.name.startswith(
+        Path(TOOLS_DB_PATH).name
+    )
+
+
+def _watch_dirs() -> list[Path]:
+    return [Path(FUNCTIONS_DIR), Path(TOOLS_DB_PATH).parent]
+
+
+class _Inotify:
+    name = "inotify"
+
+    def __init__(self):
+        if not sys.platform.startswith("linux"):
+            raise OSError("inotify는 리눅스에서만 사용할 수 있습니다.")
+        libc = ctypes.CDLL(ctypes.util.find_library("c"), use_errno=True)
+        self._libc = libc
+        self.fd = libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 실패")
+        self._dirs: dict[int, Path] = {}
+        for directory in _watch_dirs():
+            directory.mkdir(parents=True, exist_ok=True)
+            wd = libc.inotify_add_watch(self.fd, os.fsencode(directory), WATCH_MASK)
+            if wd < 0:
+                os.close(self.fd)
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch 실패: {directory}")
+            self._dirs[wd] = directory
+
+    def poll(self, timeout: float) -> list[tuple[str, Path]]:
+        ready, _, _ = select.select([self.fd], [], [], timeout)
+        if not ready:
+            return []
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return []
+
+        events = []
+        offset = 0
+        while offset + EVENT_HEADER.size <= len(data):
+            wd, mask, _, length = EVENT_HEADER.unpack_from(data, offset)
+            offset += EVENT_HEADER.size
+            raw_name = data[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                events.append(("rescan", Path(FUNCTIONS_DIR)))
+                continue
+            directory = self._dirs.get(wd)
+            if directory is None or not raw_name:
+                continue
+            path = directory / os.fsdecode(raw_name)
+            if not is_watched(path):
+                continue
+            deleted = mask & (IN_DELETE | IN_MOVED_FROM)
+            events.append(("deleted" if deleted else "changed", path))
+        return events
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _Polling:
+    name = "polling"
+
+    def __init__(self, interval: float):
+        self.interval = interval
+        self._snapshot = self._scan()
+
+    def _scan(self) -> dict[Path, tuple[int, int]]:
+        snapshot = {}
+        for directory in _watch_dirs():
+            try:
+                entries = list(os.scandir(directory))
+            except FileNotFoundError:
+                continue
+            for entry in entries:
+                path = Path(entry.path)
+                if not is_watched(path):
+                    continue
+                try:
+                    st = entry.stat()
+                except FileNotFoundError:
+                    continue
+                snapshot[path] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> list[tuple[str, Path]]:
+        time.sleep(min(timeout, self.interval))
+        current = self._scan()
+        events = [
+            ("changed", path)
+            for path, stamp in current.items()
+            if self._snapshot.get(path) != stamp
+        ]
+        events += [("deleted", path) for path in self._snapshot if path not in current]
+        self._snapshot = current
+        return events
+
+    def close(self):
+        pass
+
+
+class Watcher:
+    def __init__(self, backend, debounce: float):
+        self.backend = backend
+        self.debounce = debounce
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def _loop(self):
+        pending: dict[Path, str] = {}
+        last_event = 0.0
+        while not self._stop.is_set():
+            timeout = self.debounce if pending else 0.5
+            try:
+                events = self.backend.poll(timeout)
+            except Exception:
+                events = [("rescan", Path(FUNCTIONS_DIR))]
+                time.sleep(1)
+
+            for event, path in events:
+                # 같은 파일의 이벤트는 마지막 상태만 남긴다
+                pending[path] = event
+                last_event = time.monotonic()
+
+            if pending and time.monotonic() - last_event >= self.debounce:
+                batch, pending = pending, {}
+                if "rescan" in batch.values():
+                    _emit("rescan", Path(FUNCTIONS_DIR))
+                    continue
+                for path, event in batch.items():
+                    _emit(event, path)
+        self.backend.close()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join(timeout=2)
+
+
+def start_watcher(
+    backend: str = "auto", interval: float = 1.0, debounce: float = 0.2
+) -> str:
+    """감시를 시작하고 사용 중인 방식("inotify"/"polling")을 반환"""
+    global _watcher
+
+    with _watcher_lock:
+        if _watcher is not None:
+            return _watcher.backend.name
+
+        impl = None
+        if backend in ("auto", "inotify"):
+            try:
+                impl = _Inotify()
+            except (OSError, AttributeError, TypeError):
+                impl = None
+        if impl is None:
+            impl = _Polling(interval)
+
+        _watcher = Watcher(impl, debounce)
+        _watcher.start()
+        return impl.name
+
+
+def stop_watcher():
+    global _watcher
+
+    with _watcher_lock:
+        if _watcher is not None:
+            _watcher.stop()
+            _watcher = None
+
+
+def is_watching() -> bool:
+    """감시 중이면 True. 이때는 캐시를 매번 디스크와 비교하지 않아도 된다"""
+    return _watcher is not None
@@ -0,0 +1,120 @@
+# function_loader.py
+"""
+functions/ 의 함수 파일을 import 없이 직접 컴파일/실행해 모듈로 돌려주는 로더.
+
+컴파일된 모듈은 (경로, mtime, 크기) 기준으로 캐시하므로,
+파일이 수정되면 다음 호출에서 자동으로 다시 로드됩니다.
+캐시는 프로세스마다 따로 있습니다. 앱 프로세스는 감시자 이벤트로 자기 캐시를 비우고,
+함수를 실제로 실행하는 워커 프로세스에는 runner가 같은 이벤트를 워커 풀 채널로
+{"type": "invalidate"} 메시지로 전달합니다.
+"""
+
+import inspect
+import os
+import threading
+import types
+from pathlib import Path
+
+from utils import fs_watcher
+
+_cache: dict[str, tuple[tuple[int, int], types.CodeType]] = {}
+_modules: dict[str, tuple[tuple[int, int], types.ModuleType]] = {}
+_lock = threading.Lock()
+
+
+def _stamp(path: str) -> tuple[int, int]:
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def compile_function(file_path: str) -> types.CodeType:
+    """파일을 컴파일한 코드 객체 (수정되지 않았다면 캐시 사용)"""
+    path = os.path.abspath(file_path)
+    stamp = _stamp(path)
+
+    with _lock:
+        cached = _cache.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    with open(path, "rb") as f:
+        code = compile(f.read(), path, "exec")
+
+    with _lock:
+        _cache[path] = (stamp, code)
+    return code
+
+
+def load_function(file_path: str) -> types.ModuleType:
+    """함수 파일을 모듈로 로드. __main__ 블록은 실행되지 않는다"""
+    path = os.path.abspath(file_path)
+    stamp = _stamp(path)
+
+    with _lock:
+        cached = _modules.get(path)
+        if cached is not None and cached[0] == stamp:
+            return cached[1]
+
+    module = types.ModuleType(f"kmu_function_{Path(path).stem}")
+    module.__file__ = path
+    exec(compile_function(path), module.__dict__)
+
+    with _lock:
+        _modules[path] = (stamp, module)
+    return module
+
+
+def invalidate(file_path: str | None = None):
+    """특정 파일(없으면 전체)의 캐시를 비운다"""
+    with _lock:
+        if file_path is None:
+            _cache.clear()
+            _modules.clear()
+            return
+        path = os.path.abspath(file_path)
+        _cache.pop(path, None)
+        _modules.pop(path, None)
+
+
+def _on_file_change(event: str, path: Path):
+    # 감시자가 알려 준 파일은 다음 호출을 기다리지 않고 바로 캐시에서 뺀다
+    if event == "rescan":
+        invalidate()
+    elif path.suffix == ".py":
+        invalidate(str(path))
+
+
+fs_watcher.subscribe(_on_file_change)
+
+
+def is_page_function(module: types.ModuleType) -> bool:
+    """run(page, **params) 형식이면 True, 예전 run(playwright, ...) 형식이면 False"""
+    params = list(inspect.signature(module.run).parameters)
+    return bool(params) and params[0] == "page"
+
+
+def is_page_file(file_path: str) -> bool:
+    """
+    파일을 실행하지 않고(컴파일 캐시만 써서) run(page, ...) 형식인지 확인.
+    컴파일에 실패하거나 run을 찾지 못하면 True (실행하는 쪽에서 오류를 보고)
+    """
+    try:
+        code = compile_function(file_path)
+    except Exception:
+        return True
+    for const in code.co_consts:
+        if isinstance(const, types.CodeType) and const.co_name == "run":
+            return const.co_argcount > 0 and const.co_varnames[0] == "page"
+    return True
+
+
+def coerce_args(func, args: dict) -> dict:
+    """타입 힌트(int/float)에 맞게 문자열 인자를 변환"""
+    params = inspect.signature(func).parameters
+    result = {}
+    for name, value in args.items():
+        annotation = params[name].annotation if name in params else None
+        if annotation in (int, float) and isinstance(value, str):
+            value = annotation(value)
+        result[name] = value
+    return result
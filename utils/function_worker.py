@@ -0,0 +1,315 @@
+# function_worker.py
+"""
+함수 실행 워커 프로세스.
+
+Playwright를 미리 import하고 드라이버를 띄워 둔 채 대기하다가,
+stdin으로 들어오는 작업(JSON 한 줄)을 받아 functions/<name>.py 의 run()을 실행합니다.
+함수 모듈은 function_loader 캐시를 통해 프로세스 안에서 직접 호출합니다.
+응답은 원래 stdout을 복제한 전용 채널로 JSON 한 줄씩 보냅니다.
+실행이 끝난 브라우저는 작업의 policy(close/idle/reuse)에 따라 닫거나 남겨 두고,
+남겨 둔 세션의 열림/닫힘은 {"type": "session"} 메시지로 앱에 알립니다.
+작업에 profile이 있으면 그 사이트 프로필(browser_profiles)로 브라우저를 엽니다.
+"""
+
+import io
+import json
+import os
+import queue
+import sys
+import threading
+import time
+import traceback
+from contextlib import redirect_stderr, redirect_stdout
+
+from playwright.sync_api import sync_playwright
+
+from utils.browser_profiles import open_page
+from utils.browser_shim import SharedPlaywright
+from utils.function_loader import (
+    coerce_args,
+    invalidate,
+    is_page_function,
+    load_function,
+)
+from utils.rss_sampler import PeakSampler
+
+_shared_browsers = {}
+
+
+def open_channel():
+    """프로토콜 전용 채널을 만들고, 함수의 print 출력은 stderr로 돌린다"""
+    channel = os.fdopen(
+        os.dup(sys.stdout.fileno()), "w", encoding="utf-8", buffering=1
+    )
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    return channel
+
+
+def send(channel, message: dict):
+    channel.write(json.dumps(message, ensure_ascii=False) + "\n")
+    channel.flush()
+
+
+class LineForwarder(io.TextIOBase):
+    """함수의 print 출력을 줄 단위로 모아 채널로 보낸다"""
+
+    def __init__(self, channel, job_id: str, stream: str):
+        self._channel = channel
+        self._job_id = job_id
+        self._stream = stream
+        self._buffer = ""
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, text: str) -> int:
+        self._buffer += text
+        while "\n" in self._buffer:
+            line, self._buffer = self._buffer.split("\n", 1)
+            self._send(line)
+        return len(text)
+
+    def flush(self):
+        if self._buffer:
+            self._send(self._buffer)
+            self._buffer = ""
+
+    def _send(self, line: str):
+        send(
+            self._channel,
+            {"type": "output", "id": self._job_id, "stream": self._stream, "line": line},
+        )
+
+
+def get_shared_browser(playwright, endpoint: str):
+    """공유 Chromium에 대한 CDP 연결을 재사용 (끊겼으면 다시 연결)"""
+    browser = _shared_browsers.get(endpoint)
+    if browser is None or not browser.is_connected():
+        browser = playwright.chromium.connect_over_cdp(endpoint)
+        _shared_browsers[endpoint] = browser
+    return browser
+
+
+class LiveSessions:
+    """
+    실행이 끝난 뒤 정책(idle/reuse)에 따라 남겨 둔 브라우저.
+    Playwright 객체는 이 프로세스의 메인 스레드에서만 다룬다.
+    """
+
+    def __init__(self, channel):
+        self._channel = channel
+        self._sessions: dict[str, dict] = {}
+
+    def _send(self, event: str, key: str, session: dict):
+        try:
+            url = session["page"].url
+        except Exception:
+            url = ""
+        send(
+            self._channel,
+            {
+                "type": "session",
+                "event": event,
+                "key": key,
+                "name": session["name"],
+                "policy": session["policy"],
+                "profile": session["profile"],
+                "url": url,
+            },
+        )
+
+    def take(self, name: str) -> tuple[str, dict] | None:
+        """name 함수의 재사용 세션을 꺼낸다 (창이 닫혔으면 정리하고 None)"""
+        for key, session in list(self._sessions.items()):
+            if session["name"] != name or session["policy"] != "reuse":
+                continue
+            if self._closed(session):
+                self.close(key)
+                continue
+            return key, session
+        return None
+
+    def keep(self, key: str, session: dict, idle_timeout: float, reused: bool):
+        session["expires"] = time.monotonic() + idle_timeout
+        self._sessions[key] = session
+        self._send("update" if reused else "open", key, session)
+
+    def discard(self, key: str):
+        """재사용하다 실패한 세션을 목록에서만 뺀다 (닫기는 호출한 쪽에서)"""
+        if self._sessions.pop(key, None) is not None:
+            send(self._channel, {"type": "session", "event": "close", "key": key})
+
+    def close(self, key: str):
+        session = self._sessions.pop(key, None)
+        if session is None:
+            return
+        # 열어 둔 동안 로그인했을 수 있으므로 닫기 전에 프로필을 한 번 더 저장
+        if session["save"] is not None and not self._closed(session):
+            try:
+                session["save"]()
+            except Exception:
+                traceback.print_exc()
+        try:
+            session["close"]()
+        except Exception:
+            pass
+        send(self._channel, {"type": "session", "event": "close", "key": key})
+
+    @staticmethod
+    def _closed(session: dict) -> bool:
+        # 유휴 중엔 이벤트가 처리되지 않으므로 호출을 한 번 해서 닫힘 여부를 확인
+        try:
+            session["page"].title()
+        except Exception:
+            return True
+        return session["page"].is_closed()
+
+    def close_profile(self, profile: str):
+        """이 워커에 열어 둔 같은 프로필 세션을 닫아 프로필 잠금을 넘긴다"""
+        for key, session in list(self._sessions.items()):
+            if session["profile"] == profile:
+                self.close(key)
+
+    def reap(self):
+        """유휴 시간이 지났거나 사용자가 창을 닫은 세션을 정리"""
+        now = time.monotonic()
+        for key, session in list(self._sessions.items()):
+            if now >= session["expires"] or self._closed(session):
+                self.close(key)
+
+    def close_all(self):
+        for key in list(self._sessions):
+            self.close(key)
+
+
+def call_page_function(module, playwright, args: dict, job: dict, sessions: LiveSessions):
+    """run(page, ...) 실행 후 정책에 따라 브라우저를 닫거나 남겨 둔다"""
+    name = os.path.splitext(os.path.basename(job["path"]))[0]
+    policy = job.get("policy", "close")
+    taken = sessions.take(name) if policy == "reuse" else None
+
+    if taken is not None:
+        key, session = taken
+    else:
+        profile = job.get("profile")
+        if profile is not None:
+            # 같은 프로세스가 잠금을 쥔 채 기다리면 풀리지 않으므로 먼저 닫는다
+            sessions.close_profile(profile["name"])
+        page, close, save = open_page(playwright, profile)
+        key = job["id"]
+        session = {
+            "name": name,
+            "policy": policy,
+            "profile": profile["name"] if profile else None,
+            "page": page,
+            "close": close,
+            "save": save,
+        }
+
+    try:
+        session["page"].bring_to_front()
+        module.run(session["page"], **coerce_args(module.run, args))
+    except BaseException:
+        sessions.discard(key)
+        session["close"]()
+        raise
+
+    # 성공한 실행의 로그인/쿠키를 프로필에 반영
+    if session["save"] is not None:
+        try:
+            session["save"]()
+        except Exception:
+            traceback.print_exc()
+            print("프로필 저장 실패", file=sys.stderr)
+
+    if policy == "close":
+        session["close"]()
+        return
+    sessions.keep(key, session, float(job.get("idle_timeout", 300)), taken is not None)
+
+
+def run_job(playwright, job: dict, sessions: LiveSessions):
+    module = load_function(job["path"])
+    args = job.get("args", {})
+
+    endpoint = job.get("browser_endpoint")
+    shared = None
+    if endpoint:
+        try:
+            shared = SharedPlaywright(playwright, get_shared_browser(playwright, endpoint))
+        except Exception:
+            traceback.print_exc()
+            print("공유 브라우저 연결 실패, 새 브라우저로 실행합니다.", file=sys.stderr)
+
+    if is_page_function(module):
+        # SharedBrowser.close()는 이 실행에서 만든 컨텍스트만 닫으므로 세션별로 닫을 수 있다
+        call_page_function(module, shared or playwright, args, job, sessions)
+        return
+
+    # 예전 형식: run(playwright, ...) 가 브라우저를 직접 띄운다
+    try:
+        module.run(shared or playwright, **args)
+    finally:
+        if shared is not None:
+            shared.close()
+
+
+def read_jobs(jobs: queue.Queue):
+    for line in sys.stdin:
+        if line.strip():
+            jobs.put(json.loads(line))
+    jobs.put(None)
+
+
+def main():
+    channel = open_channel()
+    sys.stdin.reconfigure(encoding="utf-8")
+
+    playwright = sync_playwright().start()
+    sessions = LiveSessions(channel)
+    send(channel, {"type": "ready", "pid": os.getpid()})
+
+    # stdin은 별도 스레드에서 읽고, 메인 스레드는 기다리는 동안 세션을 정리한다
+    jobs: queue.Queue = queue.Queue()
+    threading.Thread(target=read_jobs, args=(jobs,), daemon=True).start()
+
+    try:
+        while True:
+            try:
+                job = jobs.get(timeout=1)
+            except queue.Empty:
+                sessions.reap()
+                continue
+            if job is None:
+                break
+            if job.get("type") == "close_session":
+                sessions.close(job["key"])
+                continue
+            if job.get("type") == "invalidate":
+                # 앱의 감시자가 알려 준 파일 변경: 다음 실행에서 다시 로드
+                invalidate(job.get("path"))
+                continue
+
+            stdout = LineForwarder(channel, job["id"], "stdout")
+            stderr = LineForwarder(channel, job["id"], "stderr")
+            result = {"type": "done", "id": job["id"], "code": 0}
+            # 워커 수명 전체가 아니라 이 실행 동안의 최대값.
+            # 브라우저는 공유 브라우저(앱의 자식)이거나 이전 실행이 남긴 세션과 섞여 있어
+            # 이 실행 몫만 가려낼 수 없으므로 워커와 드라이버(직계 자식)만 잰다
+            sampler = PeakSampler(os.getpid(), depth=1).start()
+            with redirect_stdout(stdout), redirect_stderr(stderr):
+                try:
+                    run_job(playwright, job, sessions)
+                except (Exception, SystemExit) as e:
+                    traceback.print_exc()
+                    result.update(code=1, error=str(e))
+            stdout.flush()
+            stderr.flush()
+            send(channel, {**result, "peak_rss_kb": sampler.stop()})
+    finally:
+        sessions.close_all()
+        playwright.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,193 @@
+# intent_cache.py
+"""
+자주 쓰는 명령을 LLM 없이 바로 실행하기 위한 의도 캐시.
+
+정규화한 프롬프트와 도구 목록 버전을 키로 LLM이 돌려준 함수 호출을 저장합니다.
+LRU 개수 제한과 TTL이 있으며, 참조한 함수 파일이 수정/삭제되면 해당 항목은 무효가 됩니다.
+"""
+
+import json
+import os
+import re
+import sqlite3
+import time
+import unicodedata
+from contextlib import contextmanager
+
+from config import cfg
+from env import FUNCTIONS_DIR, INTENT_CACHE_PATH
+from utils import registry
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS intents (
+    prompt TEXT NOT NULL,
+    tools_version INTEGER NOT NULL,
+    tool_calls TEXT NOT NULL,
+    functions TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (prompt, tools_version)
+);
+CREATE TABLE IF NOT EXISTS intent_functions (
+    prompt TEXT NOT NULL,
+    tools_version INTEGER NOT NULL,
+    name TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS intent_functions_name ON intent_functions (name);
+CREATE INDEX IF NOT EXISTS intents_last_used ON intents (last_used);
+"""
+
+# 명령 끝에 붙는 요청 표현은 의미가 같으므로 떼어 낸다
+REQUEST_SUFFIXES = ("해주세요", "해 주세요", "해줘", "해 줘", "해봐", "해 봐", "부탁해", "좀")
+
+_initialized = False
+
+
+def strip_request_suffix(text: str) -> str:
+    stripped = True
+    while stripped:
+        stripped = False
+        for suffix in REQUEST_SUFFIXES:
+            if text.endswith(suffix) and len(text) > len(suffix):
+                text = text[: -len(suffix)].rstrip()
+                stripped = True
+    return text
+
+
+def normalize_prompt(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"[^\w\s]", " ", text)
+    return strip_request_suffix(" ".join(text.split()))
+
+
+def _connect() -> sqlite3.Connection:
+    global _initialized
+
+    conn = sqlite3.connect(INTENT_CACHE_PATH, timeout=10)
+    if not _initialized:
+        conn.executescript(SCHEMA)
+        _initialized = True
+    return conn
+
+
+@contextmanager
+def _session():
+    conn = _connect()
+    try:
+        with conn:
+            yield conn
+    finally:
+        conn.close()
+
+
+def _delete(conn, prompt: str, tools_version: int):
+    conn.execute(
+        "DELETE FROM intents WHERE prompt = ? AND tools_version = ?",
+        (prompt, tools_version),
+    )
+    conn.execute(
+        "DELETE FROM intent_functions WHERE prompt = ? AND tools_version = ?",
+        (prompt, tools_version),
+    )
+
+
+def _function_stamp(name: str) -> int | None:
+    try:
+        return os.stat(os.path.join(FUNCTIONS_DIR, f"{name}.py")).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+
+def get(query_text: str) -> list | None:
+    """캐시된 함수 호출 목록 [{"name", "arguments"}] 또는 None"""
+    if not cfg.get("intent_cache", True):
+        return None
+
+    prompt = normalize_prompt(query_text)
+    version = registry.tools_version()
+    now = time.time()
+
+    with _session() as conn:
+        row = conn.execute(
+            "SELECT tool_calls, functions, created_at FROM intents "
+            "WHERE prompt = ? AND tools_version = ?",
+            (prompt, version),
+        ).fetchone()
+        if row is None:
+            return None
+
+        tool_calls, functions, created_at = row
+        expired = now - created_at > float(cfg.get("intent_cache_ttl", 86400))
+        changed = any(
+            _function_stamp(name) != stamp
+            for name, stamp in json.loads(functions).items()
+        )
+        if expired or changed:
+            _delete(conn, prompt, version)
+            return None
+
+        conn.execute(
+            "UPDATE intents SET last_used = ? WHERE prompt = ? AND tools_version = ?",
+            (now, prompt, version),
+        )
+    return json.loads(tool_calls)
+
+
+def put(query_text: str, tool_calls: list):
+    """LLM이 돌려준 함수 호출을 저장. 없는 함수를 가리키면 저장하지 않는다"""
+    if not cfg.get("intent_cache", True) or not tool_calls:
+        return
+
+    functions = {call["name"]: _function_stamp(call["name"]) for call in tool_calls}
+    if None in functions.values():
+        return
+
+    prompt = normalize_prompt(query_text)
+    version = registry.tools_version()
+    now = time.time()
+
+    with _session() as conn:
+        _delete(conn, prompt, version)
+        conn.execute(
+            "INSERT INTO intents VALUES (?, ?, ?, ?, ?, ?)",
+            (
+                prompt,
+                version,
+                json.dumps(tool_calls, ensure_ascii=False),
+                json.dumps(functions),
+                now,
+                now,
+            ),
+        )
+        conn.executemany(
+            "INSERT INTO intent_functions VALUES (?, ?, ?)",
+            [(prompt, version, name) for name in functions],
+        )
+
+        # 예전 도구 버전의 항목과 LRU 한도를 넘는 항목 정리
+        conn.execute("DELETE FROM intents WHERE tools_version != ?", (version,))
+        conn.execute("DELETE FROM intent_functions WHERE tools_version != ?", (version,))
+        conn.execute(
+            "DELETE FROM intents WHERE rowid IN ("
+            "SELECT rowid FROM intents ORDER BY last_used DESC LIMIT -1 OFFSET ?)",
+            (int(cfg.get("intent_cache_size", 500)),),
+        )
+        conn.execute(
+            "DELETE FROM intent_functions WHERE NOT EXISTS ("
+            "SELECT 1 FROM intents i WHERE i.prompt = intent_functions.prompt "
+            "AND i.tools_version = intent_functions.tools_version)"
+        )
+
+
+def invalidate_function(name: str):
+    """함수가 수정/삭제되면 그 함수를 부르는 캐시 항목을 모두 버린다"""
+    with _session() as conn:
+        rows = conn.execute(
+            "SELECT prompt, tools_version FROM intent_functions WHERE name = ?",
+            (name,),
+        ).fetchall()
+        for prompt, version in rows:
+            _delete(conn, prompt, version)
+
+
+registry.subscribe(lambda event, name: name and invalidate_function(name))
@@ -0,0 +1,181 @@
+# llm.py
+"""
+LLM 호출 전용 asyncio 루프.
+
+UI 콜백과 STT 스레드는 코루틴을 넘기기만 하고 바로 돌아가며,
+실제 요청은 별도 스레드의 이벤트 루프에서 하나의 ollama.AsyncClient로 처리됩니다.
+"""
+
+import asyncio
+import json
+import math
+import threading
+import time
+from concurrent.futures import Future
+from typing import Callable
+
+import ollama
+
+from config import cfg
+from utils.dpg_ui import log
+
+_loop: asyncio.AbstractEventLoop | None = None
+_loop_lock = threading.Lock()
+_client: ollama.AsyncClient | None = None
+_current: Future | None = None
+_inflight: set[Future] = set()  # 취소 버튼 대상: preempt 여부와 관계없이 진행 중인 모든 쿼리
+_num_ctx: dict[str, int] = {}
+_shrink: dict[str, tuple[int, int]] = {}  # 모델 -> (연속으로 작았던 요청 수, 그중 최대 크기)
+
+
+def get_loop() -> asyncio.AbstractEventLoop:
+    global _loop
+
+    with _loop_lock:
+        if _loop is None:
+            _loop = asyncio.new_event_loop()
+            threading.Thread(target=_loop.run_forever, daemon=True).start()
+        return _loop
+
+
+def get_client() -> ollama.AsyncClient:
+    """루프 안에서만 호출. 연결을 재사용하도록 클라이언트는 하나만 만든다"""
+    global _client
+
+    if _client is None:
+        _client = ollama.AsyncClient(host=cfg.get("ollama_host"))
+    return _client
+
+
+def keep_alive():
+    """모델을 메모리에 유지할 시간 ("30m", 초 단위 숫자, -1이면 무기한)"""
+    return cfg.get("ollama_keep_alive", "30m")
+
+
+def needed_num_ctx(messages: list, tools: list) -> int:
+    """프롬프트+도구 길이에 맞는 2의 거듭제곱 컨텍스트 크기 (num_ctx_min~num_ctx_max)"""
+    chars = len(json.dumps([messages, tools], ensure_ascii=False))
+    needed = chars / float(cfg.get("chars_per_token", 2.5)) + int(
+        cfg.get("num_ctx_reserve", 512)
+    )
+
+    low = int(cfg.get("num_ctx_min", 2048))
+    high = int(cfg.get("num_ctx_max", 32768))
+    return min(high, max(low, 2 ** math.ceil(math.log2(max(needed, 1)))))
+
+
+def estimate_num_ctx(model: str, messages: list, tools: list) -> int:
+    """
+    이번 요청에 쓸 컨텍스트 크기를 정합니다.
+    Ollama는 num_ctx가 바뀌면 모델을 다시 올리므로 모델마다 쓰던 크기를 유지하되,
+    더 커야 하면 바로 올리고, num_ctx_shrink_after번 연속으로 더 작은 크기로 충분했으면
+    그중 가장 큰 크기로 줄입니다 (히스테리시스). 한 번 큰 요청 뒤에도 계속 크게 돌지 않는다.
+    """
+    size = needed_num_ctx(messages, tools)
+    current = _num_ctx.get(model)
+
+    if current is None or size >= current:
+        _shrink.pop(model, None)
+        _num_ctx[model] = size
+        return size
+
+    count, largest = _shrink.get(model, (0, 0))
+    count, largest = count + 1, max(largest, size)
+    if count >= int(cfg.get("num_ctx_shrink_after", 5)):
+        _shrink.pop(model, None)
+        _num_ctx[model] = largest
+        return largest
+    _shrink[model] = (count, largest)
+    return current
+
+
+def load_seconds(response) -> float:
+    """응답의 load_duration(ns)을 초로"""
+    return (getattr(response, "load_duration", None) or 0) / 1e9
+
+
+def residency_label(response) -> str:
+    seconds = load_seconds(response)
+    if seconds >= float(cfg.get("cold_load_threshold", 0.5)):
+        return f"콜드 (모델 로드 {seconds:.2f}s)"
+    return "웜 (모델 상주)"
+
+
+async def warm_model(model: str, request: Callable[[], tuple[list, list]] | None = None):
+    """
+    모델을 미리 메모리에 올리고 keep_alive로 고정.
+    request는 첫 쿼리와 같은 (messages, tools)를 돌려주는 함수로, 그 크기의 num_ctx로 올려서
+    첫 쿼리에서 모델을 다시 올리지 않게 한다 (없으면 쓰던 크기 또는 num_ctx_min)
+    """
+    num_ctx = _num_ctx.get(model, int(cfg.get("num_ctx_min", 2048)))
+    if request is not None:
+        try:
+            # 도구 목록은 SQLite를 읽으므로 루프 밖에서
+            messages, tools = await asyncio.to_thread(request)
+            num_ctx = estimate_num_ctx(model, messages, tools)
+        except Exception as e:
+            log(f"예열 크기 추정 실패 ({model}): {e}", level="warning")
+
+    try:
+        loaded = await get_client().ps()
+        if any(m.model == model for m in loaded.models):
+            log(f"모델 상주 중: {model}")
+    except Exception:
+        pass
+
+    started = time.perf_counter()
+    try:
+        response = await get_client().generate(
+            model=model,
+            prompt="",
+            keep_alive=keep_alive(),
+            options={"num_ctx": num_ctx},
+        )
+    except Exception as e:
+        log(f"모델 예열 실패 ({model}): {e}", level="error")
+        return
+
+    log(
+        f"모델 예열 완료: {model} (num_ctx={num_ctx}) - {residency_label(response)}, "
+        f"{time.perf_counter() - started:.2f}s"
+    )
+
+
+def warm_in_background(
+    model: str, request: Callable[[], tuple[list, list]] | None = None
+) -> Future:
+    # 예열은 쿼리가 아니므로 취소 대상으로 추적하지 않는다
+    return submit(warm_model(model, request), preempt=False, track=False)
+
+
+def submit(coro, preempt: bool = True, track: bool = True) -> Future:
+    """
+    코루틴을 LLM 루프에서 실행합니다.
+    preempt=True면 진행 중인 이전 요청을 취소하고 새 요청으로 대체합니다.
+    track=True면 cancel_current()로 취소할 수 있도록 진행 중 목록에 넣습니다.
+    """
+    global _current
+
+    if preempt and _current is not None and not _current.done():
+        _current.cancel()
+
+    future = asyncio.run_coroutine_threadsafe(coro, get_loop())
+    if preempt:
+        _current = future
+    if track:
+        _inflight.add(future)
+        future.add_done_callback(_inflight.discard)
+    return future
+
+
+def busy() -> bool:
+    return any(not f.done() for f in list(_inflight))
+
+
+def cancel_current() -> bool:
+    """진행 중인 요청(핸즈프리로 쌓인 명령 포함)을 모두 취소. 취소한 요청이 있었으면 True"""
+    cancelled = False
+    for future in list(_inflight):
+        if not future.done() and future.cancel():
+            cancelled = True
+    return cancelled
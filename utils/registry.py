@@ -0,0 +1,292 @@
+# registry.py
+"""
+함수(도구) 레지스트리.
+
+SQLite에 도구 정의를 한 행씩 저장하고, 읽기는 DB 파일의 mtime으로 검증하는
+메모리 캐시를 거칩니다. 파일 감시자가 켜져 있으면 변경 알림으로 캐시를 버리므로
+읽을 때마다 mtime을 확인하지 않습니다. 쓰기는 BEGIN IMMEDIATE 트랜잭션으로 처리되어
+여러 프로세스가 동시에 써도 원자적으로 반영됩니다.
+"""
+
+import ast
+import json
+import os
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from pathlib import Path
+
+from env import FUNCTIONS_DIR, TOOLS_DB_PATH, TOOLS_PATH
+from errors import RegistryError
+from utils import fs_watcher
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS tools (
+    name TEXT PRIMARY KEY,
+    description TEXT NOT NULL,
+    parameters TEXT NOT NULL,
+    file_path TEXT,
+    updated_at REAL NOT NULL
+);
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT NOT NULL
+);
+INSERT OR IGNORE INTO meta (key, value) VALUES ('version', '0');
+"""
+
+_lock = threading.Lock()
+_cache: dict = {"stamp": None, "tools": [], "version": 0}
+_listeners: list = []
+
+
+def _connect() -> sqlite3.Connection:
+    conn = sqlite3.connect(TOOLS_DB_PATH, timeout=10, isolation_level=None)
+    conn.execute("PRAGMA busy_timeout = 10000")
+    return conn
+
+
+def _stamp() -> tuple[int, int] | None:
+    try:
+        st = os.stat(TOOLS_DB_PATH)
+    except FileNotFoundError:
+        return None
+    return st.st_mtime_ns, st.st_size
+
+
+def _invalidate():
+    with _lock:
+        _cache["stamp"] = None
+
+
+def subscribe(callback):
+    """
+    도구가 추가/갱신("upsert")되거나 삭제("delete")될 때 callback(event, name) 호출.
+    함수 파일만 수정되면 "modified", 다른 프로세스가 DB를 바꾸면 "reload"(name은 "")
+    """
+    _listeners.append(callback)
+
+
+def _notify(event: str, name: str):
+    for callback in list(_listeners):
+        try:
+            callback(event, name)
+        except Exception:
+            pass
+
+
+@contextmanager
+def _transaction():
+    """쓰기 잠금을 잡고 트랜잭션을 연다. 커밋 시 버전을 1 올린다"""
+    conn = _connect()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        yield conn
+        conn.execute(
+            "UPDATE meta SET value = CAST(value AS INTEGER) + 1 WHERE key = 'version'"
+        )
+        conn.execute("COMMIT")
+    except sqlite3.Error as e:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise RegistryError("도구 레지스트리를 저장하는 중 오류가 발생했습니다.", e)
+    except BaseException:
+        if conn.in_transaction:
+            conn.execute("ROLLBACK")
+        raise
+    finally:
+        conn.close()
+        _invalidate()
+
+
+def to_ollama_tool(name: str, description: str, parameters: dict) -> dict:
+    return {
+        "type": "function",
+        "function": {
+            "name": name,
+            "description": description,
+            "parameters": parameters,
+        },
+    }
+
+
+def _read_legacy_tools() -> list:
+    """예전 tools.py 의 TOOLS = [...] 를 exec 없이 읽는다"""
+    if not os.path.exists(TOOLS_PATH):
+        return []
+
+    with open(TOOLS_PATH, "r", encoding="utf-8") as f:
+        tree = ast.parse(f.read())
+
+    for node in tree.body:
+        if (
+            isinstance(node, ast.Assign)
+            and any(isinstance(t, ast.Name) and t.id == "TOOLS" for t in node.targets)
+        ):
+            return ast.literal_eval(node.value)
+    return []
+
+
+def init_registry():
+    """스키마를 만들고, 처음 한 번은 기존 tools.py 내용을 옮겨 온다"""
+    conn = _connect()
+    try:
+        conn.executescript(SCHEMA)
+        migrated = conn.execute(
+            "SELECT value FROM meta WHERE key = 'migrated'"
+        ).fetchone()
+    finally:
+        conn.close()
+
+    if migrated:
+        return
+
+    try:
+        legacy_tools = _read_legacy_tools()
+    except Exception:
+        legacy_tools = []
+
+    with _transaction() as conn:
+        for tool in legacy_tools:
+            func = tool["function"]
+            _upsert(conn, func["name"], func["description"], func["parameters"])
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('migrated', '1')")
+
+
+def _load() -> dict:
+    """캐시가 유효하면 그대로, DB가 바뀌었으면 다시 읽어 캐시를 갱신"""
+    if fs_watcher.is_watching():
+        with _lock:
+            if _cache["stamp"] is not None:
+                return _cache
+
+    stamp = _stamp()
+    with _lock:
+        if stamp is not None and _cache["stamp"] == stamp:
+            return _cache
+
+    if stamp is None:
+        return {"stamp": None, "tools": [], "version": 0}
+
+    conn = _connect()
+    try:
+        rows = conn.execute(
+            "SELECT name, description, parameters FROM tools ORDER BY rowid"
+        ).fetchall()
+        version = conn.execute(
+            "SELECT value FROM meta WHERE key = 'version'"
+        ).fetchone()
+    finally:
+        conn.close()
+
+    tools = [
+        to_ollama_tool(name, description, json.loads(parameters))
+        for name, description, parameters in rows
+    ]
+    with _lock:
+        _cache.update(
+            stamp=stamp,
+            tools=tools,
+            version=int(version[0]) if version else 0,
+        )
+        return _cache
+
+
+def list_tools() -> list:
+    """Ollama tools 형식의 도구 목록"""
+    return list(_load()["tools"])
+
+
+def get_tool(name: str) -> dict | None:
+    for tool in _load()["tools"]:
+        if tool["function"]["name"] == name:
+            return tool
+    return None
+
+
+def tools_version() -> int:
+    """도구 목록이 바뀔 때마다 증가하는 버전 번호"""
+    return _load()["version"]
+
+
+def _upsert(conn, name: str, description: str, parameters: dict, file_path=None):
+    conn.execute(
+        """
+        INSERT INTO tools (name, description, parameters, file_path, updated_at)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT(name) DO UPDATE SET
+            description = excluded.description,
+            parameters = excluded.parameters,
+            file_path = excluded.file_path,
+            updated_at = excluded.updated_at
+        """,
+        (
+            name,
+            description,
+            json.dumps(parameters, ensure_ascii=False),
+            str(file_path) if file_path else None,
+            time.time(),
+        ),
+    )
+
+
+def upsert_tool(name: str, description: str, parameters: dict, file_path=None):
+    """도구를 추가하거나 같은 이름의 도구를 갱신"""
+    with _transaction() as conn:
+        _upsert(conn, name, description, parameters, file_path)
+    _notify("upsert", name)
+
+
+def upsert_tools(tools: list[tuple[str, str, dict, str | None]]):
+    """(이름, 설명, 스키마, 파일 경로) 여러 개를 한 트랜잭션으로 추가/갱신 (일괄 가져오기)"""
+    if not tools:
+        return
+    with _transaction() as conn:
+        for name, description, parameters, file_path in tools:
+            _upsert(conn, name, description, parameters, file_path)
+    # 버전은 한 번만 오른다. 색인은 통째로 다시 만들고, 이름별 캐시는 각각 비운다
+    _notify("reload", "")
+    for name, *_ in tools:
+        _notify("upsert", name)
+
+
+def delete_tool(name: str) -> bool:
+    with _transaction() as conn:
+        cursor = conn.execute("DELETE FROM tools WHERE name = ?", (name,))
+    deleted = cursor.rowcount > 0
+    if deleted:
+        _notify("delete", name)
+    return deleted
+
+
+def _on_file_change(event: str, path: Path):
+    if event == "rescan" or path.parent != Path(FUNCTIONS_DIR):
+        # DB가 바뀌었거나 이벤트가 유실됨: 캐시를 버리고 버전이 달라졌으면 알린다
+        before = _cache["version"]
+        _invalidate()
+        if tools_version() != before:
+            _notify("reload", "")
+        return
+
+    name = path.stem
+    if event == "deleted":
+        # 파일을 직접 지운 경우에도 레지스트리에서 빠지도록
+        if get_tool(name) is not None:
+            delete_tool(name)
+    elif get_tool(name) is not None:
+        _notify("modified", name)
+
+
+fs_watcher.subscribe(_on_file_change)
+
+
+def export_ollama_tools(path=None) -> list:
+    """도구 목록을 Ollama tools 형식으로 반환하고, path가 있으면 JSON으로 저장"""
+    tools = list_tools()
+    if path is not None:
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(tools, f, indent=2, ensure_ascii=False)
+        os.replace(tmp_path, path)
+    return tools
@@ -0,0 +1,237 @@
+# retrieval.py
+"""
+질의와 관련 있는 도구만 골라 LLM에 보내기 위한 로컬 검색 인덱스.
+
+도구 이름/설명/파라미터 설명을 문자 n-gram TF-IDF로 색인합니다.
+문자 단위라 띄어쓰기가 들쭉날쭉한 한국어에도 동작하며,
+설정에 따라 Ollama 임베딩 점수를 함께 사용할 수 있습니다.
+"""
+
+import math
+import re
+import threading
+import unicodedata
+from collections import Counter
+
+import ollama
+
+from config import cfg
+from utils import registry
+from utils.dpg_ui import log
+
+NGRAM_SIZES = (2, 3)
+
+# 임베딩 요청용 클라이언트 하나를 재사용한다 (연결 keep-alive). 호스트 설정이 바뀌면 새로 만든다
+_embed_client: ollama.Client | None = None
+_embed_host = None
+_embed_lock = threading.Lock()
+
+
+def get_embed_client() -> ollama.Client:
+    global _embed_client, _embed_host
+
+    host = cfg.get("ollama_host")
+    with _embed_lock:
+        if _embed_client is None or host != _embed_host:
+            _embed_client = ollama.Client(host=host)
+            _embed_host = host
+        return _embed_client
+
+
+def normalize_text(text: str) -> str:
+    text = unicodedata.normalize("NFKC", text).casefold()
+    text = re.sub(r"[_\W]+", " ", text)
+    return " ".join(text.split())
+
+
+def ngrams(text: str) -> Counter:
+    """단어 토큰과 단어 경계를 포함한 문자 n-gram 빈도"""
+    text = normalize_text(text)
+    grams = Counter(text.split())
+    padded = f" {text} "
+    for n in NGRAM_SIZES:
+        for i in range(len(padded) - n + 1):
+            gram = padded[i : i + n]
+            if gram.strip():
+                grams[gram] += 1
+    return grams
+
+
+def tool_text(tool: dict) -> str:
+    func = tool["function"]
+    parts = [func["name"].replace("_", " "), func.get("description", "")]
+    properties = func.get("parameters", {}).get("properties", {})
+    for var_name, details in properties.items():
+        parts.append(var_name)
+        parts.append(details.get("description", ""))
+    return " ".join(parts)
+
+
+def _cosine(a: list[float], b: list[float]) -> float:
+    dot = sum(x * y for x, y in zip(a, b))
+    norm = math.sqrt(sum(x * x for x in a)) * math.sqrt(sum(y * y for y in b))
+    return dot / norm if norm else 0.0
+
+
+class ToolIndex:
+    """도구 단위로 추가/삭제가 가능한 TF-IDF 인덱스"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._docs: dict[str, Counter] = {}
+        self._texts: dict[str, str] = {}
+        self._df: Counter = Counter()
+        self._norms: dict[str, float] = {}
+        self._embeddings: dict[str, list[float]] = {}
+        self.version = -1
+
+    def _idf(self, gram: str) -> float:
+        return math.log((len(self._docs) + 1) / (self._df[gram] + 1)) + 1
+
+    def _remove(self, name: str):
+        grams = self._docs.pop(name, None)
+        if grams is not None:
+            self._df.subtract(grams.keys())
+            self._df += Counter()  # 0 이하 항목 제거
+        self._texts.pop(name, None)
+        self._embeddings.pop(name, None)
+        self._norms.clear()
+
+    def _add(self, tool: dict):
+        name = tool["function"]["name"]
+        self._remove(name)
+        text = tool_text(tool)
+        grams = ngrams(text)
+        self._docs[name] = grams
+        self._texts[name] = text
+        self._df.update(grams.keys())
+        self._norms.clear()
+
+    def rebuild(self, tools: list, version: int):
+        with self._lock:
+            self._docs.clear()
+            self._texts.clear()
+            self._df.clear()
+            self._norms.clear()
+            self._embeddings.clear()
+            for tool in tools:
+                self._add(tool)
+            self.version = version
+
+    def update(self, tool: dict, version: int):
+        with self._lock:
+            self._add(tool)
+            self.version = version
+
+    def remove(self, name: str, version: int):
+        with self._lock:
+            self._remove(name)
+            self.version = version
+
+    def _norm(self, name: str) -> float:
+        # IDF는 문서 수에 따라 바뀌므로 노름은 필요할 때 다시 계산
+        if name not in self._norms:
+            grams = self._docs[name]
+            self._norms[name] = math.sqrt(
+                sum((tf * self._idf(g)) ** 2 for g, tf in grams.items())
+            )
+        return self._norms[name]
+
+    def scores(self, query: str) -> dict[str, float]:
+        query_grams = ngrams(query)
+        with self._lock:
+            q_weights = {g: tf * self._idf(g) for g, tf in query_grams.items()}
+            q_norm = math.sqrt(sum(w * w for w in q_weights.values()))
+            result = {}
+            for name, grams in self._docs.items():
+                dot = sum(
+                    w * grams[g] * self._idf(g) for g, w in q_weights.items() if g in grams
+                )
+                norm = self._norm(name) * q_norm
+                result[name] = dot / norm if norm else 0.0
+            return result
+
+    def embedding_scores(self, query: str) -> dict[str, float]:
+        """Ollama 임베딩 코사인 유사도 (문서 임베딩은 캐시)"""
+        client = get_embed_client()
+        model = cfg.get("embedding_model", "nomic-embed-text")
+
+        with self._lock:
+            missing = [n for n in self._texts if n not in self._embeddings]
+            texts = [self._texts[n] for n in missing]
+        if missing:
+            vectors = client.embed(model=model, input=texts).embeddings
+            with self._lock:
+                self._embeddings.update(zip(missing, vectors))
+
+        query_vector = client.embed(model=model, input=[query]).embeddings[0]
+        with self._lock:
+            return {
+                name: _cosine(query_vector, vector)
+                for name, vector in self._embeddings.items()
+            }
+
+
+_index = ToolIndex()
+_index_lock = threading.Lock()
+
+
+def _on_registry_change(event: str, name: str):
+    if event == "modified":
+        # 함수 본문만 바뀐 경우엔 색인할 내용(이름/설명/인자)이 그대로다
+        return
+    # get_index()와 같은 잠금 아래에서 버전 비교와 반영을 한 번에 한다
+    with _index_lock:
+        version = registry.tools_version()
+        if version == _index.version:
+            return
+        if event == "reload" or version != _index.version + 1:
+            # 일괄 변경이거나 사이에 다른 프로세스의 변경이 끼어 있으면 전체 재색인
+            _index.rebuild(registry.list_tools(), version)
+            return
+
+        if event == "delete":
+            _index.remove(name, version)
+            return
+        tool = registry.get_tool(name)
+        if tool is not None:
+            _index.update(tool, version)
+
+
+def get_index() -> ToolIndex:
+    """레지스트리와 동기화된 인덱스. 다른 프로세스가 바꾼 경우엔 전체 재색인"""
+    with _index_lock:
+        version = registry.tools_version()
+        if _index.version != version:
+            _index.rebuild(registry.list_tools(), version)
+    return _index
+
+
+registry.subscribe(_on_registry_change)
+
+
+def select_tools(query: str, k: int) -> list:
+    """
+    질의와 관련도가 높은 상위 k개 도구를 반환합니다.
+    어떤 도구와도 겹치는 부분이 없으면 판단할 근거가 없으므로 전체를 반환합니다.
+    """
+    tools = registry.list_tools()
+    if len(tools) <= k:
+        return tools
+
+    index = get_index()
+    scores = index.scores(query)
+
+    if cfg.get("retrieval_embeddings", False):
+        try:
+            weight = float(cfg.get("embedding_weight", 0.5))
+            for name, score in index.embedding_scores(query).items():
+                scores[name] = (1 - weight) * scores.get(name, 0.0) + weight * score
+        except Exception as e:
+            log(f"임베딩 검색 실패, TF-IDF 점수만 사용합니다: {e}", level="warning")
+
+    if not scores or max(scores.values()) <= 0:
+        return tools
+
+    ranked = sorted(tools, key=lambda t: scores.get(t["function"]["name"], 0.0), reverse=True)
+    return ranked[:k]
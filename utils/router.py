@@ -0,0 +1,133 @@
+# router.py
+"""
+LLM 호출 전에 시도하는 결정적(rule-based) 빠른 경로.
+
+프롬프트 토큰을 함수 이름/설명/파라미터 설명과 퍼지 매칭하고,
+키워드로 쓰이지 않은 나머지 토큰을 파라미터 값으로 채웁니다.
+함수 이름이 프롬프트에 충분히 드러나고 신뢰도가 임계값을 넘을 때만 직접 호출을 만들고,
+아니면 LLM으로 넘깁니다. 설명 단어 몇 개만 겹치는 비슷한 프롬프트는 직접 실행하지 않습니다.
+"""
+
+import difflib
+import re
+
+from config import cfg
+from utils.intent_cache import strip_request_suffix
+from utils.retrieval import normalize_text
+
+KEYWORD_SIMILARITY = 0.75
+
+
+def tokenize(text: str) -> list[tuple[str, str]]:
+    """(정규화 토큰, 원문 토큰) 목록"""
+    tokens = []
+    for raw in text.split():
+        raw = raw.strip(".,!?~\"'()[]")
+        norm = normalize_text(raw)
+        if norm:
+            tokens.append((norm, raw))
+    return tokens
+
+
+def similarity(token: str, vocab: set[str]) -> float:
+    """정확히 같으면 1.0, 한쪽이 다른 쪽의 접두어면(조사 등) 0.9, 아니면 퍼지 비율"""
+    best = 0.0
+    for word in vocab:
+        if token == word:
+            return 1.0
+        shorter = min(len(token), len(word))
+        if shorter >= 2 and (word.startswith(token) or token.startswith(word)):
+            best = max(best, 0.9)
+        else:
+            best = max(best, difflib.SequenceMatcher(None, token, word).ratio())
+    return best
+
+
+def tool_vocab(tool: dict) -> tuple[set[str], set[str]]:
+    """(이름 토큰, 이름+설명+파라미터 설명 토큰)"""
+    func = tool["function"]
+    name_tokens = set(normalize_text(func["name"]).split())
+    words = set(name_tokens)
+    words.update(normalize_text(func.get("description", "")).split())
+    for var_name, details in func.get("parameters", {}).get("properties", {}).items():
+        words.update(normalize_text(var_name).split())
+        words.update(normalize_text(details.get("description", "")).split())
+    return name_tokens, words
+
+
+def score_tool(tokens: list[tuple[str, str]], compact_prompt: str, tool: dict):
+    """(점수, 인자 dict 또는 None, 이름 일치도)"""
+    name_tokens, vocab = tool_vocab(tool)
+    params = tool["function"].get("parameters", {})
+    required = params.get("required") or list(params.get("properties", {}))
+
+    keywords, leftover = [], []
+    for norm, raw in tokens:
+        sim = similarity(norm, vocab)
+        if sim >= KEYWORD_SIMILARITY:
+            keywords.append(sim)
+        else:
+            leftover.append(raw)
+
+    # 이름 토큰이 띄어쓰기 없이 붙은 프롬프트 안에 들어 있으면 완전 일치로 본다
+    name_scores = [
+        1.0 if t in compact_prompt else similarity(t, {n for n, _ in tokens})
+        for t in name_tokens
+    ]
+    name_score = sum(name_scores) / len(name_scores) if name_scores else 0.0
+    # 프롬프트 중 키워드여야 할 토큰(파라미터 값 한 자리를 뺀 나머지) 대비 일치 비율.
+    # 고정 개수로 나누면 긴 프롬프트에서 단어 두 개만 겹쳐도 만점이 된다
+    expected = max(1, len(tokens) - (1 if required else 0))
+    keyword_score = min(1.0, sum(keywords) / expected)
+    base = 0.7 * max(name_score, keyword_score) + 0.3 * min(name_score, keyword_score)
+
+    if not required:
+        coverage = len(keywords) / max(1, len(keywords) + len(leftover))
+        return base * coverage, {}, name_score
+
+    if len(required) > 1 or not leftover:
+        # 여러 파라미터를 결정적으로 나눌 수 없거나 채울 값이 없음
+        return 0.0, None, name_score
+
+    var_name = required[0]
+    value = " ".join(leftover)
+    if params.get("properties", {}).get(var_name, {}).get("type") == "number":
+        if not re.fullmatch(r"-?\d+(\.\d+)?", value):
+            return 0.0, None, name_score
+    return base, {var_name: value}, name_score
+
+
+def route(query_text: str, tools: list) -> dict:
+    """
+    {"call": {"name", "arguments"} 또는 None, "name": 최고 점수 함수,
+     "confidence": 신뢰도, "reason": 판단 근거}
+    """
+    text = strip_request_suffix(query_text.strip())
+    tokens = tokenize(text)
+    compact_prompt = normalize_text(text).replace(" ", "")
+    threshold = float(cfg.get("router_threshold", 0.6))
+    margin = float(cfg.get("router_margin", 0.1))
+    name_min = float(cfg.get("router_name_min", 0.5))
+
+    scored = []
+    for tool in tools:
+        score, arguments, name_score = score_tool(tokens, compact_prompt, tool)
+        scored.append((score, tool["function"]["name"], arguments, name_score))
+    scored.sort(key=lambda item: item[0], reverse=True)
+
+    if not scored or scored[0][2] is None:
+        return {"call": None, "name": None, "confidence": 0.0, "reason": "매칭 없음"}
+
+    best_score, best_name, arguments, name_score = scored[0]
+    decision = {"call": None, "name": best_name, "confidence": best_score}
+
+    if name_score < name_min:
+        decision["reason"] = f"함수 이름 일치도({name_score:.2f}) 부족"
+    elif best_score < threshold:
+        decision["reason"] = f"임계값({threshold:.2f}) 미달"
+    elif len(scored) > 1 and best_score - scored[1][0] < margin:
+        decision["reason"] = f"'{scored[1][1]}'와 점수 차이가 작음"
+    else:
+        decision["reason"] = "직접 실행"
+        decision["call"] = {"name": best_name, "arguments": arguments}
+    return decision
@@ -0,0 +1,106 @@
+# rss_sampler.py
+"""
+실행 단위 메모리(RSS) 측정.
+
+getrusage(RUSAGE_SELF)는 프로세스가 뜬 뒤의 최대값이라 오래 사는 워커에서는 실행마다
+값이 줄지 않고, wait4는 직접 띄운 자식만 세므로 Playwright 드라이버(node)와
+Chromium 같은 손자 프로세스가 빠집니다. 그래서 실행하는 동안 대상 프로세스와
+그 모든 자손의 RSS 합을 주기적으로 읽어 그 실행 구간의 최댓값을 기록합니다.
+/proc가 없는 OS에서는 측정하지 않습니다(None).
+depth로 몇 단계 자손까지 셀지 제한할 수 있습니다 (워커에서 자기와 드라이버만 잴 때 1).
+"""
+
+import os
+import threading
+
+PROC = "/proc"
+INTERVAL = 0.2  # 초
+_PAGE_KB = os.sysconf("SC_PAGE_SIZE") // 1024 if hasattr(os, "sysconf") else 4
+
+
+def supported() -> bool:
+    return os.path.isdir(os.path.join(PROC, "self"))
+
+
+def _stat(pid: str) -> tuple[int, int] | None:
+    """(부모 pid, RSS KB)"""
+    try:
+        with open(os.path.join(PROC, pid, "stat"), "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    # 두 번째 필드(comm)에 공백이나 괄호가 있을 수 있어 마지막 ')' 뒤부터 나눈다
+    fields = data[data.rfind(b")") + 2 :].split()
+    return int(fields[1]), int(fields[21]) * _PAGE_KB
+
+
+def tree_rss_kb(root: int, depth: int | None = None) -> int:
+    """root 프로세스와 자손(depth가 있으면 그 단계까지)의 RSS 합 (KB)"""
+    parents: dict[int, int] = {}
+    rss: dict[int, int] = {}
+    for name in os.listdir(PROC):
+        if not name.isdigit():
+            continue
+        stat = _stat(name)
+        if stat is not None:
+            parents[int(name)], rss[int(name)] = stat
+
+    total = 0
+    for pid in rss:
+        node, level = pid, 0
+        while node > 1 and node != root:
+            node, level = parents.get(node, 0), level + 1
+        if node == root and (depth is None or level <= depth):
+            total += rss[pid]
+    return total
+
+
+class PeakSampler:
+    """
+    with 블록(한 번의 실행) 동안 프로세스 트리(depth 단계까지)의 최대 RSS를 잰다.
+
+        with PeakSampler(os.getpid()) as sampler:
+            ...
+        sampler.peak_kb
+    """
+
+    def __init__(self, pid: int, interval: float = INTERVAL, depth: int | None = None):
+        self.pid = pid
+        self.depth = depth
+        self.interval = interval
+        self.peak_kb: int | None = None
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self):
+        try:
+            size = tree_rss_kb(self.pid, self.depth)
+        except OSError:
+            return
+        if size and (self.peak_kb is None or size > self.peak_kb):
+            self.peak_kb = size
+
+    def _loop(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def start(self) -> "PeakSampler":
+        if supported():
+            self._sample()
+            self._thread = threading.Thread(target=self._loop, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self) -> int | None:
+        if self._thread is not None:
+            self._sample()  # 끝나기 직전 값도 반영 (프로세스가 이미 끝났으면 무시됨)
+            self._stop.set()
+            self._thread.join()
+            self._thread = None
+        return self.peak_kb
+
+    def __enter__(self) -> "PeakSampler":
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
@@ -0,0 +1,84 @@
+# run_history.py
+"""
+함수 실행 기록.
+
+실행마다 stdout/stderr를 줄 단위로 받아 크기가 제한된 버퍼에 담고,
+종료 코드, 실행 시간, 실행 동안의 최대 메모리(RSS 합)를 기록합니다.
+워커 실행은 워커와 Playwright 드라이버만, 새 프로세스 실행은 그 프로세스 트리(브라우저 포함)를 잽니다.
+"""
+
+import itertools
+import threading
+import time
+from collections import deque
+
+from config import cfg
+
+_ids = itertools.count(1)
+_lock = threading.Lock()
+_runs: deque = deque(maxlen=int(cfg.get("run_history_size", 100)))
+
+
+class RunRecord:
+    def __init__(self, name: str, args: dict, mode: str):
+        self.id = next(_ids)
+        self.name = name
+        self.args = args
+        self.mode = mode
+        self.started = time.time()
+        self.ended: float | None = None
+        self.code: int | None = None
+        self.error: str | None = None
+        self.peak_rss_kb: int | None = None
+        self.dropped_lines = 0
+        self.output: deque = deque(maxlen=int(cfg.get("run_output_lines", 500)))
+        self._lock = threading.Lock()
+
+    @property
+    def running(self) -> bool:
+        return self.ended is None
+
+    @property
+    def wall_time(self) -> float:
+        return (self.ended or time.time()) - self.started
+
+    @property
+    def status(self) -> str:
+        if self.running:
+            return "실행 중"
+        return "성공" if self.code == 0 else "실패"
+
+    def append(self, stream: str, line: str):
+        with self._lock:
+            if len(self.output) == self.output.maxlen:
+                self.dropped_lines += 1
+            self.output.append((stream, line))
+
+    def finish(self, code: int | None, error: str | None = None, peak_rss_kb=None):
+        self.code = code
+        self.error = error
+        self.peak_rss_kb = peak_rss_kb
+        self.ended = time.time()
+
+    def text(self) -> str:
+        with self._lock:
+            lines = [
+                f"[{stream}] {line}" if stream == "stderr" else line
+                for stream, line in self.output
+            ]
+        if self.dropped_lines:
+            lines.insert(0, f"... 앞의 {self.dropped_lines}줄 생략 ...")
+        return "\n".join(lines)
+
+
+def new_run(name: str, args: dict, mode: str) -> RunRecord:
+    record = RunRecord(name, args, mode)
+    with _lock:
+        _runs.append(record)
+    return record
+
+
+def recent_runs() -> list[RunRecord]:
+    """최근 실행 기록 (최신순)"""
+    with _lock:
+        return list(reversed(_runs))
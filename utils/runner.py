@@ -0,0 +1,268 @@
+# runner.py
+import os
+import subprocess
+import sys
+import threading
+from concurrent.futures import Future
+from pathlib import Path
+
+from config import cfg
+from errors import WorkerBusyError
+from utils import browser_lifecycle, fs_watcher, rss_sampler
+from utils.browser_lifecycle import policy_for, release_profile, reusable_worker
+from utils.browser_profiles import profile_of
+from utils.browser_server import browser_endpoint
+from utils.codegen_transform import RUN_DONE_MARKER
+from utils.function_loader import is_page_file
+from utils.run_history import RunRecord, new_run
+from utils.worker_pool import WorkerPool
+
+# 새 프로세스(생성된 main())는 프로필 잠금/storage_state를 다루지 않는다
+PROFILE_NEEDS_POOL = "프로필을 쓰는 함수는 워커 풀에서만 실행할 수 있습니다."
+
+_pool: WorkerPool | None = None
+_pool_lock = threading.Lock()
+
+
+def get_pool() -> WorkerPool | None:
+    """설정에서 워커 풀을 끄지 않았다면 풀을 (최초 1회) 생성해 반환"""
+    global _pool
+
+    if not cfg.get("worker_pool", True):
+        return None
+
+    with _pool_lock:
+        if _pool is None:
+            _pool = WorkerPool(
+                size=int(cfg.get("worker_pool_size", 2)),
+                max_jobs=int(cfg.get("worker_max_jobs", 20)),
+                acquire_timeout=float(cfg.get("worker_acquire_timeout", 10)),
+            )
+        if _pool.broken:
+            return None
+        return _pool
+
+
+def shutdown_pool():
+    global _pool
+
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
+
+
+def _forward_file_change(event: str, path: Path):
+    """함수 모듈은 워커 프로세스에 캐시되므로 감시자 이벤트를 워커에도 전달한다"""
+    pool = _pool
+    if pool is None:
+        return
+    if event == "rescan":
+        pool.broadcast({"type": "invalidate", "path": None})
+    elif path.suffix == ".py":
+        pool.broadcast({"type": "invalidate", "path": str(path)})
+
+
+fs_watcher.subscribe(_forward_file_change)
+
+
+def _read_lines(pipe, stream: str, record: RunRecord, done: threading.Event):
+    for line in pipe:
+        line = line.rstrip("\n")
+        if line == RUN_DONE_MARKER:
+            done.set()
+            continue
+        record.append(stream, line)
+    pipe.close()
+
+
+def _wait(process: subprocess.Popen, done: threading.Event) -> tuple[int, int | None]:
+    """
+    run()이 끝났다는 표시(done) 또는 프로세스 종료까지 기다린다.
+    (종료 코드, 최대 RSS KB)를 반환하며, 표시를 받았으면 프로세스가 남아 있어도 코드는 0.
+    실행 동안 프로세스 트리(브라우저 포함)를 샘플링하고,
+    /proc가 없으면 wait4로 직접 띄운 자식의 값만 받는다
+    """
+    use_wait4 = not rss_sampler.supported() and hasattr(os, "wait4")
+    peak = None
+    with rss_sampler.PeakSampler(process.pid) as sampler:
+        while not done.wait(0.1):
+            if not use_wait4:
+                if process.poll() is not None:
+                    break
+                continue
+            pid, status, rusage = os.wait4(process.pid, os.WNOHANG)
+            if pid:
+                process.returncode = os.waitstatus_to_exitcode(status)
+                peak = rusage.ru_maxrss
+                if sys.platform == "darwin":
+                    peak //= 1024
+                break
+
+    if done.is_set():
+        return 0, sampler.peak_kb
+    return process.returncode, sampler.peak_kb or peak
+
+
+def _track_lingering(process: subprocess.Popen, name: str):
+    """
+    run()을 마친 뒤 브라우저를 열어 둔 채 남은 프로세스를 라이브 세션으로 등록한다.
+    세션 목록과 browser_max_live에 포함되고, 닫기 요청은 프로세스 종료로 처리한다.
+    """
+    browser_lifecycle.register_worker(process.pid, lambda message: process.terminate())
+    browser_lifecycle.handle_event(
+        process.pid, {"event": "open", "key": "cold", "name": name, "policy": "idle"}
+    )
+
+    def _reap():
+        process.wait()
+        browser_lifecycle.unregister_worker(process.pid)
+
+    threading.Thread(target=_reap, daemon=True).start()
+
+
+def run_cold(file_path: str, args: dict, record: RunRecord) -> Future:
+    """
+    함수마다 새 파이썬 프로세스를 띄우는 기존 방식.
+    생성된 main()은 run()을 마치면 RUN_DONE_MARKER를 출력하므로 그때 실행을 끝난 것으로 보고,
+    창이 닫히거나 KMU_KEEP_OPEN초가 지날 때까지 남는 프로세스는 라이브 세션으로 관리한다.
+    표시를 출력하지 않는 예전 파일은 프로세스가 끝날 때까지 기다린다.
+    """
+    future: Future = Future()
+    # 새 프로세스는 다음 실행에 이어 쓸 수 없으므로 reuse도 idle처럼 남겨 둔다
+    policy = policy_for(record.name)
+    keep_open = 0 if policy == "close" else float(cfg.get("browser_idle_timeout", 300))
+    env = {**os.environ, "KMU_KEEP_OPEN": str(keep_open)}
+
+    def _run():
+        try:
+            cmd = [sys.executable, file_path]
+            for key, value in args.items():
+                cmd.append(f"--{key}")
+                cmd.append(str(value))
+
+            process = subprocess.Popen(
+                cmd,
+                stdout=subprocess.PIPE,
+                stderr=subprocess.PIPE,
+                text=True,
+                encoding="utf-8",
+                errors="replace",
+                bufsize=1,
+                env=env,
+            )
+            done = threading.Event()
+            readers = [
+                threading.Thread(
+                    target=_read_lines, args=(pipe, stream, record, done), daemon=True
+                )
+                for pipe, stream in ((process.stdout, "stdout"), (process.stderr, "stderr"))
+            ]
+            for reader in readers:
+                reader.start()
+
+            code, peak_rss_kb = _wait(process, done)
+            if process.poll() is None:
+                _track_lingering(process, record.name)
+            else:
+                for reader in readers:
+                    reader.join(timeout=1)
+            future.set_result({"code": code, "peak_rss_kb": peak_rss_kb})
+        except Exception as e:
+            future.set_exception(e)
+
+    threading.Thread(target=_run, daemon=True).start()
+    return future
+
+
+def _fall_back_to_cold(
+    file_path: str, args: dict, record: RunRecord, error: BaseException
+) -> Future:
+    """
+    워커 풀에서 실행하지 못한 실행을 새 프로세스로 다시 실행.
+    - 워커가 하나도 뜨지 못한 풀(playwright 미설치 등): 풀은 워커를 백그라운드에서 띄우므로
+      첫 실행 때는 아직 broken인지 모르고 제출될 수 있다. 이후 실행은 get_pool()이 None을
+      돌려주므로 처음부터 새 프로세스로 실행된다.
+    - 모든 워커가 worker_acquire_timeout초 넘게 바쁠 때 (WorkerBusyError)
+    """
+    record.mode = "프로세스"
+    record.append("stderr", f"워커 풀을 쓸 수 없어 새 프로세스로 실행합니다 ({error})")
+    return run_cold(file_path, args, record)
+
+
+def _refuse_cold(record: RunRecord) -> Future:
+    """프로필을 쓰는 함수는 프로필 없이 실행하지 않고 실패로 기록한다"""
+    record.append("stderr", PROFILE_NEEDS_POOL)
+    future: Future = Future()
+    future.set_result({"code": None, "error": PROFILE_NEEDS_POOL})
+    return future
+
+
+def run_function(file_path: str, args: dict | None = None) -> Future:
+    """
+    함수 파일을 실행하고 {"code": 종료코드, "record": RunRecord, ...} 결과를 담는 Future를 반환합니다.
+    워커 풀이 사용 가능하면 풀에서, 아니면 새 프로세스로 실행합니다.
+    예전 run(playwright) 형식 파일은 창이 닫힐 때까지 워커를 붙잡을 수 있으므로 새 프로세스로 실행합니다.
+    풀에서 실행할 때 공유 브라우저가 떠 있으면 그 브라우저에 새 컨텍스트를 만들어 씁니다.
+    실행 후 브라우저는 함수별 정책(browser_lifecycle)에 따라 닫거나 남겨 둡니다.
+    프로필을 쓰는 함수는 풀에서만 실행하며, 빈 워커를 profile_lock_timeout초까지 기다립니다.
+    실행 중 출력과 종료 정보는 run_history에 기록됩니다.
+    """
+    file_path = os.path.abspath(file_path)
+    args = {key: str(value) for key, value in (args or {}).items()}
+    name = os.path.splitext(os.path.basename(file_path))[0]
+
+    result: Future = Future()
+
+    def finish(future: Future):
+        if future.exception() is not None:
+            record.finish(None, str(future.exception()))
+            result.set_exception(future.exception())
+            return
+        outcome = future.result()
+        record.finish(
+            outcome.get("code"), outcome.get("error"), outcome.get("peak_rss_kb")
+        )
+        result.set_result({**outcome, "record": record})
+
+    page_file = is_page_file(file_path)
+    # 예전 run(playwright) 형식은 브라우저를 직접 띄우므로 프로필을 쓰지 않는다
+    profile = profile_of(name) if page_file else None
+    pool = get_pool()
+    if pool is None or not page_file:
+        record = new_run(name, args, "프로세스")
+        if profile is not None:
+            _refuse_cold(record).add_done_callback(finish)
+        else:
+            run_cold(file_path, args, record).add_done_callback(finish)
+        return result
+
+    record = new_run(name, args, "워커")
+
+    def on_pool_done(future: Future):
+        error = future.exception()
+        if error is None or not (pool.broken or isinstance(error, WorkerBusyError)):
+            finish(future)
+        elif profile is not None:
+            record.append("stderr", PROFILE_NEEDS_POOL)
+            finish(future)
+        else:
+            _fall_back_to_cold(file_path, args, record, error).add_done_callback(finish)
+
+    policy = policy_for(name)
+    if profile is not None:
+        release_profile(profile["name"], keep=name if policy == "reuse" else None)
+    pool.submit(
+        file_path,
+        args,
+        on_output=record.append,
+        prefer=reusable_worker(name) if policy == "reuse" else None,
+        acquire_timeout=(
+            float(cfg.get("profile_lock_timeout", 120)) if profile is not None else None
+        ),
+        browser_endpoint=browser_endpoint(),
+        policy=policy,
+        idle_timeout=float(cfg.get("browser_idle_timeout", 300)),
+        profile=profile,
+    ).add_done_callback(on_pool_done)
+    return result
@@ -0,0 +1,314 @@
+# selector_optimizer.py
+"""
+녹화 후 선택자 최적화.
+
+녹화기가 남기는 `html > body:nth-child(2) > div:nth-child(3) > ...` 같은 전체 경로 선택자는
+찾는 데 오래 걸리고 DOM이 조금만 바뀌어도 깨집니다. 저장된 함수를 헤드리스 브라우저에서
+한 번 다시 실행하면서, page.locator("...") 호출마다 실제로 찾은 요소를 기준으로
+id / data-testid / 역할+이름 / 텍스트 / 속성 기반의 더 짧은 후보를 만들고,
+"정확히 하나만, 그리고 같은 요소를" 가리키는 가장 짧은 후보로 함수 파일을 고쳐 씁니다.
+단계별로 바뀐 선택자와, 요소가 붙은 뒤 각 선택자로 새로 질의(count())하는 데 걸린
+시간을 한 번씩 재서 참고용으로 보고합니다. 페이지 로딩 대기는 시간에 넣지 않습니다.
+
+    python -m utils.selector_optimizer naver_search --arg query=날씨 --dry-run
+"""
+
+import argparse
+import ast
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Callable
+
+from config import cfg
+from env import FUNCTIONS_DIR
+from errors import CodegenError
+from utils.browser_lifecycle import release_profile
+from utils.browser_profiles import open_page, profile_of
+from utils.codegen_transform import PAGE_NAME, validate_function_source
+from utils.dpg_ui import log
+from utils.function_loader import coerce_args, invalidate
+
+# 요소에서 후보 정보를 모은다. 선택자 문법은 파이썬 쪽에서 만든다
+CANDIDATES_JS = """
+(el) => {
+  const stable = (v) => !!v && v.length <= 60 && !/\\d{4,}/.test(v) && !/^\\d/.test(v);
+  const tag = el.tagName.toLowerCase();
+  const type = (el.getAttribute('type') || '').toLowerCase();
+  const implicit = {
+    a: el.hasAttribute('href') ? 'link' : '', button: 'button', select: 'combobox',
+    textarea: 'textbox', img: 'img', h1: 'heading', h2: 'heading', h3: 'heading',
+    h4: 'heading', h5: 'heading', h6: 'heading',
+    input: {checkbox: 'checkbox', radio: 'radio', search: 'searchbox',
+            submit: 'button', button: 'button', '': 'textbox', text: 'textbox',
+            email: 'textbox', tel: 'textbox', url: 'textbox'}[type] || '',
+  };
+  const text = (el.innerText || '').trim();
+  const attrs = {};
+  for (const name of ['id', 'data-testid', 'name', 'aria-label', 'placeholder', 'title', 'alt']) {
+    const value = el.getAttribute(name);
+    if (stable(value)) attrs[name] = value;
+  }
+  return {
+    tag,
+    attrs,
+    role: el.getAttribute('role') || implicit[tag] || '',
+    name: attrs['aria-label'] || (text.length <= 40 && !text.includes('\\n') ? text : '')
+          || attrs['alt'] || attrs['title'] || '',
+    text: text.length <= 40 && !text.includes('\\n') ? text : '',
+  };
+}
+"""
+
+SAME_ELEMENT_JS = "(el, target) => el === target"
+
+
+@dataclass
+class StepReport:
+    step: int
+    line: int
+    before: str
+    after: str | None = None
+    before_ms: float | None = None
+    after_ms: float | None = None
+    error: str | None = None
+
+
+def _css_string(value: str) -> str:
+    return '"' + value.replace("\\", "\\\\").replace('"', '\\"') + '"'
+
+
+def _candidates(info: dict) -> list[tuple[str, tuple, dict]]:
+    """(Locator 메서드, 위치 인자, 키워드 인자) 후보 목록"""
+    attrs = info["attrs"]
+    out = []
+    if "data-testid" in attrs:
+        out.append(("get_by_test_id", (attrs["data-testid"],), {}))
+    if "id" in attrs and re.fullmatch(r"[A-Za-z][\w-]*", attrs["id"]):
+        out.append(("locator", (f"#{attrs['id']}",), {}))
+    if info["role"] and info["name"]:
+        out.append(
+            ("get_by_role", (info["role"],), {"name": info["name"], "exact": True})
+        )
+    if "placeholder" in attrs:
+        out.append(("get_by_placeholder", (attrs["placeholder"],), {"exact": True}))
+    if "aria-label" in attrs:
+        out.append(("get_by_label", (attrs["aria-label"],), {"exact": True}))
+    if info["text"]:
+        out.append(("get_by_text", (info["text"],), {"exact": True}))
+    for attr in ("name", "title", "alt"):
+        if attr in attrs:
+            out.append(
+                ("locator", (f"{info['tag']}[{attr}={_css_string(attrs[attr])}]",), {})
+            )
+    return out
+
+
+def _call_source(receiver: str, method: str, args: tuple, kwargs: dict) -> str:
+    parts = [repr(a) for a in args] + [f"{k}={v!r}" for k, v in kwargs.items()]
+    return f"{receiver}.{method}({', '.join(parts)})"
+
+
+def _count_ms(locator) -> tuple[int, float]:
+    """(일치하는 요소 수, 걸린 시간 ms). count()는 매번 DOM을 새로 질의한다"""
+    started = time.perf_counter()
+    count = locator.count()
+    return count, (time.perf_counter() - started) * 1000
+
+
+class _Probe:
+    """계측된 run()에서 page.locator(...) 대신 불려 후보를 평가한다"""
+
+    def __init__(self, sites: list[dict], timeout: float):
+        self.sites = sites
+        self.timeout = timeout
+        self.reports: dict[int, StepReport] = {}
+
+    def __call__(self, page, selector: str, index: int):
+        site = self.sites[index]
+        original = page.locator(selector)
+        report = self.reports.setdefault(
+            index, StepReport(index + 1, site["line"], site["source"])
+        )
+        if report.before_ms is not None:
+            return original  # 반복문 안에서 다시 불린 경우: 첫 결과를 쓴다
+
+        try:
+            # 로딩을 기다리는 시간은 선택자 비용이 아니므로 붙은 뒤에 잰다
+            original.first.wait_for(state="attached", timeout=self.timeout)
+            _, report.before_ms = _count_ms(original)
+            handle = original.first.element_handle()
+            info = handle.evaluate(CANDIDATES_JS)
+            options = [
+                (_call_source(site["receiver"], method, args, kwargs), method, args, kwargs)
+                for method, args, kwargs in _candidates(info)
+            ]
+            for code, method, args, kwargs in sorted(options, key=lambda o: len(o[0])):
+                if len(code) >= len(site["source"]):
+                    break
+                candidate = getattr(page, method)(*args, **kwargs)
+                count, elapsed = _count_ms(candidate)
+                if count != 1:
+                    continue
+                if not candidate.evaluate(SAME_ELEMENT_JS, handle):
+                    continue
+                report.after = code
+                report.after_ms = elapsed
+                return candidate
+        except Exception as e:
+            report.error = str(e).splitlines()[0]
+        return original
+
+
+def _locator_sites(source: str, tree: ast.Module) -> list[dict]:
+    """run() 안의 page.locator("문자열") 호출 위치"""
+    run = next(
+        n for n in tree.body if isinstance(n, ast.FunctionDef) and n.name == "run"
+    )
+    sites = []
+    for node in ast.walk(run):
+        if (
+            isinstance(node, ast.Call)
+            and isinstance(node.func, ast.Attribute)
+            and node.func.attr == "locator"
+            and isinstance(node.func.value, ast.Name)
+            and PAGE_NAME.match(node.func.value.id)
+            and len(node.args) == 1
+            and not node.keywords
+            and isinstance(node.args[0], ast.Constant)
+            and isinstance(node.args[0].value, str)
+        ):
+            sites.append(
+                {
+                    "node": node,
+                    "line": node.lineno,
+                    "receiver": node.func.value.id,
+                    "selector": node.args[0].value,
+                    "source": ast.get_source_segment(source, node),
+                }
+            )
+    sites.sort(key=lambda s: (s["node"].lineno, s["node"].col_offset))
+    return sites
+
+
+class _Instrument(ast.NodeTransformer):
+    def __init__(self, sites: list[dict]):
+        self.index = {id(s["node"]): i for i, s in enumerate(sites)}
+
+    def visit_Call(self, node: ast.Call):
+        index = self.index.get(id(node))
+        node = self.generic_visit(node)
+        if index is None:
+            return node
+        return ast.copy_location(
+            ast.Call(
+                ast.Name("__probe__", ast.Load()),
+                [node.func.value, node.args[0], ast.Constant(index)],
+                [],
+            ),
+            node,
+        )
+
+
+def _replace_spans(source: str, edits: list[tuple[ast.AST, str]]) -> str:
+    """AST 노드 위치(UTF-8 바이트 기준 열)를 새 텍스트로 바꾼다. 나머지 서식은 그대로"""
+    data = source.encode("utf-8")
+    starts = [0]
+    for line in data.splitlines(keepends=True):
+        starts.append(starts[-1] + len(line))
+
+    for node, text in sorted(
+        edits, key=lambda e: (e[0].lineno, e[0].col_offset), reverse=True
+    ):
+        begin = starts[node.lineno - 1] + node.col_offset
+        end = starts[node.end_lineno - 1] + node.end_col_offset
+        data = data[:begin] + text.encode("utf-8") + data[end:]
+    return data.decode("utf-8")
+
+
+def optimize_function(
+    file_path: str,
+    args: dict | None = None,
+    write: bool = True,
+    report: Callable[[str], None] | None = None,
+) -> list[StepReport]:
+    """
+    함수를 헤드리스로 한 번 실행하며 선택자를 최적화합니다.
+    write가 True면 바뀐 선택자로 파일을 고쳐 쓰고, 단계별 결과를 반환합니다.
+    report를 주지 않으면 앱 로그(log)로 남깁니다.
+    """
+    report = report or log
+    from playwright.sync_api import sync_playwright
+
+    with open(file_path, "r", encoding="utf-8") as f:
+        source = f.read()
+    tree = ast.parse(source)
+    sites = _locator_sites(source, tree)
+    name = os.path.basename(file_path)
+    if not sites:
+        report(f"{name}: 최적화할 page.locator(...) 선택자가 없습니다.")
+        return []
+
+    # sites가 가리키는 노드를 그대로 두고 호출만 __probe__로 감싼다
+    instrumented = ast.fix_missing_locations(_Instrument(sites).visit(tree))
+    probe = _Probe(sites, float(cfg.get("selector_optimize_timeout", 10000)))
+    namespace = {"__name__": "selector_probe", "__file__": file_path, "__probe__": probe}
+    exec(compile(instrumented, file_path, "exec"), namespace)
+    run = namespace["run"]
+
+    with sync_playwright() as playwright:
+        # 로그인이 필요한 사이트도 재실행되도록 함수의 프로필로 연다 (프로필은 갱신하지 않음).
+        # 프로필은 한 브라우저만 쓰므로 남겨 둔 세션이 있으면 먼저 닫는다
+        function = os.path.splitext(name)[0]
+        profile = profile_of(function)
+        if profile is not None:
+            release_profile(profile["name"])
+        page, close, _ = open_page(playwright, profile, headless=True)
+        try:
+            run(page, **coerce_args(run, args or {}))
+        except Exception as e:
+            report(f"{name}: 재실행 중 오류 - 그때까지 평가한 단계만 반영합니다 ({e})")
+        finally:
+            close()
+
+    reports = [probe.reports[i] for i in sorted(probe.reports)]
+    for r in reports:
+        if r.after:
+            report(
+                f"  {r.step}단계 ({r.line}행): {r.before}\n    -> {r.after}\n"
+                f"    질의 {r.before_ms:.1f}ms -> {r.after_ms:.1f}ms (1회 측정, 참고용)"
+            )
+        else:
+            reason = r.error or "더 짧은 고유 선택자 없음"
+            report(f"  {r.step}단계 ({r.line}행): 유지 ({reason})")
+
+    changed = [(sites[r.step - 1]["node"], r.after) for r in reports if r.after]
+    report(f"{name}: {len(changed)}/{len(sites)}개 선택자 교체")
+
+    if write and changed:
+        new_source = _replace_spans(source, changed)
+        try:
+            validate_function_source(new_source)
+        except CodegenError as e:
+            report(f"{name}: 고친 코드 검증 실패, 저장하지 않습니다 ({e})")
+            return reports
+        with open(file_path, "w", encoding="utf-8") as f:
+            f.write(new_source)
+        invalidate(file_path)
+    return reports
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("name", type=str, help="functions/ 안의 함수 이름")
+    parser.add_argument("--arg", action="append", default=[], help="인자 (이름=값)")
+    parser.add_argument("--dry-run", action="store_true", help="파일을 고치지 않고 보고만")
+    args = parser.parse_args()
+
+    optimize_function(
+        os.path.join(FUNCTIONS_DIR, f"{args.name}.py"),
+        dict(item.split("=", 1) for item in args.arg),
+        write=not args.dry_run,
+        report=print,
+    )
@@ -1,102 +1,455 @@
 # stt.py
 import datetime
+import queue
 import threading
 import time
-import wave
+from concurrent.futures import CancelledError, Future
 from pathlib import Path
 from typing import Callable
 
 import numpy as np
-import openai
 import sounddevice as sd
 from dotenv import load_dotenv
 from pynput import keyboard
 
+from config import cfg
 from env import AUDIOS_DIR
+from utils.audio_ring import AudioRing
 from utils.dpg_ui import log
+from utils.stt_backends import encode_audio, get_backend, warm_backend
+from utils.vad import FRAME, SAMPLE_RATE, StreamingSegmenter, trim_silence
 
 load_dotenv()
 
-SAMPLE_RATE = 16000
 recording = False
 pressed_keys = set()
 
 
-def transcribe_audio(file_path: Path) -> str:
-    """Whisper를 이용해 음성을 텍스트로 변환"""
-    with open(file_path, "rb") as f:
-        transcript = openai.audio.transcriptions.create(
-            model="whisper-1",
-            file=f,
-        )
-    return transcript.text.strip()
+def transcribe_audio(audio: np.ndarray, prompt: str = "") -> str:
+    """설정된 STT 백엔드로 음성을 텍스트로 변환 (디스크를 거치지 않음)"""
+    return get_backend().transcribe(audio, prompt)
 
 
-def stt(call_back: Callable[[str], None]):
-    """Ctrl + Shift + Alt 누르고 있을 때만 녹음 후 Whisper 변환"""
+def transcribe_speech(audio: np.ndarray, prompt: str = "") -> tuple[str, float]:
+    """
+    VAD로 앞뒤 무음을 잘라 전사. 음성이 없으면 요청하지 않고 ""를 돌려준다.
+    반환: (텍스트, 잘라 내서 보내지 않은 시간(초))
+    """
+    if not cfg.get("vad", True):
+        return transcribe_audio(audio, prompt), 0.0
+    trimmed, saved = trim_silence(audio)
+    if trimmed is None:
+        return "", saved
+    return transcribe_audio(trimmed, prompt), saved
 
-    global recording
-    frames = []  # 녹음된 프레임 버퍼
 
-    def callback(indata, frames_count, time_info, status):
-        if recording:
-            frames.append(indata.copy())
-
-    def save_and_transcribe():
-        """녹음이 끝나면 파일로 저장 후 변환"""
-        nonlocal frames
-        if not frames:
-            log("⚠️ 녹음된 데이터가 없습니다.")
-            return
+def _prune_archive(keep: int):
+    recordings = sorted(
+        Path(AUDIOS_DIR).glob("recording_*"), key=lambda p: p.stat().st_mtime
+    )
+    for old in recordings[: max(0, len(recordings) - keep)]:
+        old.unlink(missing_ok=True)
+
+
+def archive_audio(audio: np.ndarray):
+    """stt_archive가 켜져 있으면 백그라운드에서 녹음을 저장하고 오래된 파일을 정리"""
+    if not cfg.get("stt_archive", False):
+        return
+
+    def _write():
+        try:
+            data, filename = encode_audio(audio)
+            timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S_%f")
+            file_path = Path(AUDIOS_DIR) / f"recording_{timestamp}{Path(filename).suffix}"
+            file_path.parent.mkdir(parents=True, exist_ok=True)
+            file_path.write_bytes(data)
+            _prune_archive(int(cfg.get("stt_archive_keep", 50)))
+            log(f"녹음 보관: {file_path.name}", level="debug")
+        except Exception as e:
+            log(f"녹음 보관 실패: {e}", level="warning")
+
+    threading.Thread(target=_write, daemon=True).start()
+
+
+def quietest_cut(audio: np.ndarray, search_seconds: float = 1.0) -> int:
+    """끝에서 search_seconds 안에서 가장 조용한 20ms 지점. 단어 중간을 자르지 않기 위함"""
+    frame = SAMPLE_RATE // 50
+    start = max(0, len(audio) - int(search_seconds * SAMPLE_RATE))
+    window = audio[start:]
+    n = len(window) // frame
+    if n == 0:
+        return len(audio)
+    energy = np.square(window[: n * frame].reshape(n, frame)).mean(axis=1)
+    return start + int(np.argmin(energy)) * frame + frame // 2
+
+
+def streaming_enabled() -> bool:
+    """
+    녹음 중 부분 전사 여부. 부분 전사는 stt_partial_interval마다 확정되지 않은 꼬리를
+    다시 전사하므로, "auto"면 요청 비용이 없는 local 백엔드에서만 켠다
+    """
+    setting = cfg.get("stt_streaming", "auto")
+    if setting == "auto":
+        return cfg.get("stt_backend", "openai") == "local"
+    return bool(setting)
+
+
+class StreamingTranscriber:
+    """
+    녹음하는 동안 오디오를 구간 단위로 미리 전사한다.
+
+    쌓인 오디오가 stt_segment_seconds를 넘으면 조용한 지점에서 잘라 확정하고,
+    그보다 짧은 나머지는 stt_partial_interval마다 부분 전사해 on_partial로 알린다.
+    키를 떼면 아직 확정되지 않은 짧은 꼬리만 전사하면 되므로 결과가 빨리 나온다.
+    """
+
+    def __init__(
+        self,
+        source: Callable[[], np.ndarray],
+        on_partial: Callable[[str], None] | None,
+    ):
+        self.source = source  # 지금까지 녹음된 오디오를 돌려주는 함수
+        self.on_partial = on_partial
+        self.committed: list[str] = []
+        self.offset = 0  # 확정된 샘플 수
+        self.saved = 0.0  # VAD로 잘라 낸 시간(초)
+        self._commit_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._loop, daemon=True)
 
-        audio = np.concatenate(frames, axis=0)
-        frames.clear()
+    @property
+    def text(self) -> str:
+        return " ".join(t for t in self.committed if t)
 
-        timestamp = datetime.datetime.now().strftime("%Y%m%d_%H%M%S")
-        file_path = Path(AUDIOS_DIR) / f"recording_{timestamp}.wav"
+    def start(self):
+        self._thread.start()
 
-        with wave.open(str(file_path), "wb") as wf:
-            wf.setnchannels(1)
-            wf.setsampwidth(2)
-            wf.setframerate(SAMPLE_RATE)
-            wf.writeframes((audio * 32767).astype(np.int16).tobytes())
+    def _loop(self):
+        interval = float(cfg.get("stt_partial_interval", 1.0))
+        segment = int(float(cfg.get("stt_segment_seconds", 5.0)) * SAMPLE_RATE)
+        while not self._stop.wait(interval):
+            pending = self.source()[self.offset :]
+            if len(pending) < SAMPLE_RATE // 2:
+                continue
+            try:
+                if len(pending) >= segment:
+                    with self._commit_lock:
+                        cut = quietest_cut(pending)
+                        text, saved = transcribe_speech(pending[:cut], prompt=self.text)
+                        self.committed.append(text)
+                        self.offset += cut
+                        self.saved += saved
+                    partial = self.text
+                else:
+                    tail, _ = transcribe_speech(pending, prompt=self.text)
+                    partial = " ".join(t for t in (self.text, tail) if t)
+            except Exception as e:
+                log(f"부분 전사 실패: {e}", level="warning")
+                continue
+            if self.on_partial and not self._stop.is_set():
+                self.on_partial(partial)
 
-        log(f"파일 저장 완료: {file_path}")
+    def finish(self, audio: np.ndarray) -> str:
+        """녹음이 끝난 전체 오디오를 받아 남은 꼬리를 전사하고 전체 텍스트를 돌려준다"""
+        self._stop.set()
+        # 진행 중인 부분 전사는 버리고, 구간 확정만 끝나기를 기다린다
+        with self._commit_lock:
+            tail = audio[self.offset :]
+            if len(tail) >= SAMPLE_RATE // 10:
+                text, saved = transcribe_speech(tail, prompt=self.text)
+                self.committed.append(text)
+                self.saved += saved
+            return self.text
 
+
+class HandsFreePipeline:
+    """
+    발화 -> 전사 -> 쿼리를 단계별 스레드로 처리한다 (핸즈프리 모드).
+
+    단계마다 스레드 하나가 크기가 제한된 FIFO 큐를 처리하므로 말한 순서대로 실행되고,
+    다음 발화의 전사는 이전 명령의 LLM/함수 실행과 겹쳐서 진행된다.
+    뒤 단계가 밀리면 앞 큐가 차고, 가득 차면 새 발화는 버리고 알린다.
+    명령 단계는 LLM 판단과 함수 디스패치까지만 기다리고, 함수 실행(브라우저)은 기다리지 않는다.
+    """
+
+    def __init__(
+        self,
+        run_command: Callable[[str], Future | None],
+        on_partial: Callable[[str], None] | None,
+    ):
+        size = max(1, int(cfg.get("hands_free_queue", 4)))
+        self.run_command = run_command
+        self.on_partial = on_partial
+        self.utterances: queue.Queue = queue.Queue(maxsize=size)
+        self.commands: queue.Queue = queue.Queue(maxsize=size)
+        threading.Thread(target=self._transcribe_loop, daemon=True).start()
+        threading.Thread(target=self._command_loop, daemon=True).start()
+
+    def submit(self, audio: np.ndarray) -> bool:
+        """녹음 스레드에서 호출되므로 기다리지 않는다. 큐가 가득 차 있으면 버린다"""
         try:
-            text = transcribe_audio(file_path)
-            call_back(text)
+            self.utterances.put_nowait(audio)
+            return True
+        except queue.Full:
+            log("⚠️ 처리 대기 중인 명령이 많아 이번 발화는 버립니다.", level="warning")
+            return False
+
+    def _transcribe_loop(self):
+        while True:
+            audio = self.utterances.get()
+            try:
+                text, _ = transcribe_speech(audio)
+            except Exception as e:
+                log(f"오류: {e}", level="error")
+                continue
+            if not text:
+                log("발화에서 인식된 음성이 없습니다.", level="debug")
+                continue
+            log(f"🎙 인식된 명령: {text} (대기 {self.commands.qsize()}개)")
+            # 쿼리 단계가 밀려 있으면 여기서 기다리고, 그만큼 발화 큐가 찬다
+            self.commands.put(text)
+
+    def _command_loop(self):
+        while True:
+            text = self.commands.get()
+            if self.on_partial:
+                self.on_partial(text)
+            try:
+                future = self.run_command(text)
+                # LLM 판단과 디스패치까지만 기다린다. 함수 실행 Future는 디스패치 순서대로
+                # 이미 제출됐으므로, 콜드 실행처럼 오래 걸려도 다음 명령을 막지 않는다
+                if future is not None:
+                    future.result()
+            except (Exception, CancelledError) as e:
+                log(f"명령 실행 실패: {text} ({e or '취소됨'})", level="warning")
+
+
+_voice_enabled = threading.Event()
+_hands_free = threading.Event()
+_wake = threading.Event()
+# 핸즈프리 파이프라인은 처음 켤 때 만든다 (stt()가 만드는 방법을 등록)
+_pipeline: HandsFreePipeline | None = None
+_pipeline_factory: Callable[[], HandsFreePipeline] | None = None
+_pipeline_lock = threading.Lock()
+
+
+def _ensure_pipeline() -> HandsFreePipeline | None:
+    global _pipeline
+    with _pipeline_lock:
+        if _pipeline is None and _pipeline_factory is not None:
+            _pipeline = _pipeline_factory()
+        return _pipeline
+
+
+def set_voice_enabled(enabled: bool):
+    """
+    음성 입력 on/off. 끄면 입력 스트림을 닫아 장치를 더 이상 폴링하지 않는다(대기 모드).
+    """
+    cfg["stt_enabled"] = enabled
+    if enabled:
+        _voice_enabled.set()
+    else:
+        _voice_enabled.clear()
+    _wake.set()
+
+
+def set_hands_free(enabled: bool):
+    """핸즈프리(항상 듣기) 모드 on/off. 음성 입력이 켜져 있어야 동작한다"""
+    cfg["hands_free"] = enabled
+    if enabled:
+        _ensure_pipeline()
+        _hands_free.set()
+        log("핸즈프리 모드: 말하면 바로 명령으로 실행합니다.")
+    else:
+        _hands_free.clear()
+    _wake.set()
+
+
+def stt(
+    call_back: Callable[[str], None],
+    on_partial: Callable[[str], None] | None = None,
+    on_utterance: Callable[[str], Future | None] | None = None,
+):
+    """
+    Ctrl + Shift + Alt 누르고 있을 때만 녹음 후 Whisper 변환.
+    부분 전사를 쓰면(streaming_enabled) 녹음 중에 부분 전사 결과를 on_partial로 보낸다.
+
+    핸즈프리 모드에서는 단축키 없이 VAD로 나눈 발화마다 on_utterance(text)를
+    순서대로 호출한다 (없으면 call_back). 반환된 Future(LLM 판단과 디스패치)가 끝나야
+    다음 발화로 넘어간다. 파이프라인 스레드는 핸즈프리를 처음 켤 때 만든다.
+
+    입력은 미리 할당한 링 버퍼에 계속 쓰고, 녹음 구간은 위치로만 표시한다.
+    단축키가 눌리기 직전 stt_preroll초도 함께 녹음되고, stt_max_seconds를 넘으면
+    자동으로 녹음을 끝내고, 단축키를 뗐다 다시 누를 때까지 새로 시작하지 않는다.
+    """
+
+    max_samples = int(float(cfg.get("stt_max_seconds", 30)) * SAMPLE_RATE)
+    preroll = int(float(cfg.get("stt_preroll", 0.3)) * SAMPLE_RATE)
+    # 스트리밍 전사가 마지막 구간을 읽는 동안 덮어쓰지 않도록 여유를 둔다
+    ring = AudioRing(max_samples + preroll + 2 * SAMPLE_RATE)
+    session = {"start": 0, "streamer": None}
+    # 최대 길이로 자동 종료된 뒤에는 키를 계속 누르고 있거나 자동 반복으로 눌림 이벤트가
+    # 다시 와도 녹음을 새로 시작하지 않는다. 단축키를 한 번 떼야 다시 시작할 수 있다
+    hotkey = {"await_release": False}
+    required_keys = {keyboard.Key.ctrl, keyboard.Key.shift, keyboard.Key.alt}
+    limit_reached = threading.Event()
+    session_lock = threading.Lock()  # 키보드 리스너와 녹음 스레드가 함께 시작/종료를 부른다
+
+    global _pipeline_factory
+
+    def make_pipeline() -> HandsFreePipeline:
+        return HandsFreePipeline(on_utterance or call_back, on_partial)
+
+    _pipeline_factory = make_pipeline
+    # 핸즈프리 VAD 상태. segmenter가 None이면 꺼져 있는 것
+    listened = {"position": 0, "segmenter": None}
+
+    def callback(indata, frames_count, time_info, status):
+        ring.write(indata[:, 0])
+        if recording and ring.position - session["start"] >= max_samples:
+            limit_reached.set()
+            _wake.set()
+        elif _hands_free.is_set():
+            _wake.set()
+
+    def listen():
+        """링에 새로 들어온 오디오를 VAD에 넣고, 끝난 발화를 파이프라인에 넘긴다"""
+        segmenter = listened["segmenter"]
+        if segmenter is None:
+            # 켜진 시점부터 듣는다. 그 전에 링에 남아 있던 소리는 무시
+            segmenter = listened["segmenter"] = StreamingSegmenter()
+            listened["position"] = ring.position
+        start = max(listened["position"], ring.oldest())
+        end = start + (ring.position - start) // FRAME * FRAME
+        if end <= start:
+            return
+        pipeline = _ensure_pipeline()
+        for segment_start, segment_end in segmenter.feed(ring.read(start, end), start):
+            pipeline.submit(ring.read(segment_start, segment_end))
+        listened["position"] = end
+
+    def finish_streaming(current: StreamingTranscriber, audio: np.ndarray):
+        released = time.perf_counter()
+        try:
+            text = current.finish(audio)
         except Exception as e:
-            log(f"오류: {e}")
+            log(f"오류: {e}", level="error")
+            return
+        log(f"전사 완료 (키를 뗀 뒤 {time.perf_counter() - released:.2f}s)")
+        if current.saved:
+            log(f"VAD: 무음 {current.saved:.1f}s를 전사에서 제외")
+        if not text:
+            log("⚠️ 인식된 음성이 없어 쿼리를 실행하지 않습니다.", level="warning")
+            return
+        if on_partial:
+            on_partial(text)
+        call_back(text)
+        archive_audio(audio)
+
+    def save_and_transcribe(audio: np.ndarray):
+        """녹음이 끝나면 메모리에서 바로 변환하고, 필요하면 따로 보관"""
+        if len(audio) == 0:
+            log("⚠️ 녹음된 데이터가 없습니다.", level="warning")
+            return
+
+        try:
+            text, saved = transcribe_speech(audio)
+            if saved:
+                log(f"VAD: 무음 {saved:.1f}s를 전사에서 제외")
+            if text:
+                call_back(text)
+            else:
+                log("⚠️ 인식된 음성이 없어 쿼리를 실행하지 않습니다.", level="warning")
+        except Exception as e:
+            log(f"오류: {e}", level="error")
+        archive_audio(audio)
+
+    def start_recording():
+        global recording
+        with session_lock:
+            if recording:
+                return
+            session["start"] = max(ring.oldest(), ring.position - preroll)
+            limit_reached.clear()
+            recording = True
+            if streaming_enabled():
+                session["streamer"] = StreamingTranscriber(
+                    lambda start=session["start"]: ring.read(start), on_partial
+                )
+                session["streamer"].start()
+        log("녹음 시작 (Ctrl + Shift + Alt 누르는 중)")
+
+    def stop_recording(reason: str):
+        global recording
+        with session_lock:
+            if not recording:
+                return
+            recording = False
+            # 링이 덮어쓰기 전에 이번 녹음 구간만 복사해 둔다
+            audio = ring.read(session["start"])
+            current, session["streamer"] = session["streamer"], None
+        log(reason)
+        if current is not None:
+            target, args = finish_streaming, (current, audio)
+        else:
+            target, args = save_and_transcribe, (audio,)
+        threading.Thread(target=target, args=args, daemon=True).start()
 
     def recorder_thread():
-        """항상 InputStream 유지하면서 recording=True일 때만 버퍼에 추가"""
-        with sd.InputStream(samplerate=SAMPLE_RATE, channels=1, callback=callback):
-            while True:
-                time.sleep(0.1)
+        """음성 입력이 켜져 있는 동안만 InputStream을 연다. 꺼져 있으면 대기"""
+        while True:
+            _voice_enabled.wait()
+            with sd.InputStream(
+                samplerate=SAMPLE_RATE,
+                channels=1,
+                dtype="float32",
+                blocksize=SAMPLE_RATE // 10,
+                callback=callback,
+            ):
+                while _voice_enabled.is_set():
+                    _wake.wait()
+                    _wake.clear()
+                    if limit_reached.is_set():
+                        limit_reached.clear()
+                        # 그사이 키를 이미 뗐다면 기다릴 필요가 없다
+                        hotkey["await_release"] = required_keys.issubset(pressed_keys)
+                        stop_recording("최대 녹음 길이에 도달해 녹음 종료됨. (키를 뗐다 다시 누르면 새 녹음)")
+                    if _hands_free.is_set():
+                        listen()
+                    else:
+                        listened["segmenter"] = None
+            listened["segmenter"] = None
+            stop_recording("음성 입력이 꺼져 녹음 종료됨.")
 
     def on_press(key):
-        global recording
         pressed_keys.add(key)
 
-        required_keys = {keyboard.Key.ctrl, keyboard.Key.shift, keyboard.Key.alt}
-
-        if required_keys.issubset(pressed_keys) and not recording:
-            recording = True
-            log("녹음 시작 (Ctrl + Shift + Alt 누르는 중)")
+        if (
+            required_keys.issubset(pressed_keys)
+            and not recording
+            and not hotkey["await_release"]
+            and _voice_enabled.is_set()
+            and not _hands_free.is_set()
+        ):
+            start_recording()
 
     def on_release(key):
-        global recording
         pressed_keys.discard(key)
 
-        required_keys = {keyboard.Key.ctrl, keyboard.Key.shift, keyboard.Key.alt}
-        if recording and not required_keys.issubset(pressed_keys):
-            recording = False
-            log("키를 떼서 녹음 종료됨.")
-            threading.Thread(target=save_and_transcribe, daemon=True).start()
+        if not required_keys.issubset(pressed_keys):
+            hotkey["await_release"] = False
+            if recording:
+                stop_recording("키를 떼서 녹음 종료됨.")
+
+    # 로컬 모델은 첫 요청 전에 미리 로드
+    if cfg.get("stt_backend", "openai") == "local":
+        warm_backend()
 
     # 🔹 백그라운드 녹음 스레드
     threading.Thread(target=recorder_thread, daemon=True).start()
+    set_voice_enabled(cfg.get("stt_enabled", True))
+    if cfg.get("hands_free", False):
+        set_hands_free(True)
 
     # 🔹 키보드 리스너
     listener = keyboard.Listener(on_press=on_press, on_release=on_release)
@@ -109,7 +462,7 @@ if __name__ == "__main__":
         print("🗣️ 변환 결과:", text)
 
     print("🎧 Ctrl + Shift + Alt(Option)을 누르면 녹음이 시작됩니다.")
-    stt(print_result)
+    stt(print_result, on_partial=lambda text: print("…", text))
 
     while True:
         time.sleep(1)
@@ -0,0 +1,193 @@
+# stt_backends.py
+"""
+음성 인식(STT) 백엔드.
+
+- "openai": OpenAI 호환 /audio/transcriptions API. stt_base_url을 지정하면
+  로컬 faster-whisper 서버나 utils/stt_server.py 대역 서버로 보낸다.
+- "local": faster-whisper 모델을 이 프로세스 안에서 직접 실행 (오프라인).
+
+백엔드는 설정별로 한 번만 만들어 재사용하므로 HTTP 연결(keep-alive)이나
+로드한 모델을 요청마다 다시 만들지 않습니다.
+"""
+
+import abc
+import io
+import os
+import threading
+import time
+import wave
+
+import numpy as np
+
+from config import cfg
+from utils.dpg_ui import log
+from utils.vad import SAMPLE_RATE
+
+try:
+    import soundfile
+except ImportError:  # FLAC 인코딩은 선택 사항. 없으면 WAV로 보낸다
+    soundfile = None
+
+_warned_no_flac = False
+
+
+def encode_wav(audio: np.ndarray) -> bytes:
+    """float32 [-1, 1] 모노 오디오를 메모리 안에서 16bit WAV로 변환"""
+    buffer = io.BytesIO()
+    with wave.open(buffer, "wb") as wf:
+        wf.setnchannels(1)
+        wf.setsampwidth(2)
+        wf.setframerate(SAMPLE_RATE)
+        wf.writeframes((np.clip(audio, -1, 1) * 32767).astype(np.int16).tobytes())
+    return buffer.getvalue()
+
+
+def encode_audio(audio: np.ndarray) -> tuple[bytes, str]:
+    """업로드용 (데이터, 파일 이름). stt_audio_format이 flac이면 압축해 요청 크기를 줄인다"""
+    global _warned_no_flac
+
+    flac = cfg.get("stt_audio_format", "wav") == "flac"
+    if flac and soundfile is None and not _warned_no_flac:
+        _warned_no_flac = True
+        log("FLAC 인코딩에 필요한 soundfile이 없어 WAV로 보냅니다.", level="warning")
+    if flac and soundfile is not None:
+        buffer = io.BytesIO()
+        soundfile.write(
+            buffer, np.clip(audio, -1, 1), SAMPLE_RATE, format="FLAC", subtype="PCM_16"
+        )
+        return buffer.getvalue(), "audio.flac"
+    return encode_wav(audio), "audio.wav"
+
+
+class STTBackend(abc.ABC):
+    """백엔드 공통: 요청 시간 기록. 하위 클래스는 _transcribe만 구현한다"""
+
+    name = "base"
+
+    def __init__(self):
+        self.requests = 0
+        self.total_seconds = 0.0
+        self.last_seconds = 0.0
+
+    @abc.abstractmethod
+    def _transcribe(self, audio: np.ndarray, prompt: str) -> str: ...
+
+    def transcribe(self, audio: np.ndarray, prompt: str = "") -> str:
+        """float32 모노 16kHz 오디오를 텍스트로. 요청마다 걸린 시간을 기록"""
+        started = time.perf_counter()
+        text = self._transcribe(audio, prompt)
+        elapsed = time.perf_counter() - started
+
+        self.requests += 1
+        self.total_seconds += elapsed
+        self.last_seconds = elapsed
+        log(
+            f"STT[{self.name}] {len(audio) / SAMPLE_RATE:.1f}s 오디오 -> {elapsed:.2f}s "
+            f"(평균 {self.total_seconds / self.requests:.2f}s, {self.requests}회)",
+            level="debug",
+        )
+        return text
+
+
+class OpenAIBackend(STTBackend):
+    name = "openai"
+
+    def __init__(self, base_url: str | None, model: str, timeout: float):
+        super().__init__()
+        import openai
+
+        self.model = model
+        # 클라이언트 하나를 계속 쓰면 내부 httpx 연결 풀이 keep-alive로 재사용된다
+        self.client = openai.OpenAI(
+            base_url=base_url or None,
+            api_key=os.getenv("OPENAI_API_KEY") or ("local" if base_url else None),
+            timeout=timeout,
+            max_retries=1,
+        )
+
+    def _transcribe(self, audio: np.ndarray, prompt: str) -> str:
+        data, filename = encode_audio(audio)
+        kwargs = {"prompt": prompt} if prompt else {}
+        language = cfg.get("stt_language")
+        if language:
+            kwargs["language"] = language
+        transcript = self.client.audio.transcriptions.create(
+            model=self.model,
+            file=(filename, data),
+            **kwargs,
+        )
+        return transcript.text.strip()
+
+
+class LocalWhisperBackend(STTBackend):
+    name = "local"
+
+    def __init__(self, model: str, device: str, compute_type: str):
+        super().__init__()
+        try:
+            from faster_whisper import WhisperModel
+        except ImportError as e:
+            raise RuntimeError(
+                "로컬 STT에는 faster-whisper 패키지가 필요합니다 (pip install faster-whisper)"
+            ) from e
+
+        started = time.perf_counter()
+        self.model = WhisperModel(model, device=device, compute_type=compute_type)
+        self._lock = threading.Lock()  # 모델 하나를 여러 스레드가 동시에 쓰지 않도록
+        log(f"로컬 STT 모델 로드 ({model}, {time.perf_counter() - started:.1f}s)")
+
+    def _transcribe(self, audio: np.ndarray, prompt: str) -> str:
+        with self._lock:
+            segments, _ = self.model.transcribe(
+                np.asarray(audio, dtype=np.float32).reshape(-1),
+                language=cfg.get("stt_language") or None,
+                initial_prompt=prompt or None,
+                beam_size=1,
+            )
+            return " ".join(segment.text.strip() for segment in segments).strip()
+
+
+_backends: dict[tuple, STTBackend] = {}
+_backends_lock = threading.Lock()
+
+
+def _backend_key() -> tuple:
+    if cfg.get("stt_backend", "openai") == "local":
+        return (
+            "local",
+            cfg.get("stt_local_model", "small"),
+            cfg.get("stt_local_device", "auto"),
+            cfg.get("stt_local_compute_type", "int8"),
+        )
+    return (
+        "openai",
+        cfg.get("stt_base_url"),
+        cfg.get("stt_model", "whisper-1"),
+        float(cfg.get("stt_timeout", 30)),
+    )
+
+
+def get_backend() -> STTBackend:
+    """현재 설정의 백엔드. 설정이 같으면 같은 인스턴스를 돌려준다"""
+    key = _backend_key()
+    with _backends_lock:
+        backend = _backends.get(key)
+        if backend is None:
+            if key[0] == "local":
+                backend = LocalWhisperBackend(*key[1:])
+            else:
+                backend = OpenAIBackend(*key[1:])
+            _backends[key] = backend
+        return backend
+
+
+def warm_backend():
+    """로컬 모델처럼 준비가 오래 걸리는 백엔드를 백그라운드에서 미리 만든다"""
+
+    def _warm():
+        try:
+            get_backend()
+        except Exception as e:
+            log(f"STT 백엔드 준비 실패: {e}", level="error")
+
+    threading.Thread(target=_warm, daemon=True).start()
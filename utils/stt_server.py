@@ -0,0 +1,131 @@
+# stt_server.py
+"""
+테스트용 로컬 전사 서버 (OpenAI 호환 POST /v1/audio/transcriptions).
+
+기본은 실제 인식 없이 정해진 문장을 돌려주므로 마이크/네트워크 없이
+스트리밍 STT 흐름을 확인할 수 있습니다. --model을 주면 faster-whisper로
+실제 전사하는 로컬 서버가 됩니다. config.json의 stt_base_url을
+http://127.0.0.1:<port>/v1 로 두면 앱이 이 서버로 전사를 요청합니다.
+
+    python -m utils.stt_server --port 8765 --reply "네이버 열어줘" --delay 0.1
+    python -m utils.stt_server --port 8765 --model small
+"""
+
+import argparse
+import io
+import json
+import threading
+import time
+import wave
+from email import policy
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+def parse_multipart(content_type: str, body: bytes) -> dict:
+    """multipart/form-data 본문을 {필드 이름: bytes} 로"""
+    message = BytesParser(policy=policy.HTTP).parsebytes(
+        f"Content-Type: {content_type}\r\n\r\n".encode() + body
+    )
+    fields = {}
+    for part in message.iter_parts():
+        name = part.get_param("name", header="content-disposition")
+        if name:
+            fields[name] = part.get_payload(decode=True) or b""
+    return fields
+
+
+def audio_seconds(data: bytes) -> float:
+    try:
+        with wave.open(io.BytesIO(data), "rb") as wf:
+            return wf.getnframes() / wf.getframerate()
+    except (wave.Error, EOFError):
+        return 0.0
+
+
+def whisper_transcriber(model_name: str):
+    """faster-whisper로 실제 전사하는 함수 (WAV/FLAC 등 파일 바이트 -> 텍스트)"""
+    from faster_whisper import WhisperModel
+
+    model = WhisperModel(model_name, compute_type="int8")
+    lock = threading.Lock()
+
+    def transcribe(data: bytes, prompt: str, language: str) -> str:
+        with lock:
+            segments, _ = model.transcribe(
+                io.BytesIO(data),
+                language=language or None,
+                initial_prompt=prompt or None,
+                beam_size=1,
+            )
+            return " ".join(segment.text.strip() for segment in segments).strip()
+
+    return transcribe
+
+
+def make_handler(reply: str, delay: float, transcribe=None):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"  # keep-alive
+
+        def do_POST(self):
+            if not self.path.rstrip("/").endswith("/audio/transcriptions"):
+                self.send_error(404)
+                return
+            length = int(self.headers.get("Content-Length", 0))
+            fields = parse_multipart(
+                self.headers.get("Content-Type", ""), self.rfile.read(length)
+            )
+            audio = fields.get("file", b"")
+            time.sleep(delay)
+
+            if transcribe is not None:
+                text = transcribe(
+                    audio,
+                    fields.get("prompt", b"").decode(),
+                    fields.get("language", b"").decode(),
+                )
+            else:
+                text = reply if audio_seconds(audio) > 0 else ""
+            body = json.dumps({"text": text}, ensure_ascii=False).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def serve(
+    port: int = 8765,
+    reply: str = "테스트 음성입니다",
+    delay: float = 0.0,
+    model: str | None = None,
+) -> ThreadingHTTPServer:
+    """백그라운드 스레드에서 서버를 띄우고 돌려준다 (shutdown()으로 종료)"""
+    transcribe = whisper_transcriber(model) if model else None
+    server = ThreadingHTTPServer(
+        ("127.0.0.1", port), make_handler(reply, delay, transcribe)
+    )
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--reply", type=str, default="테스트 음성입니다")
+    parser.add_argument("--delay", type=float, default=0.0)
+    parser.add_argument("--model", type=str, default=None)
+    args = parser.parse_args()
+
+    server = serve(args.port, args.reply, args.delay, args.model)
+    print(f"전사 대역 서버: http://127.0.0.1:{args.port}/v1")
+    try:
+        while True:
+            time.sleep(1)
+    except KeyboardInterrupt:
+        server.shutdown()
@@ -0,0 +1,142 @@
+# vad.py
+"""
+에너지와 영점 교차율(ZCR)을 이용한 간단한 음성 구간 검출(VAD).
+
+20ms 프레임 단위로 NumPy 벡터 연산만 사용합니다. 배경 소음 수준에 여유(margin)를 더한 값과
+절대 임계값(vad_energy_db) 중 큰 쪽을 넘으면 음성으로 보고, 그보다 조금 약해도 ZCR이 높으면
+(ㅅ, ㅊ 같은 무성 자음) 음성으로 봅니다.
+
+배경 소음 수준은 판정할 클립에서 추정하지 않습니다. 처음부터 끝까지 말하는 클립이면
+소음으로 잘못 잡혀 음성이 통째로 버려지기 때문입니다. 대신 StreamingSegmenter가 무음 프레임으로
+추적한 값(ambient_noise_db)을 쓰고, 아직 없으면 절대 임계값만 씁니다.
+"""
+
+import numpy as np
+
+from config import cfg
+
+SAMPLE_RATE = 16000
+FRAME = SAMPLE_RATE // 50  # 20ms
+
+# 무음 프레임으로 추적한 주변 소음 수준 (dBFS). None이면 절대 임계값만 사용
+_ambient = {"noise_db": None}
+
+
+def ambient_noise_db() -> float | None:
+    return _ambient["noise_db"]
+
+
+def set_ambient_noise_db(value: float | None):
+    _ambient["noise_db"] = value
+
+
+def frame_features(audio: np.ndarray) -> tuple[np.ndarray, np.ndarray]:
+    """프레임별 (에너지 dBFS, 영점 교차율)"""
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    n = len(audio) // FRAME
+    frames = audio[: n * FRAME].reshape(n, FRAME)
+    energy_db = 10 * np.log10(np.square(frames).mean(axis=1) + 1e-10)
+    signs = np.signbit(frames)
+    zcr = (signs[:, 1:] != signs[:, :-1]).mean(axis=1)
+    return energy_db, zcr
+
+
+def speech_mask(
+    energy_db: np.ndarray, zcr: np.ndarray, noise_floor_db: float | None = None
+) -> np.ndarray:
+    """프레임별 음성 여부. noise_floor_db가 없으면 추적한 주변 소음, 그것도 없으면 절대 임계값"""
+    if len(energy_db) == 0:
+        return np.zeros(0, dtype=bool)
+    if noise_floor_db is None:
+        noise_floor_db = ambient_noise_db()
+    threshold = float(cfg.get("vad_energy_db", -45.0))
+    if noise_floor_db is not None:
+        threshold = max(threshold, noise_floor_db + float(cfg.get("vad_margin_db", 10.0)))
+    voiced = energy_db > threshold
+    unvoiced = (energy_db > threshold - 6) & (zcr > float(cfg.get("vad_zcr", 0.25)))
+    return voiced | unvoiced
+
+
+def trim_silence(audio: np.ndarray) -> tuple[np.ndarray | None, float]:
+    """
+    앞뒤 무음을 잘라낸 오디오와 절약한 시간(초)을 반환합니다.
+    음성이 vad_min_speech초보다 짧으면 (None, 전체 길이)를 반환합니다.
+    """
+    audio = np.asarray(audio, dtype=np.float32).reshape(-1)
+    total = len(audio) / SAMPLE_RATE
+    mask = speech_mask(*frame_features(audio))
+
+    min_frames = float(cfg.get("vad_min_speech", 0.25)) * SAMPLE_RATE / FRAME
+    if mask.sum() < min_frames:
+        return None, total
+
+    indices = np.flatnonzero(mask)
+    padding = int(float(cfg.get("vad_padding", 0.2)) * SAMPLE_RATE)
+    start = max(0, indices[0] * FRAME - padding)
+    end = min(len(audio), (indices[-1] + 1) * FRAME + padding)
+    trimmed = audio[start:end]
+    return trimmed, total - len(trimmed) / SAMPLE_RATE
+
+
+class StreamingSegmenter:
+    """
+    연속으로 들어오는 오디오를 발화 단위로 나눈다 (핸즈프리 모드).
+
+    음성 프레임이 vad_start_speech초 이어지면 발화 시작, 무음이 vad_end_silence초
+    이어지면 발화 끝으로 본다. 배경 소음 수준은 무음 프레임의 이동 평균으로 따라간다.
+    위치는 링 버퍼와 같은 "전체 샘플 수" 기준이다.
+    """
+
+    def __init__(self):
+        self.noise_floor_db: float | None = None
+        self.in_speech = False
+        self.run = 0  # 연속된 음성 프레임 수
+        self.start = 0
+        self.last_speech = 0
+
+    def feed(self, audio: np.ndarray, position: int) -> list[tuple[int, int]]:
+        """position부터 시작하는 오디오를 받아 끝난 발화의 (시작, 끝) 목록을 반환"""
+        energy_db, zcr = frame_features(audio)
+        if len(energy_db) == 0:
+            return []
+        if self.noise_floor_db is None:
+            # 말하는 도중에 시작해도 첫 블록이 소음으로 잡히지 않도록 절대 임계값 아래로 제한
+            margin = float(cfg.get("vad_margin_db", 10.0))
+            ceiling = float(cfg.get("vad_energy_db", -45.0)) - margin
+            self.noise_floor_db = ambient_noise_db()
+            if self.noise_floor_db is None:
+                self.noise_floor_db = min(float(np.percentile(energy_db, 10)), ceiling)
+        mask = speech_mask(energy_db, zcr, self.noise_floor_db)
+
+        silence = energy_db[~mask]
+        if len(silence):
+            self.noise_floor_db += 0.05 * (float(silence.mean()) - self.noise_floor_db)
+            # 단축키 녹음의 trim_silence도 같은 소음 수준을 쓰도록 공유
+            set_ambient_noise_db(self.noise_floor_db)
+
+        start_frames = max(1, int(float(cfg.get("vad_start_speech", 0.15)) * 50))
+        end_silence = int(float(cfg.get("vad_end_silence", 0.6)) * SAMPLE_RATE)
+        padding = int(float(cfg.get("vad_padding", 0.2)) * SAMPLE_RATE)
+        max_length = int(float(cfg.get("hands_free_max_utterance", 15)) * SAMPLE_RATE)
+
+        segments = []
+        for i, speech in enumerate(mask):
+            frame_start = position + i * FRAME
+            frame_end = frame_start + FRAME
+            if speech:
+                self.run += 1
+                self.last_speech = frame_end
+                if not self.in_speech and self.run >= start_frames:
+                    self.in_speech = True
+                    self.start = max(0, frame_end - self.run * FRAME - padding)
+            else:
+                self.run = 0
+                if self.in_speech and frame_end - self.last_speech >= end_silence:
+                    segments.append((self.start, self.last_speech + padding))
+                    self.in_speech = False
+
+            if self.in_speech and frame_end - self.start >= max_length:
+                # 너무 긴 발화는 잘라서 먼저 보낸다
+                segments.append((self.start, frame_end))
+                self.start = frame_end
+        return segments
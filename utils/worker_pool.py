@@ -0,0 +1,244 @@
+# worker_pool.py
+import json
+import queue
+import subprocess
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import Future
+
+from env import APP_DIR
+from errors import WorkerBusyError
+from utils import browser_lifecycle
+from utils.dpg_ui import log
+
+
+class Worker:
+    """Playwright가 미리 로드된 워커 프로세스 하나"""
+
+    def __init__(self):
+        self.process = subprocess.Popen(
+            [sys.executable, "-m", "utils.function_worker"],
+            cwd=APP_DIR,
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=sys.stderr,
+            text=True,
+            encoding="utf-8",
+            bufsize=1,
+        )
+        self.jobs_done = 0
+        self._messages: queue.Queue[dict | None] = queue.Queue()
+        self._write_lock = threading.Lock()
+        threading.Thread(target=self._read_loop, daemon=True).start()
+
+    def _read_loop(self):
+        """세션 이벤트는 작업과 상관없이 오므로 항상 읽어서 나눠 준다"""
+        for line in self.process.stdout:
+            message = json.loads(line)
+            if message.get("type") == "session":
+                browser_lifecycle.handle_event(self.process.pid, message)
+            else:
+                self._messages.put(message)
+        self._messages.put(None)
+
+    def wait_ready(self) -> bool:
+        message = self._read()
+        return message is not None and message.get("type") == "ready"
+
+    def _read(self) -> dict | None:
+        return self._messages.get()
+
+    def send(self, message: dict):
+        with self._write_lock:
+            self.process.stdin.write(json.dumps(message, ensure_ascii=False) + "\n")
+            self.process.stdin.flush()
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, file_path: str, args: dict, on_output=None, **options) -> dict:
+        job = {"id": uuid.uuid4().hex, "path": file_path, "args": args, **options}
+        self.send(job)
+
+        while True:
+            message = self._read()
+            if message is None:
+                code = self.process.poll()
+                return {"code": -1 if code is None else code, "error": "워커 종료"}
+            if message.get("id") != job["id"]:
+                continue
+            if message.get("type") == "output":
+                if on_output is not None:
+                    on_output(message["stream"], message["line"])
+            elif message.get("type") == "done":
+                self.jobs_done += 1
+                return message
+
+    def close(self):
+        try:
+            with self._write_lock:
+                self.process.stdin.close()
+            self.process.wait(timeout=5)
+        except Exception:
+            self.process.kill()
+
+
+class WorkerPool:
+    """
+    미리 띄워 둔 워커 프로세스에 함수 실행 작업을 배분합니다.
+    워커는 max_jobs 번 실행하면 새 프로세스로 교체(recycle)됩니다.
+    acquire_timeout초 안에 빈 워커가 없으면 그 실행은 WorkerBusyError로 끝납니다.
+    """
+
+    def __init__(self, size: int, max_jobs: int, acquire_timeout: float = 10):
+        self.size = max(1, size)
+        self.max_jobs = max(1, max_jobs)
+        self.acquire_timeout = acquire_timeout
+        self._idle: queue.Queue[Worker] = queue.Queue()
+        self._workers: set[Worker] = set()
+        self._closed = False
+        self.broken = False
+
+        for _ in range(self.size):
+            self._spawn()
+
+    def _spawn(self):
+        def _start():
+            try:
+                worker = Worker()
+            except Exception as e:
+                self.broken = True
+                log(f"워커 시작 실패: {e}", level="error")
+                return
+
+            if not worker.wait_ready():
+                self.broken = True
+                worker.close()
+                log("워커 초기화 실패 (playwright 설치를 확인하세요)", level="error")
+                return
+
+            self._workers.add(worker)
+            browser_lifecycle.register_worker(worker.process.pid, worker.send)
+            if self._closed:
+                self._close(worker)
+            else:
+                self._idle.put(worker)
+
+        threading.Thread(target=_start, daemon=True).start()
+
+    def _take_idle(self, pid: int) -> Worker | None:
+        """특정 워커가 놀고 있으면 그 워커를 꺼낸다 (재사용 세션이 있는 워커)"""
+        found = None
+        others = []
+        while True:
+            try:
+                worker = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if found is None and worker.process.pid == pid:
+                found = worker
+            else:
+                others.append(worker)
+        for worker in others:
+            self._idle.put(worker)
+        return found
+
+    def _acquire(
+        self, prefer: int | None = None, timeout: float | None = None
+    ) -> Worker | None:
+        """빈 워커를 꺼낸다. 풀이 닫혔거나 timeout(없으면 acquire_timeout)초가 지나면 None"""
+        if prefer is not None:
+            worker = self._take_idle(prefer)
+            if worker is not None:
+                return worker
+        timeout = self.acquire_timeout if timeout is None else timeout
+        deadline = time.monotonic() + timeout
+        while not self._closed and not self.broken:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                return self._idle.get(timeout=min(1, remaining))
+            except queue.Empty:
+                continue
+        return None
+
+    def _close(self, worker: Worker):
+        self._workers.discard(worker)
+        worker.close()
+        browser_lifecycle.unregister_worker(worker.process.pid)
+
+    def _release(self, worker: Worker):
+        if self._closed:
+            self._close(worker)
+        elif not worker.alive() or (
+            # 열어 둔 브라우저가 있는 워커는 세션이 끝날 때까지 교체를 미룬다
+            worker.jobs_done >= self.max_jobs
+            and not browser_lifecycle.has_sessions(worker.process.pid)
+        ):
+            self._close(worker)
+            self._spawn()
+        else:
+            self._idle.put(worker)
+
+    def submit(
+        self,
+        file_path: str,
+        args: dict,
+        on_output=None,
+        prefer=None,
+        acquire_timeout: float | None = None,
+        **options,
+    ) -> Future:
+        """
+        prefer: 가능하면 이 pid의 워커에서 실행 (재사용 세션)
+        acquire_timeout: 이 실행만 빈 워커를 기다리는 시간을 따로 정할 때
+        """
+        future: Future = Future()
+        timeout = self.acquire_timeout if acquire_timeout is None else acquire_timeout
+
+        def _run():
+            worker = self._acquire(prefer, timeout)
+            if worker is None:
+                if self._closed or self.broken:
+                    future.set_exception(RuntimeError("사용 가능한 워커가 없습니다."))
+                else:
+                    future.set_exception(
+                        WorkerBusyError(f"{timeout:g}초 동안 빈 워커가 없습니다.")
+                    )
+                return
+            try:
+                future.set_result(worker.run(file_path, args, on_output, **options))
+            except Exception as e:
+                future.set_exception(e)
+            finally:
+                self._release(worker)
+
+        threading.Thread(target=_run, daemon=True).start()
+        return future
+
+    def broadcast(self, message: dict):
+        """모든 워커에 제어 메시지를 보낸다. 실행 중인 워커는 현재 작업이 끝난 뒤 처리한다"""
+        for worker in list(self._workers):
+            if not worker.alive():
+                continue
+            try:
+                worker.send(message)
+            except Exception:
+                pass
+
+    def shutdown(self):
+        """유휴 워커는 바로 종료하고, 실행 중인 워커는 현재 작업 후 종료되도록 한다"""
+        self._closed = True
+        while True:
+            try:
+                self._close(self._idle.get_nowait())
+            except queue.Empty:
+                break
+        for worker in list(self._workers):
+            try:
+                worker.process.stdin.close()
+            except Exception:
+                pass